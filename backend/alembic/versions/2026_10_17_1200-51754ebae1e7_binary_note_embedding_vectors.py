@@ -0,0 +1,104 @@
+"""binary_note_embedding_vectors
+
+Replace the JSON text column note_embeddings.embedding_vector with raw
+little-endian float bytes (embedding) plus their dtype (embedding_dtype).
+Existing rows are converted in batches.
+
+Revision ID: 51754ebae1e7
+Revises: 515d52c1b4d4
+Create Date: 2026-10-17 12:00:00.000000+00:00
+
+"""
+
+import json
+
+from alembic import op
+import numpy as np
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "51754ebae1e7"
+down_revision = "515d52c1b4d4"
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 1000
+
+STORAGE_DTYPES = {"float32": "<f4", "float16": "<f2"}
+
+note_embeddings = sa.table(
+    "note_embeddings",
+    sa.column("id", sa.Integer),
+    sa.column("embedding_vector", sa.Text),
+    sa.column("embedding", sa.LargeBinary),
+    sa.column("embedding_dtype", sa.String),
+)
+
+
+def _convert(source_column, encode, values) -> None:
+    """Rewrite every non-null source_column value, BATCH_SIZE rows at a time"""
+    bind = op.get_bind()
+    table = note_embeddings
+    last_id = 0
+    converted = 0
+    while True:
+        rows = bind.execute(
+            sa.select(table.c.id, *source_column)
+            .where(table.c.id > last_id, source_column[0].isnot(None))
+            .order_by(table.c.id)
+            .limit(BATCH_SIZE)
+        ).fetchall()
+        if not rows:
+            break
+
+        bind.execute(
+            table.update().where(table.c.id == sa.bindparam("row_id")).values(**values),
+            [{"row_id": row[0], **encode(row)} for row in rows],
+        )
+        last_id = rows[-1][0]
+        converted += len(rows)
+
+    print(f"  converted {converted} note embedding vectors")
+
+
+def upgrade() -> None:
+    op.add_column(
+        "note_embeddings", sa.Column("embedding", sa.LargeBinary(), nullable=True)
+    )
+    op.add_column(
+        "note_embeddings",
+        sa.Column("embedding_dtype", sa.String(length=16), nullable=True),
+    )
+
+    _convert(
+        [note_embeddings.c.embedding_vector],
+        lambda row: {
+            "blob": np.asarray(json.loads(row[1]), dtype="<f4").tobytes(),
+        },
+        {"embedding": sa.bindparam("blob"), "embedding_dtype": "float32"},
+    )
+
+    with op.batch_alter_table("note_embeddings") as batch_op:
+        batch_op.drop_column("embedding_vector")
+
+
+def downgrade() -> None:
+    op.add_column(
+        "note_embeddings", sa.Column("embedding_vector", sa.Text(), nullable=True)
+    )
+
+    _convert(
+        [note_embeddings.c.embedding, note_embeddings.c.embedding_dtype],
+        lambda row: {
+            "text": json.dumps(
+                np.frombuffer(row[1], dtype=STORAGE_DTYPES[row[2] or "float32"])
+                .astype(float)
+                .tolist()
+            ),
+        },
+        {"embedding_vector": sa.bindparam("text")},
+    )
+
+    with op.batch_alter_table("note_embeddings") as batch_op:
+        batch_op.drop_column("embedding_dtype")
+        batch_op.drop_column("embedding")
@@ -0,0 +1,69 @@
+"""template_structure_cache
+
+Cache of extracted template structures keyed by the SHA-256 of the PDF and
+the extractor version.
+
+Revision ID: 8c3f1a9d2b74
+Revises: 51754ebae1e7
+Create Date: 2026-10-17 14:00:00.000000+00:00
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "8c3f1a9d2b74"
+down_revision = "51754ebae1e7"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "template_structure_cache",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("content_hash", sa.String(length=64), nullable=False),
+        sa.Column("extractor_version", sa.String(length=50), nullable=False),
+        sa.Column("total_pages", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("full_text", sa.Text(), nullable=True),
+        sa.Column("metadata", sa.JSON(), nullable=True),
+        sa.Column("sections", sa.JSON(), nullable=False),
+        sa.Column("section_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("hit_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column(
+            "created_at", sa.DateTime(), nullable=False, server_default=sa.func.now()
+        ),
+        sa.Column(
+            "last_used_at", sa.DateTime(), nullable=False, server_default=sa.func.now()
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint(
+            "content_hash",
+            "extractor_version",
+            name="uq_template_structure_cache_hash_version",
+        ),
+    )
+    op.create_index(
+        op.f("ix_template_structure_cache_id"),
+        "template_structure_cache",
+        ["id"],
+        unique=False,
+    )
+    op.create_index(
+        op.f("ix_template_structure_cache_content_hash"),
+        "template_structure_cache",
+        ["content_hash"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        op.f("ix_template_structure_cache_content_hash"),
+        table_name="template_structure_cache",
+    )
+    op.drop_index(
+        op.f("ix_template_structure_cache_id"), table_name="template_structure_cache"
+    )
+    op.drop_table("template_structure_cache")
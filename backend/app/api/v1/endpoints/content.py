@@ -5,7 +5,7 @@ AI Content Generation endpoints
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Literal, Optional
 
 from app.core.database import get_db
 from app.core.deps import get_current_user
@@ -23,6 +23,13 @@ class GenerateContentRequest(BaseModel):
     section_description: Optional[str] = ""
 
 
+class GenerateReportContentRequest(BaseModel):
+    """Request model for generating several sections at once"""
+
+    report_id: int
+    section_ids: Optional[List[int]] = None
+
+
 class ImproveContentRequest(BaseModel):
     """Request model for content improvement"""
 
@@ -43,6 +50,18 @@ class ContentGenerationResponse(BaseModel):
     metadata: Dict[str, Any]
 
 
+class SectionContentResponse(ContentGenerationResponse):
+    """Generated content of one section"""
+
+    section_id: int
+
+
+class ReportContentGenerationResponse(BaseModel):
+    """Response model for generating several sections"""
+
+    sections: List[SectionContentResponse]
+
+
 @router.post("/generate", response_model=ContentGenerationResponse)
 def generate_content(
     request: GenerateContentRequest,
@@ -120,6 +139,83 @@ def generate_content(
         )
 
 
+@router.post("/generate-report", response_model=ReportContentGenerationResponse)
+def generate_report_content(
+    request: GenerateReportContentRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Generate AI content for several sections of a report
+
+    Generates the given sections (default: every section, in report order).
+    The relevant notes of all sections are found in one batched search
+    instead of one search per section.
+    """
+    # Verify report ownership
+    report = (
+        db.query(Report)
+        .filter(Report.id == request.report_id, Report.user_id == current_user.id)
+        .first()
+    )
+
+    if not report:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Report not found or access denied",
+        )
+
+    # Get sections
+    query = db.query(ReportSection).filter(ReportSection.report_id == report.id)
+    if request.section_ids is not None:
+        query = query.filter(ReportSection.id.in_(request.section_ids))
+    sections = query.order_by(ReportSection.order).all()
+
+    if request.section_ids is not None and len(sections) != len(
+        set(request.section_ids)
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Section not found"
+        )
+
+    # Check if OpenAI API key is configured
+    from app.core.config import settings
+
+    if not settings.OPENAI_API_KEY or settings.OPENAI_API_KEY == "":
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="OpenAI API key not configured. Please set OPENAI_API_KEY in environment.",
+        )
+
+    # Generate content
+    try:
+        content_service = get_content_generation_service()
+
+        results = content_service.generate_sections_content(
+            sections=[(section.title, section.title) for section in sections],
+            report_id=report.id,
+            user_id=current_user.id,
+        )
+
+        return ReportContentGenerationResponse(
+            sections=[
+                SectionContentResponse(
+                    section_id=section.id,
+                    content=result["content"],
+                    sources=result["sources"],
+                    metadata=result["metadata"],
+                )
+                for section, result in zip(sections, results)
+            ]
+        )
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Content generation failed: {str(e)}",
+        )
+
+
 @router.post("/improve", response_model=ContentGenerationResponse)
 def improve_content(
     request: ImproveContentRequest,
@@ -281,13 +377,17 @@ def search_notes(
     query: str,
     report_id: int,
     limit: int = 5,
+    mode: Literal["semantic", "lexical", "hybrid"] = "semantic",
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     """
-    Search notes using semantic search
+    Search notes
 
-    Finds notes relevant to the query using AI embeddings
+    Modes:
+    - semantic: AI embedding similarity (default)
+    - lexical: BM25 keyword match, good for acronyms and citation keys
+    - hybrid: both, fused with reciprocal-rank fusion
     """
     # Verify report ownership
     report = (
@@ -302,28 +402,54 @@ def search_notes(
         )
 
     try:
+        from app.core.config import settings
         from app.services.embedding_service import get_embedding_service
+        from app.services.lexical_index import (
+            get_lexical_search_service,
+            reciprocal_rank_fusion,
+        )
         from app.services.vector_service import get_vector_service
 
-        print(f"Searching for: {query} in report {report_id}")
-
-        # Generate query embedding
-        embedding_service = get_embedding_service()
-        query_embedding = embedding_service.generate_embedding(query)
-        print(f"Generated embedding with dimension: {len(query_embedding)}")
+        print(f"Searching for: {query} in report {report_id} ({mode})")
 
-        # Search for similar notes
-        vector_service = get_vector_service()
-        results = vector_service.search_similar(
-            query_embedding=query_embedding,
-            report_id=report_id,
-            user_id=current_user.id,
-            limit=limit,
+        # Fetch a deeper candidate list from each retriever when fusing
+        candidates = (
+            max(limit, settings.HYBRID_CANDIDATES) if mode == "hybrid" else limit
         )
+        result_lists = {}
+
+        if mode in ("semantic", "hybrid"):
+            # Generate query embedding
+            embedding_service = get_embedding_service()
+            query_embedding = embedding_service.encode_query_array(query)
+            print(f"Generated embedding with dimension: {len(query_embedding)}")
+
+            # Search for similar notes
+            vector_service = get_vector_service()
+            result_lists["semantic"] = vector_service.search_similar(
+                query_embedding=query_embedding,
+                report_id=report_id,
+                user_id=current_user.id,
+                limit=candidates,
+            )
+
+        if mode in ("lexical", "hybrid"):
+            result_lists["lexical"] = get_lexical_search_service().search(
+                db,
+                query=query,
+                report_id=report_id,
+                user_id=current_user.id,
+                limit=candidates,
+            )
+
+        if mode == "hybrid":
+            results = reciprocal_rank_fusion(result_lists, limit=limit)
+        else:
+            results = result_lists[mode]
 
         print(f"Found {len(results)} results")
 
-        return {"query": query, "results": results}
+        return {"query": query, "mode": mode, "results": results}
 
     except Exception as e:
         import traceback
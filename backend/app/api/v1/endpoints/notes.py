@@ -25,14 +25,15 @@ from app.models.user import User
 from app.models.report import Report
 from app.models.note import Note
 from app.schemas.note import NoteResponse, NoteListResponse
-from app.services.embedding_service import get_embedding_service
+from app.services.lexical_index import get_lexical_search_service
+from app.services import note_indexing_service
 from app.services.vector_service import get_vector_service
 
 router = APIRouter()
 
 
 @router.post(
-    "/upload", response_model=NoteResponse, status_code=status.HTTP_201_CREATED
+    "/upload", response_model=NoteResponse, status_code=status.HTTP_202_ACCEPTED
 )
 async def upload_note(
     report_id: int = Form(...),
@@ -41,7 +42,10 @@ async def upload_note(
     current_user: User = Depends(get_current_user),
 ):
     """
-    Upload a note file and process it
+    Upload a note file and queue it for embedding
+
+    Returns immediately with status "processing"; the embedding_generation
+    task chunks, embeds and indexes the note, then marks it completed.
 
     Supports: txt, pdf (text extraction coming soon)
     """
@@ -109,44 +113,19 @@ async def upload_note(
     db.commit()
     db.refresh(note)
 
-    # Process embeddings asynchronously (for now, do it synchronously)
+    # Chunking, embedding and indexing run in the embedding_generation task
     try:
-        embedding_service = get_embedding_service()
-        vector_service = get_vector_service()
-
-        # Process note and generate embeddings
-        chunks_and_embeddings = embedding_service.process_note_for_embedding(
-            text_content
-        )
-
-        # Store embeddings in Qdrant
-        chunks = [chunk for chunk, _ in chunks_and_embeddings]
-        embeddings = [emb for _, emb in chunks_and_embeddings]
-
-        qdrant_ids = vector_service.store_embeddings_batch(
-            embeddings=embeddings,
-            note_id=note.id,
-            chunks=chunks,
-            report_id=report_id,
-            user_id=current_user.id,
-            filename=file.filename,
-            file_type=file_ext[1:],
-        )
-
-        # Update note status
-        note.status = "completed"
-        db.commit()
-        db.refresh(note)
+        from app.worker.tasks.embedding_generation import queue_note_embedding
 
+        queue_note_embedding(note.id)
     except Exception as e:
         note.status = "failed"
         note.processing_error = str(e)
         db.commit()
-        db.refresh(note)
 
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to process note: {str(e)}",
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Failed to queue note for processing: {str(e)}",
         )
 
     return note
@@ -197,6 +176,51 @@ def get_note(
     return note
 
 
+@router.post("/{note_id}/reindex")
+def reindex_note(
+    note_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """
+    Re-index a note's embeddings
+
+    Only chunks whose text changed are re-embedded; stale trailing chunks
+    are removed from the vector store.
+    """
+    note = (
+        db.query(Note)
+        .filter(Note.id == note_id, Note.user_id == current_user.id)
+        .first()
+    )
+
+    if not note:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Note not found"
+        )
+
+    try:
+        result = note_indexing_service.reindex_note(db, note)
+
+        note.status = "completed"
+        note.processing_error = None
+        db.commit()
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to re-index note: {str(e)}",
+        )
+
+    return {
+        "note_id": note.id,
+        "total_chunks": result["total"],
+        "upserted": result["upserted"],
+        "unchanged": result["unchanged"],
+        "deleted": result["deleted"],
+    }
+
+
 @router.delete("/{note_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_note(
     note_id: int,
@@ -218,12 +242,15 @@ def delete_note(
     # Delete embeddings from Qdrant
     try:
         vector_service = get_vector_service()
-        vector_service.delete_note_embeddings(note_id)
+        vector_service.delete_note_embeddings(note_id, user_id=current_user.id)
     except Exception as e:
         # Log error but continue with deletion
         print(f"Error deleting embeddings: {e}")
 
+    report_id = note.report_id
     db.delete(note)
     db.commit()
 
+    get_lexical_search_service().remove_note(note_id, report_id, current_user.id)
+
     return None
@@ -2,14 +2,35 @@
 File upload endpoints
 """
 
-from typing import List
-from fastapi import APIRouter, Depends, UploadFile, File, Form, HTTPException, status
+import asyncio
+import json
+from typing import Any, Dict, List, Tuple
+from fastapi import (
+    APIRouter,
+    Depends,
+    UploadFile,
+    File,
+    Form,
+    HTTPException,
+    Request,
+    status,
+)
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
-from app.core.database import get_db
-from app.core.deps import get_current_user
+from app.core.config import settings
+from app.core.database import SessionLocal, get_db
+from app.core.deps import get_current_user, get_current_user_from_header_or_query
+from app.models.note import Note
 from app.models.user import User
 from app.models.upload_job import UploadJob
+from app.services.progress_hub import get_progress_hub
+from app.services.progress_service import (
+    clear_progress,
+    note_event_data,
+    read_progress,
+    upload_job_event_data,
+)
 from app.services.storage_service import storage_service
 from app.services.file_validation_service import file_validation_service
 
@@ -148,6 +169,104 @@ async def upload_notes(
     }
 
 
+@router.get("/events")
+async def stream_upload_events(
+    request: Request,
+    current_user: User = Depends(get_current_user_from_header_or_query),
+):
+    """
+    Stream the current user's upload job and note updates (Server-Sent
+    Events).
+
+    Replaces polling the status endpoints. The stream starts with the
+    current state of every unfinished upload job and note, then sends an
+    "upload_job" or "note" event whenever one changes, and a comment line
+    every PROGRESS_STREAM_HEARTBEAT_SECONDS to keep proxies from closing it.
+    Accepts the token as a `token` query parameter, since EventSource
+    cannot send an Authorization header.
+
+    Args:
+        request: Incoming request (to detect disconnects)
+        current_user: Current authenticated user
+
+    Returns:
+        text/event-stream response, or 503 if the event channel is
+        unavailable (clients fall back to polling)
+    """
+    hub = get_progress_hub()
+    try:
+        await hub.start()
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Upload event stream unavailable: {e}",
+        )
+
+    user_id = current_user.id
+    heartbeat = settings.PROGRESS_STREAM_HEARTBEAT_SECONDS
+
+    async def events():
+        async with hub.subscribe(user_id) as queue:
+            # Subscribed before reading the snapshot, so no change is missed
+            yield "retry: 5000\n\n"
+            # Blocking queries: run off the event loop
+            snapshot = await asyncio.to_thread(_unfinished_uploads, user_id)
+            for event_type, data in snapshot:
+                yield _sse(event_type, data)
+
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield _sse(event["type"], event["data"])
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _sse(event_type: str, data: Dict[str, Any]) -> str:
+    """Format one Server-Sent Event"""
+    return f"event: {event_type}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def _unfinished_uploads(user_id: int) -> List[Tuple[str, Dict[str, Any]]]:
+    """Current state of a user's unfinished upload jobs and notes, as events"""
+    db = SessionLocal()
+    try:
+        jobs = (
+            db.query(UploadJob)
+            .filter(
+                UploadJob.user_id == user_id,
+                UploadJob.status.notin_(["completed", "failed"]),
+            )
+            .order_by(UploadJob.id)
+            .all()
+        )
+        notes = (
+            db.query(Note)
+            .filter(
+                Note.user_id == user_id,
+                Note.status.in_(["pending", "processing"]),
+            )
+            .order_by(Note.id)
+            .all()
+        )
+
+        snapshot = []
+        for job in jobs:
+            live = read_progress(job.id) or upload_job_event_data(job)
+            snapshot.append(("upload_job", live))
+        snapshot.extend(("note", note_event_data(note)) for note in notes)
+        return snapshot
+    finally:
+        db.close()
+
+
 @router.get("/{upload_id}/status")
 async def get_upload_status(
     upload_id: int,
@@ -157,6 +276,9 @@ async def get_upload_status(
     """
     Get the status of an upload job.
 
+    Reads the progress published by the processing task first, and the
+    database (which only records state changes) when there is none.
+
     Args:
         upload_id: Upload job ID
         db: Database session
@@ -165,6 +287,19 @@ async def get_upload_status(
     Returns:
         Upload job status
     """
+    live = read_progress(upload_id)
+    if live and live.get("user_id") == current_user.id:
+        return {
+            "id": live["id"],
+            "filename": live["filename"],
+            "file_type": live["file_type"],
+            "status": live["status"],
+            "progress": live["progress"],
+            "error_message": live["error_message"],
+            "created_at": live["created_at"],
+            "completed_at": live["completed_at"],
+        }
+
     upload_job = (
         db.query(UploadJob)
         .filter(UploadJob.id == upload_id, UploadJob.user_id == current_user.id)
@@ -227,5 +362,6 @@ async def delete_upload(
     # Delete upload job from database
     db.delete(upload_job)
     db.commit()
+    clear_progress(upload_id)
 
     return None
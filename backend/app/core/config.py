@@ -79,6 +79,63 @@ class Settings(BaseSettings):
     def QDRANT_URL(self) -> str:
         return f"http://{self.QDRANT_HOST}:{self.QDRANT_PORT}"
 
+    # shared, tenant_index (is_tenant keyword index), per_user (collection per user)
+    QDRANT_COLLECTION_LAYOUT: str = "shared"
+
+    # Vector storage
+    VECTOR_BACKEND: str = "qdrant"  # qdrant, local, auto (Qdrant with local fallback)
+    LOCAL_VECTOR_INDEX_DIR: str = "./vector_index"
+    LOCAL_VECTOR_SEARCH_MODE: str = "auto"  # exact, ivf, auto
+    LOCAL_VECTOR_IVF_MIN_POINTS: int = 20000  # Partition size where auto uses IVF
+    LOCAL_VECTOR_IVF_NPROBE: int = 8  # IVF lists scanned per query
+    VECTOR_UPSERT_BATCH_SIZE: int = 256  # Points per upsert request
+    VECTOR_UPSERT_WORKERS: int = 4  # Concurrent upsert requests per note
+    VECTOR_QUANTIZATION: str = "none"  # none, int8 (4x smaller), binary (32x)
+    VECTOR_RESCORE_OVERSAMPLING: float = (
+        0.0  # Rescored candidates per result, 0 = mode default
+    )
+
+    # Hybrid (BM25 + semantic) search
+    HYBRID_RRF_K: int = 60  # Reciprocal-rank fusion constant
+    HYBRID_CANDIDATES: int = 50  # Results fetched from each retriever before fusion
+    LEXICAL_INDEX_SYNC_SECONDS: float = 2.0  # Min interval between DB freshness checks
+
+    # Embeddings
+    EMBEDDING_MODEL_NAME: str = "all-MiniLM-L6-v2"
+    EMBEDDING_BATCHING_ENABLED: bool = True
+    EMBEDDING_BATCH_MAX_SIZE: int = 32  # Max texts per micro-batch
+    EMBEDDING_BATCH_MAX_WAIT_MS: float = 5.0  # Max time to gather a micro-batch
+    EMBEDDING_CACHE_SIZE: int = 10000  # In-memory LRU entries (0 disables cache)
+    EMBEDDING_CACHE_BACKEND: str = "memory"  # memory, sqlite, redis
+    EMBEDDING_CACHE_PATH: str = "./embedding_cache.sqlite3"
+    EMBEDDING_CACHE_TTL_SECONDS: int = 0  # Redis tier only, 0 = no expiry
+    EMBEDDING_CHUNK_MAX_TOKENS: int = 0  # Tokens per chunk, 0 = model window
+    EMBEDDING_CHUNK_OVERLAP_TOKENS: int = 32  # Tokens shared by adjacent chunks
+    EMBEDDING_STORAGE_DTYPE: str = "float32"  # NoteEmbedding backup: float32, float16
+    EMBEDDING_PRELOAD: bool = True  # Load and warm the model at API/worker startup
+    EMBEDDING_WARMUP_BATCH_SIZE: int = 8  # Dummy texts encoded during warm-up
+    # Fan large batches out to worker processes. Celery prefork children cannot
+    # start them: run the worker with --pool solo or threads to use the pool
+    EMBEDDING_POOL_ENABLED: bool = False
+    EMBEDDING_POOL_PROCESSES: int = 0  # Worker processes, 0 = one per CPU
+    EMBEDDING_POOL_BATCH_SIZE: int = 64  # Texts per worker task
+    # Smaller batches are encoded in-process; ingestion batches grow to this
+    # size when the pool is used
+    EMBEDDING_POOL_MIN_TEXTS: int = 256
+    EMBEDDING_POOL_START_METHOD: str = "fork"  # fork shares weights, spawn reloads
+    EMBEDDING_COALESCE_WINDOW_SECONDS: float = 0.5  # Notes queued together share a task
+    EMBEDDING_COALESCE_MAX_NOTES: int = 32  # Notes per embedding task
+
+    # PDF extraction
+    PDF_PARALLEL_MIN_PAGES: int = 100  # Page count where extraction uses a process pool
+    PDF_EXTRACT_PROCESSES: int = 0  # Extraction processes, 0 = one per CPU
+    TEMPLATE_CACHE_ENABLED: bool = True  # Reuse structures of identical PDFs
+
+    # Upload progress
+    PROGRESS_PUBLISH_INTERVAL_SECONDS: float = 0.5  # Min interval between updates
+    PROGRESS_STREAM_HEARTBEAT_SECONDS: float = 15.0  # Keep-alive on idle streams
+    PROGRESS_STREAM_QUEUE_SIZE: int = 100  # Events buffered per stream
+
     model_config = SettingsConfigDict(
         env_file=".env", case_sensitive=True, extra="allow"
     )
@@ -3,16 +3,17 @@ FastAPI dependencies
 """
 
 from typing import Optional
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 
-from app.core.database import get_db
+from app.core.database import SessionLocal, get_db
 from app.core.security import decode_token
 from app.models.user import User
 
 # HTTP Bearer token security scheme
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
 
 
 def get_current_user(
@@ -32,7 +33,51 @@ def get_current_user(
     Raises:
         HTTPException: If token is invalid or user not found
     """
-    token = credentials.credentials
+    return _get_user_from_token(credentials.credentials, db)
+
+
+def get_current_user_from_header_or_query(
+    token: Optional[str] = Query(None, description="Access token"),
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security),
+) -> User:
+    """
+    Get the current authenticated user from a bearer header or a `token`
+    query parameter.
+
+    For streaming endpoints opened with EventSource, which cannot send
+    headers. Prefer the header elsewhere: query strings end up in logs.
+
+    The user is loaded with its own session, closed before returning: a
+    get_db session would only be closed when the stream ends, holding a
+    pooled connection for as long as the client stays connected.
+
+    Args:
+        token: Access token from the query string
+        credentials: HTTP Bearer credentials, if sent
+
+    Returns:
+        Current user
+
+    Raises:
+        HTTPException: If no token was sent, it is invalid or user not found
+    """
+    if credentials is not None:
+        token = credentials.credentials
+    if not token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    db = SessionLocal()
+    try:
+        return _get_user_from_token(token, db)
+    finally:
+        db.close()
+
+
+def _get_user_from_token(token: str, db: Session) -> User:
+    """Validate an access token and load its active user"""
     payload = decode_token(token)
 
     if payload is None:
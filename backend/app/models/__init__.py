@@ -6,7 +6,11 @@ from app.models.user import User
 from app.models.report import Report, ReportSection
 from app.models.note import Note, NoteEmbedding
 from app.models.upload_job import UploadJob
-from app.models.template_structure import TemplateStructure, TemplateSection
+from app.models.template_structure import (
+    TemplateStructure,
+    TemplateSection,
+    TemplateStructureCache,
+)
 
 __all__ = [
     "User",
@@ -17,4 +21,5 @@ __all__ = [
     "UploadJob",
     "TemplateStructure",
     "TemplateSection",
+    "TemplateStructureCache",
 ]
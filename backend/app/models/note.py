@@ -71,9 +71,10 @@ class NoteEmbedding(Base):
     chunk_index = Column(Integer, nullable=False)  # Which chunk this is (0, 1, 2, ...)
     chunk_text = Column(Text, nullable=False)  # The actual text chunk
 
-    # Embedding vector stored as JSON text (compatible with SQLite and PostgreSQL)
-    # Primary storage will be Qdrant, this is just for backup
-    embedding_vector = Column(Text, nullable=True)  # JSON string of float array
+    # Embedding vector as raw little-endian bytes (see app.services.embedding_codec)
+    # Primary storage is the vector backend, this is the backup used for rebuilds
+    embedding = Column(LargeBinary, nullable=True)
+    embedding_dtype = Column(String(16), nullable=True)  # float32 or float16
 
     # Qdrant reference
     qdrant_id = Column(String(100), nullable=True)  # UUID in Qdrant
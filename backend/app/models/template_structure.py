@@ -4,7 +4,17 @@ Template structure models for storing PDF template information
 
 from datetime import datetime
 from typing import Optional, List
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON, Float
+from sqlalchemy import (
+    Column,
+    Integer,
+    String,
+    Text,
+    DateTime,
+    ForeignKey,
+    JSON,
+    Float,
+    UniqueConstraint,
+)
 from sqlalchemy.orm import relationship
 
 from app.core.database import Base
@@ -141,3 +151,47 @@ class TemplateSection(Base):
                 else []
             ),
         }
+
+
+class TemplateStructureCache(Base):
+    """
+    Model for caching extracted template structures by PDF content.
+
+    Entries are keyed by the SHA-256 of the PDF bytes and the extractor
+    version, so a template uploaded again (e.g. the same university template
+    for a new report) reuses the stored section tree instead of being
+    extracted again. Bumping the extractor version invalidates old entries.
+    """
+
+    __tablename__ = "template_structure_cache"
+    __table_args__ = (
+        UniqueConstraint(
+            "content_hash",
+            "extractor_version",
+            name="uq_template_structure_cache_hash_version",
+        ),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    content_hash = Column(String(64), nullable=False, index=True)  # sha256 hex
+    extractor_version = Column(String(50), nullable=False)
+
+    # Extracted content
+    total_pages = Column(Integer, nullable=False, default=0)
+    full_text = Column(Text, nullable=True)
+    pdf_metadata = Column(
+        "metadata", JSON, nullable=True
+    )  # Mapped to 'metadata' column in DB
+    sections = Column(JSON, nullable=False)  # Serialized PDFSection tree
+    section_count = Column(Integer, nullable=False, default=0)
+
+    # Usage
+    hit_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    last_used_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return (
+            f"<TemplateStructureCache(id={self.id}, "
+            f"content_hash={self.content_hash[:12]}, hits={self.hit_count})>"
+        )
@@ -3,7 +3,7 @@ Content Generation Service
 Uses OpenAI GPT-4 to generate report content based on notes
 """
 
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from openai import OpenAI
 import tiktoken
 
@@ -57,7 +57,7 @@ class ContentGenerationService:
         query = f"{section_title}. {section_description}"
 
         # Generate embedding for the query
-        query_embedding = self.embedding_service.generate_embedding(query)
+        query_embedding = self.embedding_service.encode_query_array(query)
 
         # Search for similar notes
         results = self.vector_service.search_similar(
@@ -69,6 +69,44 @@ class ContentGenerationService:
 
         return results
 
+    def find_relevant_notes_batch(
+        self,
+        sections: List[Tuple[str, str]],
+        report_id: int,
+        user_id: int,
+        top_k: int = 5,
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Find relevant notes for many sections at once
+
+        All section queries are embedded in one encode call and searched in
+        one vector store request, instead of two round trips per section.
+
+        Args:
+            sections: List of (section_title, section_description) tuples
+            report_id: ID of the report
+            user_id: ID of the user
+            top_k: Number of relevant notes to retrieve per section
+
+        Returns:
+            One list of relevant note chunks per section, in input order
+        """
+        if not sections:
+            return []
+
+        queries = [f"{title}. {description}" for title, description in sections]
+
+        # One forward pass for every section query
+        query_embeddings = self.embedding_service.encode_array(queries)
+
+        # One batched search request
+        return self.vector_service.search_similar_batch(
+            query_embeddings=query_embeddings,
+            report_id=report_id,
+            user_id=user_id,
+            limit=top_k,
+        )
+
     def build_generation_prompt(
         self,
         section_title: str,
@@ -173,6 +211,7 @@ Provide the expanded version:"""
         instruction: str = "generate",
         temperature: float = 0.7,
         max_tokens: int = 1500,
+        relevant_notes: Optional[List[Dict[str, Any]]] = None,
     ) -> Dict[str, Any]:
         """
         Generate content for a section
@@ -186,18 +225,20 @@ Provide the expanded version:"""
             instruction: Type of generation (generate, improve, expand)
             temperature: Creativity parameter (0-1)
             max_tokens: Maximum tokens to generate
+            relevant_notes: Notes found already (searched when omitted)
 
         Returns:
             Dict with generated content and metadata
         """
         # Find relevant notes
-        relevant_notes = self.find_relevant_notes(
-            section_title=section_title,
-            section_description=section_description,
-            report_id=report_id,
-            user_id=user_id,
-            top_k=5,
-        )
+        if relevant_notes is None:
+            relevant_notes = self.find_relevant_notes(
+                section_title=section_title,
+                section_description=section_description,
+                report_id=report_id,
+                user_id=user_id,
+                top_k=5,
+            )
 
         # Build prompt
         prompt = self.build_generation_prompt(
@@ -262,6 +303,41 @@ Provide the expanded version:"""
             instruction="generate",
         )
 
+    def generate_sections_content(
+        self, sections: List[Tuple[str, str]], report_id: int, user_id: int
+    ) -> List[Dict[str, Any]]:
+        """
+        Generate new content for several sections of a report
+
+        The notes of all sections are found with one embedding call and one
+        vector search (find_relevant_notes_batch), then each section is
+        generated in turn.
+
+        Args:
+            sections: List of (section_title, section_description) tuples
+            report_id: ID of the report
+            user_id: ID of the user
+
+        Returns:
+            One generate_content result per section, in input order
+        """
+        relevant_notes = self.find_relevant_notes_batch(
+            sections, report_id=report_id, user_id=user_id, top_k=5
+        )
+        return [
+            self.generate_content(
+                section_title=section_title,
+                section_description=section_description,
+                report_id=report_id,
+                user_id=user_id,
+                instruction="generate",
+                relevant_notes=notes,
+            )
+            for (section_title, section_description), notes in zip(
+                sections, relevant_notes
+            )
+        ]
+
     def improve_content(
         self, section_title: str, current_content: str, report_id: int, user_id: int
     ) -> Dict[str, Any]:
@@ -0,0 +1,176 @@
+"""
+Micro-batching queue for embedding requests.
+
+Concurrent callers submit single texts; a background thread gathers them for a
+few milliseconds and runs one model forward pass for the whole batch.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+class EmbeddingBatcher:
+    """Shared in-process batching queue in front of an encode function"""
+
+    def __init__(
+        self,
+        encode_fn: Callable[[List[str]], np.ndarray],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+    ):
+        """
+        Initialize the batcher.
+
+        Args:
+            encode_fn: Function that embeds a list of texts into a 2D array
+            max_batch_size: Maximum number of texts per forward pass
+            max_wait_ms: Maximum time to wait for a batch to fill up
+        """
+        self.encode_fn = encode_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+
+        self._queue: "queue.Queue[Tuple[str, Future, float]]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._reset_stats()
+
+    def _reset_stats(self):
+        """Reset the batch size and queue wait counters"""
+        self._batches = 0
+        self._items = 0
+        self._largest_batch = 0
+        self._total_wait = 0.0
+        self._max_wait_seen = 0.0
+        self._errors = 0
+
+    def _ensure_worker(self):
+        """Start the background worker thread on first use"""
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._start_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._run, name="embedding-batcher", daemon=True
+                )
+                self._worker.start()
+
+    def submit(self, text: str) -> Future:
+        """
+        Queue a text for embedding.
+
+        Args:
+            text: Text to embed
+
+        Returns:
+            Future resolving to the embedding as a 1D array
+        """
+        self._ensure_worker()
+        future: Future = Future()
+        self._queue.put((text, future, time.perf_counter()))
+        return future
+
+    def embed(self, text: str, timeout: Optional[float] = None) -> np.ndarray:
+        """
+        Embed a single text through the shared batch queue (blocking).
+
+        Args:
+            text: Text to embed
+            timeout: Optional timeout in seconds
+
+        Returns:
+            Embedding as a 1D array
+        """
+        return self.submit(text).result(timeout=timeout)
+
+    def _collect_batch(self) -> List[Tuple[str, Future, float]]:
+        """Block for the first item, then gather more until full or timed out"""
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                # Still drain whatever is already waiting, without blocking
+                try:
+                    batch.append(self._queue.get_nowait())
+                    continue
+                except queue.Empty:
+                    break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _run(self):
+        """Worker loop: collect a batch, encode it, resolve futures"""
+        while True:
+            batch = self._collect_batch()
+            started = time.perf_counter()
+
+            # Skip callers that gave up (cancelled) before we got to them
+            batch = [item for item in batch if item[1].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            texts = [text for text, _, _ in batch]
+            waits = [started - enqueued for _, _, enqueued in batch]
+
+            try:
+                embeddings = self.encode_fn(texts)
+            except Exception as e:
+                with self._stats_lock:
+                    self._errors += 1
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+
+            for (_, future, _), embedding in zip(batch, embeddings):
+                future.set_result(embedding)
+
+            with self._stats_lock:
+                self._batches += 1
+                self._items += len(batch)
+                self._largest_batch = max(self._largest_batch, len(batch))
+                self._total_wait += sum(waits)
+                self._max_wait_seen = max(self._max_wait_seen, max(waits))
+
+    def get_stats(self) -> Dict[str, float]:
+        """
+        Get batching metrics.
+
+        Returns:
+            Dict with batch size and queue wait statistics
+        """
+        with self._stats_lock:
+            return {
+                "batches": self._batches,
+                "items": self._items,
+                "errors": self._errors,
+                "queue_depth": self._queue.qsize(),
+                "avg_batch_size": (
+                    round(self._items / self._batches, 2) if self._batches else 0.0
+                ),
+                "max_batch_size": self._largest_batch,
+                "avg_queue_wait_ms": (
+                    round(self._total_wait / self._items * 1000, 3)
+                    if self._items
+                    else 0.0
+                ),
+                "max_queue_wait_ms": round(self._max_wait_seen * 1000, 3),
+                "config_max_batch_size": self.max_batch_size,
+                "config_max_wait_ms": self.max_wait * 1000,
+            }
+
+    def reset_stats(self):
+        """Reset batching metrics"""
+        with self._stats_lock:
+            self._reset_stats()
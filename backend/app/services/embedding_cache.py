@@ -0,0 +1,285 @@
+"""
+Content-hash embedding cache.
+
+Embeddings are keyed by (model_name, sha256(normalized text)) and kept in a
+bounded in-memory LRU, optionally backed by a persistent SQLite or Redis tier.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so trivially different copies share a cache entry"""
+    return " ".join(text.split())
+
+
+def make_cache_key(model_name: str, text: str) -> str:
+    """
+    Build the cache key for a text.
+
+    Args:
+        model_name: Name of the embedding model
+        text: Text to embed
+
+    Returns:
+        Cache key of the form "<model_name>:<sha256 hex>"
+    """
+    digest = hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+    return f"{model_name}:{digest}"
+
+
+class SQLiteEmbeddingStore:
+    """Persistent cache tier backed by a local SQLite file"""
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB)"
+        )
+        self._conn.commit()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, bytes]:
+        """Fetch raw vectors for the given keys"""
+        found: Dict[str, bytes] = {}
+        with self._lock:
+            # Stay below SQLite's host parameter limit
+            for start in range(0, len(keys), 500):
+                batch = list(keys[start : start + 500])
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                    batch,
+                ).fetchall()
+                found.update(rows)
+        return found
+
+    def put_many(self, items: Dict[str, bytes]):
+        """Store raw vectors"""
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                list(items.items()),
+            )
+            self._conn.commit()
+
+
+class RedisEmbeddingStore:
+    """Persistent cache tier backed by Redis"""
+
+    KEY_PREFIX = "embedding:"
+
+    def __init__(self, redis_url: str, ttl_seconds: int = 0):
+        try:
+            import redis
+        except ImportError:
+            raise ImportError("redis is required. Install with: pip install redis")
+
+        self._client = redis.Redis.from_url(redis_url)
+        self._ttl = ttl_seconds or None
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, bytes]:
+        """Fetch raw vectors for the given keys"""
+        if not keys:
+            return {}
+        values = self._client.mget([self.KEY_PREFIX + key for key in keys])
+        return {key: value for key, value in zip(keys, values) if value is not None}
+
+    def put_many(self, items: Dict[str, bytes]):
+        """Store raw vectors"""
+        pipe = self._client.pipeline(transaction=False)
+        for key, value in items.items():
+            pipe.set(self.KEY_PREFIX + key, value, ex=self._ttl)
+        pipe.execute()
+
+
+class EmbeddingCache:
+    """Bounded LRU embedding cache with an optional persistent tier"""
+
+    def __init__(
+        self,
+        model_name: str,
+        max_entries: int = 10000,
+        store: Optional[Any] = None,
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            model_name: Name of the embedding model (part of every key)
+            max_entries: Maximum number of vectors kept in memory
+            store: Optional persistent tier with get_many/put_many
+        """
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.store = store
+
+        self._lru: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.store_hits = 0
+        self.misses = 0
+        self.store_errors = 0
+
+    def _remember(self, key: str, vector: np.ndarray):
+        """Insert into the LRU, evicting the oldest entries (lock held)"""
+        self._lru[key] = vector
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+
+    def get_many(self, texts: Sequence[str]) -> List[Optional[np.ndarray]]:
+        """
+        Look up cached embeddings.
+
+        Args:
+            texts: Texts to look up
+
+        Returns:
+            List aligned with texts, holding a vector or None for a miss
+        """
+        keys = [make_cache_key(self.model_name, text) for text in texts]
+        results: List[Optional[np.ndarray]] = [None] * len(keys)
+        missing: Dict[str, List[int]] = {}
+
+        with self._lock:
+            for i, key in enumerate(keys):
+                vector = self._lru.get(key)
+                if vector is not None:
+                    self._lru.move_to_end(key)
+                    results[i] = vector
+                    self.memory_hits += 1
+                else:
+                    missing.setdefault(key, []).append(i)
+
+        if missing and self.store is not None:
+            try:
+                found = self.store.get_many(list(missing))
+            except Exception as e:
+                print(f"Embedding cache store lookup failed: {e}")
+                with self._lock:
+                    self.store_errors += 1
+                found = {}
+
+            with self._lock:
+                for key, raw in found.items():
+                    vector = np.frombuffer(raw, dtype=np.float32)
+                    self._remember(key, vector)
+                    for i in missing.pop(key):
+                        results[i] = vector
+                        self.store_hits += 1
+
+        with self._lock:
+            self.misses += sum(len(indexes) for indexes in missing.values())
+
+        return results
+
+    def put_many(self, texts: Sequence[str], vectors: Sequence[np.ndarray]):
+        """
+        Store embeddings for texts.
+
+        Each vector is copied and made read-only, so the cache neither keeps
+        a caller's batch matrix alive (through row views) nor shares arrays
+        that the caller may still modify.
+
+        Args:
+            texts: Texts that were embedded
+            vectors: Their embeddings, aligned with texts
+        """
+        items = {}
+        for text, vector in zip(texts, vectors):
+            vector = np.array(vector, dtype=np.float32, copy=True)
+            vector.setflags(write=False)
+            items[make_cache_key(self.model_name, text)] = vector
+
+        with self._lock:
+            for key, vector in items.items():
+                self._remember(key, vector)
+
+        if self.store is not None and items:
+            try:
+                self.store.put_many(
+                    {key: vector.tobytes() for key, vector in items.items()}
+                )
+            except Exception as e:
+                print(f"Embedding cache store write failed: {e}")
+                with self._lock:
+                    self.store_errors += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get hit/miss counters.
+
+        Returns:
+            Dict of cache statistics
+        """
+        with self._lock:
+            hits = self.memory_hits + self.store_hits
+            lookups = hits + self.misses
+            return {
+                "size": len(self._lru),
+                "max_entries": self.max_entries,
+                "persistent_tier": (
+                    type(self.store).__name__ if self.store is not None else None
+                ),
+                "memory_hits": self.memory_hits,
+                "store_hits": self.store_hits,
+                "misses": self.misses,
+                "store_errors": self.store_errors,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def clear(self):
+        """Drop all in-memory entries and reset counters"""
+        with self._lock:
+            self._lru.clear()
+            self.memory_hits = 0
+            self.store_hits = 0
+            self.misses = 0
+            self.store_errors = 0
+
+
+def create_embedding_cache(model_name: str) -> Optional[EmbeddingCache]:
+    """
+    Build the embedding cache from settings.
+
+    Args:
+        model_name: Name of the embedding model
+
+    Returns:
+        EmbeddingCache, or None when caching is disabled
+    """
+    from app.core.config import settings
+
+    if settings.EMBEDDING_CACHE_SIZE <= 0:
+        return None
+
+    store = None
+    backend = settings.EMBEDDING_CACHE_BACKEND.lower()
+    try:
+        if backend == "sqlite":
+            store = SQLiteEmbeddingStore(settings.EMBEDDING_CACHE_PATH)
+        elif backend == "redis":
+            store = RedisEmbeddingStore(
+                settings.REDIS_URL, ttl_seconds=settings.EMBEDDING_CACHE_TTL_SECONDS
+            )
+        elif backend != "memory":
+            raise ValueError(f"Unknown embedding cache backend: {backend}")
+    except ImportError as e:
+        print(f"Embedding cache: persistent tier disabled ({e})")
+
+    return EmbeddingCache(
+        model_name=model_name,
+        max_entries=settings.EMBEDDING_CACHE_SIZE,
+        store=store,
+    )
@@ -0,0 +1,80 @@
+"""
+Compact binary encoding of embeddings stored in the database.
+
+Vectors are stored as raw little-endian float32 or float16 bytes
+(NoteEmbedding.embedding) with the dtype name alongside, and decoded with
+np.frombuffer, so reading them back is a memory copy rather than a parse.
+"""
+
+from typing import Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+
+STORAGE_DTYPES = {"float32": np.dtype("<f4"), "float16": np.dtype("<f2")}
+
+
+def _storage_dtype(dtype_name: str) -> np.dtype:
+    try:
+        return STORAGE_DTYPES[dtype_name]
+    except KeyError:
+        raise ValueError(f"Unknown embedding storage dtype: {dtype_name}")
+
+
+def encode_embedding(
+    vector: Sequence[float], dtype_name: Optional[str] = None
+) -> Tuple[bytes, str]:
+    """
+    Encode a vector for the NoteEmbedding.embedding column.
+
+    Args:
+        vector: Embedding vector
+        dtype_name: "float32" or "float16" (default EMBEDDING_STORAGE_DTYPE)
+
+    Returns:
+        Tuple of (raw bytes, dtype name)
+    """
+    if dtype_name is None:
+        from app.core.config import settings
+
+        dtype_name = settings.EMBEDDING_STORAGE_DTYPE
+
+    dtype = _storage_dtype(dtype_name)
+    return np.asarray(vector, dtype=dtype).tobytes(), dtype_name
+
+
+def decode_embedding(blob: bytes, dtype_name: str) -> np.ndarray:
+    """
+    Decode one stored vector.
+
+    float32 blobs are returned as a zero-copy, read-only view of the bytes;
+    float16 blobs are widened to float32.
+
+    Args:
+        blob: Raw bytes from NoteEmbedding.embedding
+        dtype_name: Value of NoteEmbedding.embedding_dtype
+
+    Returns:
+        1D float32 array
+    """
+    vector = np.frombuffer(blob, dtype=_storage_dtype(dtype_name))
+    return vector.astype(np.float32, copy=False)
+
+
+def decode_embeddings(blobs: Iterable[bytes], dtype_name: str, dim: int) -> np.ndarray:
+    """
+    Decode many stored vectors of the same dtype into one matrix.
+
+    The blobs are concatenated once and viewed with np.frombuffer, so a batch
+    of rows costs one copy instead of one parse per row.
+
+    Args:
+        blobs: Raw bytes of each row
+        dtype_name: Storage dtype shared by every blob
+        dim: Vector dimension
+
+    Returns:
+        float32 matrix of shape (rows, dim)
+    """
+    buffer = b"".join(blobs)
+    matrix = np.frombuffer(buffer, dtype=_storage_dtype(dtype_name)).reshape(-1, dim)
+    return matrix.astype(np.float32, copy=False)
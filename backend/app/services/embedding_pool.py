@@ -0,0 +1,286 @@
+"""
+Multi-process embedding pool.
+
+A single SentenceTransformer.encode call keeps one process busy, so large
+note batches are fanned out to worker processes instead. With the "fork"
+start method the workers are forked after the parent has loaded the model,
+so the weights are shared copy-on-write rather than loaded once per worker.
+
+Results do not travel back as pickled lists: the pool owns one shared
+memory block split into fixed-size float32 slots. A worker writes a batch's
+embeddings into the slot it was given and returns only the row count; the
+parent copies the rows out and hands the slot to the next batch. The slot
+count bounds how many batches are in flight.
+
+Each process that embeds starts its own pool on first use. Daemonic
+processes may not have children, so a Celery prefork pool child (and any
+process whose workers fail to start) encodes in-process instead; to fan a
+worker's batches out, run it with a non-forking pool (e.g. --pool threads
+or --pool solo) and size EMBEDDING_POOL_PROCESSES against its concurrency.
+"""
+
+import atexit
+import multiprocessing
+import os
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from app.core.config import settings
+
+# Worker process state, set by _init_worker
+_worker_service = None
+_worker_slots: Optional[np.ndarray] = None
+_worker_memory: Optional[shared_memory.SharedMemory] = None
+
+
+def _init_worker(model_name: str, memory_name: str, shape: tuple, torch_threads: int):
+    """Attach to the result buffer and get a model (inherited when forked)"""
+    global _worker_service, _worker_slots, _worker_memory
+    from app.services.embedding_service import (
+        EmbeddingService,
+        get_embedding_service,
+    )
+
+    try:
+        import torch
+
+        # Workers split the cores instead of each claiming all of them
+        torch.set_num_threads(torch_threads)
+    except ImportError:
+        pass
+
+    service = get_embedding_service()
+    if service.model_name != model_name:
+        service = EmbeddingService(model_name)
+    # Already loaded in a forked worker, loaded here otherwise
+    service.model
+    _worker_service = service
+
+    _worker_memory = shared_memory.SharedMemory(name=memory_name)
+    _worker_slots = np.ndarray(shape, dtype=np.float32, buffer=_worker_memory.buf)
+
+
+def _encode_into_slot(slot: int, texts: List[str]) -> int:
+    """Embed texts into a result slot and return the number of rows written"""
+    embeddings = _worker_service._encode_batch(texts)
+    _worker_slots[slot, : len(texts)] = embeddings
+    return len(texts)
+
+
+def _ping() -> int:
+    """No-op task used to start the workers"""
+    return os.getpid()
+
+
+class EmbeddingProcessPool:
+    """Process pool embedding text batches into shared float32 buffers"""
+
+    def __init__(
+        self,
+        model_name: Optional[str] = None,
+        processes: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        start_method: Optional[str] = None,
+    ):
+        """
+        Start the worker processes.
+
+        In a daemonic process, or if the workers fail to start, no workers
+        are started and batches are encoded in-process.
+
+        Args:
+            model_name: Model to embed with (default EMBEDDING_MODEL_NAME)
+            processes: Worker count (default EMBEDDING_POOL_PROCESSES, or the
+                number of CPUs when that is 0)
+            batch_size: Texts per worker task (default EMBEDDING_POOL_BATCH_SIZE)
+            start_method: "fork" shares the loaded weights copy-on-write;
+                "spawn"/"forkserver" load the model in every worker
+                (default EMBEDDING_POOL_START_METHOD)
+        """
+        from app.services.embedding_service import (
+            EmbeddingService,
+            get_embedding_service,
+        )
+
+        self.model_name = model_name or settings.EMBEDDING_MODEL_NAME
+        self.processes = processes or settings.EMBEDDING_POOL_PROCESSES
+        self.processes = self.processes or os.cpu_count() or 1
+        self.batch_size = batch_size or settings.EMBEDDING_POOL_BATCH_SIZE
+        self.start_method = start_method or settings.EMBEDDING_POOL_START_METHOD
+
+        service = get_embedding_service()
+        if service.model_name != self.model_name:
+            service = EmbeddingService(self.model_name)
+        if self.start_method == "fork":
+            # Load before forking so every worker shares these pages
+            service.model
+        self.embedding_dim = service.embedding_dimension
+        self._service = service
+        self._executor = None
+        self._memory = None
+
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._texts = 0
+
+        if multiprocessing.current_process().daemon:
+            print("Embedding pool disabled in a daemonic process, encoding in-process")
+            return
+
+        # Two slots per worker: one being filled, one waiting to be copied out
+        slot_count = 2 * self.processes
+        shape = (slot_count, self.batch_size, self.embedding_dim)
+        self._memory = shared_memory.SharedMemory(
+            create=True, size=int(np.prod(shape)) * 4
+        )
+        self._slots = np.ndarray(shape, dtype=np.float32, buffer=self._memory.buf)
+        self._free_slots: "queue.Queue[int]" = queue.Queue()
+        for slot in range(slot_count):
+            self._free_slots.put(slot)
+
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=multiprocessing.get_context(self.start_method),
+            initializer=_init_worker,
+            initargs=(
+                self.model_name,
+                self._memory.name,
+                shape,
+                max(1, (os.cpu_count() or 1) // self.processes),
+            ),
+        )
+        try:
+            # Start the workers now (and surface model load errors here)
+            self._executor.submit(_ping).result()
+        except (AssertionError, OSError, BrokenProcessPool) as e:
+            print(f"Embedding pool failed to start ({e!r}), encoding in-process")
+            self.close()
+
+    def encode_array(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts across the worker processes.
+
+        Safe to call from several threads; callers share the slots, so the
+        total number of batches in flight stays bounded.
+
+        Args:
+            texts: Texts to embed (empty strings are not filtered here)
+
+        Returns:
+            float32 array of shape (len(texts), embedding_dim), in input order
+        """
+        if self._executor is None:
+            result = np.asarray(
+                self._service._encode_batch(texts), dtype=np.float32
+            ).reshape(len(texts), self.embedding_dim)
+            with self._stats_lock:
+                self._batches += -(-len(texts) // self.batch_size)
+                self._texts += len(texts)
+            return result
+
+        result = np.empty((len(texts), self.embedding_dim), dtype=np.float32)
+        pending = deque()
+
+        def finish_oldest():
+            future, slot, start = pending.popleft()
+            try:
+                rows = future.result()
+                result[start : start + rows] = self._slots[slot, :rows]
+            finally:
+                self._free_slots.put(slot)
+
+        try:
+            for start in range(0, len(texts), self.batch_size):
+                # A caller only blocks on the queue while it holds no slots,
+                # so concurrent callers never wait on each other's slots
+                while True:
+                    try:
+                        slot = self._free_slots.get_nowait()
+                        break
+                    except queue.Empty:
+                        if not pending:
+                            slot = self._free_slots.get()
+                            break
+                        finish_oldest()
+
+                batch = texts[start : start + self.batch_size]
+                pending.append(
+                    (self._executor.submit(_encode_into_slot, slot, batch), slot, start)
+                )
+
+            while pending:
+                finish_oldest()
+        finally:
+            # On error, wait for in-flight batches before reusing their slots
+            for future, slot, _ in pending:
+                future.exception()
+                self._free_slots.put(slot)
+
+        with self._stats_lock:
+            self._batches += -(-len(texts) // self.batch_size)
+            self._texts += len(texts)
+        return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get pool configuration and throughput counters.
+
+        Returns:
+            Dict with processes (0 when encoding in-process), batch size,
+            start method and totals
+        """
+        with self._stats_lock:
+            return {
+                "processes": self.processes if self._executor is not None else 0,
+                "batch_size": self.batch_size,
+                "start_method": self.start_method,
+                "batches": self._batches,
+                "texts": self._texts,
+            }
+
+    def close(self):
+        """Stop the workers and release the shared buffer"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+        if self._memory is not None:
+            del self._slots
+            self._memory.close()
+            self._memory.unlink()
+            self._memory = None
+
+
+# Global instance
+_embedding_pool = None
+_embedding_pool_lock = threading.Lock()
+
+
+def get_embedding_pool() -> EmbeddingProcessPool:
+    """Get or create the global embedding process pool"""
+    global _embedding_pool
+    if _embedding_pool is None:
+        with _embedding_pool_lock:
+            if _embedding_pool is None:
+                _embedding_pool = EmbeddingProcessPool()
+                atexit.register(_embedding_pool.close)
+    return _embedding_pool
+
+
+def get_embedding_pool_stats() -> Optional[Dict[str, Any]]:
+    """
+    Get the global pool's statistics without starting it.
+
+    Returns:
+        Pool statistics, or None if the pool has not been started
+    """
+    pool = _embedding_pool
+    if pool is None:
+        return None
+    return pool.get_stats()
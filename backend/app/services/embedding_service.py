@@ -2,156 +2,390 @@
 Embedding service for generating text embeddings using Sentence Transformers
 """
 
-from typing import List, Optional, Tuple
+from itertools import islice
+import multiprocessing
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
 import numpy as np
 
+from app.core.config import settings
+from app.services.embedding_batcher import EmbeddingBatcher
+from app.services.embedding_cache import create_embedding_cache
+from app.services.text_chunker import TokenChunker
+from app.services.vector_math import normalize_rows, top_k_indices, top_k_indices_2d
+
 
 class EmbeddingService:
     """Service for generating text embeddings"""
 
-    def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
+    def __init__(self, model_name: Optional[str] = None):
         """
         Initialize embedding service.
 
         Args:
             model_name: Name of the sentence transformer model
         """
-        self.model_name = model_name
+        self.model_name = model_name or settings.EMBEDDING_MODEL_NAME
         self._model = None
-        self._embedding_dim = 384  # Default for all-MiniLM-L6-v2
+        self._model_lock = threading.Lock()
+        self._embedding_dim: Optional[int] = None  # Read from the loaded model
+
+        # Cold-start timings, filled by the first model load and warm_up()
+        self._startup_stats: Dict[str, Any] = {"loaded": False}
+
+        # Shared micro-batching queue for single-text requests
+        self._batcher = None
+        if settings.EMBEDDING_BATCHING_ENABLED:
+            self._batcher = EmbeddingBatcher(
+                encode_fn=self._encode_batch,
+                max_batch_size=settings.EMBEDDING_BATCH_MAX_SIZE,
+                max_wait_ms=settings.EMBEDDING_BATCH_MAX_WAIT_MS,
+            )
+
+        # Content-hash cache so identical chunks skip the model
+        self._cache = create_embedding_cache(self.model_name)
+
+        # Token-aware chunkers keyed by (max_tokens, overlap_tokens)
+        self._chunkers: Dict[Tuple[int, int], TokenChunker] = {}
 
     @property
     def model(self):
-        """Lazy load the model"""
+        """Lazy load the model (once, even when called from several threads)"""
         if self._model is None:
-            try:
-                from sentence_transformers import SentenceTransformer
-
-                self._model = SentenceTransformer(self.model_name)
-                self._embedding_dim = self._model.get_sentence_embedding_dimension()
-            except ImportError:
-                raise ImportError(
-                    "sentence-transformers is required. Install with: pip install sentence-transformers"
-                )
+            with self._model_lock:
+                if self._model is None:
+                    self._model = self._load_model()
         return self._model
 
+    def _load_model(self):
+        """Load the sentence transformer and record how long it took"""
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError:
+            raise ImportError(
+                "sentence-transformers is required. Install with: pip install sentence-transformers"
+            )
+
+        started = time.perf_counter()
+        model = SentenceTransformer(self.model_name)
+        self._embedding_dim = model.get_sentence_embedding_dimension()
+        self._startup_stats.update(
+            loaded=True,
+            load_seconds=round(time.perf_counter() - started, 3),
+        )
+        print(
+            f"Loaded embedding model {self.model_name} "
+            f"in {self._startup_stats['load_seconds']:.2f}s"
+        )
+        return model
+
+    @property
+    def is_loaded(self) -> bool:
+        """Whether the model has been loaded into memory"""
+        return self._model is not None
+
+    def warm_up(self, batch_size: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Load the model and run dummy batches through it.
+
+        The first forward pass pays for lazy allocations (thread pools, kernel
+        selection), so it is run here instead of on the first user request.
+        The cache is bypassed so the model is actually exercised.
+
+        Args:
+            batch_size: Dummy texts per batch (default EMBEDDING_WARMUP_BATCH_SIZE)
+
+        Returns:
+            Startup stats: load, first-batch and warm-batch timings in seconds
+        """
+        batch_size = batch_size or settings.EMBEDDING_WARMUP_BATCH_SIZE
+        texts = [
+            f"Warm-up sentence number {i} for the embedding model."
+            for i in range(batch_size)
+        ]
+
+        self.model
+        loaded = time.perf_counter()
+        self._encode_batch(texts)
+        first_batch = time.perf_counter()
+        self._encode_batch(texts)
+        warm_batch = time.perf_counter()
+
+        self._startup_stats.update(
+            warmed_up=True,
+            # Model load plus first forward pass: what a cold request would pay
+            cold_start_seconds=round(
+                self._startup_stats.get("load_seconds", 0) + first_batch - loaded, 3
+            ),
+            first_batch_seconds=round(first_batch - loaded, 3),
+            warm_batch_seconds=round(warm_batch - first_batch, 3),
+        )
+        return self.get_startup_stats()
+
+    def get_startup_stats(self) -> Dict[str, Any]:
+        """
+        Get model load and warm-up timings.
+
+        Returns:
+            Dict with loaded/warmed_up flags and timings in seconds
+        """
+        return {"model_name": self.model_name, **self._startup_stats}
+
     @property
     def embedding_dimension(self) -> int:
-        """Get the embedding dimension"""
+        """Get the embedding dimension of the model (loading it if needed)"""
+        self.model
         return self._embedding_dim
 
-    def generate_embedding(self, text: str) -> List[float]:
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        """Run one forward pass over a list of texts"""
+        return self.model.encode(texts, convert_to_numpy=True)
+
+    def _use_pool(self, count: int) -> bool:
         """
-        Generate embedding for a single text.
+        Whether a batch of `count` texts goes to the process pool.
+
+        Never in a daemonic process (a Celery prefork child), which cannot
+        start the pool's workers.
+        """
+        return (
+            settings.EMBEDDING_POOL_ENABLED
+            and count >= settings.EMBEDDING_POOL_MIN_TEXTS
+            and self.model_name == settings.EMBEDDING_MODEL_NAME
+            and not multiprocessing.current_process().daemon
+        )
+
+    @property
+    def ingest_batch_size(self) -> int:
+        """
+        Texts per encode_array call when indexing notes.
+
+        EMBEDDING_BATCH_MAX_SIZE, or EMBEDDING_POOL_MIN_TEXTS when this
+        process uses the embedding pool, so ingestion batches are large
+        enough to be fanned out (the pool splits them into
+        EMBEDDING_POOL_BATCH_SIZE texts per worker task).
+        """
+        if self._use_pool(settings.EMBEDDING_POOL_MIN_TEXTS):
+            return max(
+                settings.EMBEDDING_BATCH_MAX_SIZE, settings.EMBEDDING_POOL_MIN_TEXTS
+            )
+        return settings.EMBEDDING_BATCH_MAX_SIZE
+
+    def _encode_many(self, texts: List[str]) -> np.ndarray:
+        """Encode a large list in-process or across the embedding pool"""
+        if self._use_pool(len(texts)):
+            from app.services.embedding_pool import get_embedding_pool
+
+            return get_embedding_pool().encode_array(texts)
+        return np.asarray(
+            self.model.encode(texts, convert_to_numpy=True), dtype=np.float32
+        )
+
+    def get_batching_stats(self) -> Dict[str, Any]:
+        """
+        Get micro-batching metrics (batch size and queue wait).
+
+        Returns:
+            Dict of batching statistics, with enabled=False when batching is off
+        """
+        if self._batcher is None:
+            return {"enabled": False}
+        return {"enabled": True, **self._batcher.get_stats()}
+
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """
+        Get embedding process pool metrics.
+
+        Returns:
+            Dict of pool statistics, with enabled=False when the pool is off
+        """
+        if not settings.EMBEDDING_POOL_ENABLED:
+            return {"enabled": False}
+
+        from app.services.embedding_pool import get_embedding_pool_stats
+
+        stats = get_embedding_pool_stats()
+        if stats is None:
+            return {"enabled": True, "started": False}
+        return {"enabled": True, "started": True, **stats}
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """
+        Get embedding cache hit/miss counters.
+
+        Returns:
+            Dict of cache statistics, with enabled=False when caching is off
+        """
+        if self._cache is None:
+            return {"enabled": False}
+        return {"enabled": True, **self._cache.get_stats()}
+
+    def encode_query_array(self, text: str) -> np.ndarray:
+        """
+        Embed a single text as a float32 array.
 
         Args:
             text: Text to embed
 
         Returns:
-            List of floats representing the embedding
+            1D float32 array of length embedding_dimension
         """
         if not text or not text.strip():
-            return [0.0] * self._embedding_dim
-
-        embedding = self.model.encode(text, convert_to_numpy=True)
-        return embedding.tolist()
-
-    def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
+            return np.zeros(self.embedding_dimension, dtype=np.float32)
+
+        if self._cache is not None:
+            cached = self._cache.get_many([text])[0]
+            if cached is not None:
+                # Cached vectors are shared and read-only
+                return cached.copy()
+
+        if self._batcher is not None:
+            # Concurrent callers share one forward pass
+            embedding = self._batcher.embed(text)
+        else:
+            embedding = self.model.encode(text, convert_to_numpy=True)
+        embedding = np.ascontiguousarray(embedding, dtype=np.float32)
+
+        if self._cache is not None:
+            self._cache.put_many([text], [embedding])
+        return embedding
+
+    def encode_array(self, texts: List[str]) -> np.ndarray:
         """
-        Generate embeddings for multiple texts.
+        Embed multiple texts as one contiguous float32 matrix.
 
         Args:
             texts: List of texts to embed
 
         Returns:
-            List of embeddings
+            float32 array of shape (len(texts), embedding_dimension)
         """
         if not texts:
-            return []
+            return np.empty((0, self.embedding_dimension), dtype=np.float32)
 
         # Filter empty texts
         valid_texts = [t if t and t.strip() else " " for t in texts]
 
-        embeddings = self.model.encode(valid_texts, convert_to_numpy=True)
-        return embeddings.tolist()
+        if self._cache is None:
+            return np.ascontiguousarray(self._encode_many(valid_texts))
 
-    def chunk_text(
-        self, text: str, max_chunk_size: int = 500, overlap: int = 50
-    ) -> List[Tuple[str, int]]:
+        # Only run the model on chunks we have not seen before
+        cached = self._cache.get_many(valid_texts)
+        miss_indexes = [i for i, vector in enumerate(cached) if vector is None]
+
+        if miss_indexes:
+            # Duplicate chunks within one call are encoded once
+            miss_texts = list(dict.fromkeys(valid_texts[i] for i in miss_indexes))
+            computed = self._encode_many(miss_texts)
+            self._cache.put_many(miss_texts, computed)
+            by_text = dict(zip(miss_texts, computed))
+            for i in miss_indexes:
+                cached[i] = by_text[valid_texts[i]]
+
+        return np.vstack(cached).astype(np.float32, copy=False)
+
+    def generate_embedding(self, text: str) -> List[float]:
         """
-        Split text into chunks for embedding.
+        Generate embedding for a single text.
 
         Args:
-            text: Text to chunk
-            max_chunk_size: Maximum characters per chunk
-            overlap: Number of characters to overlap between chunks
+            text: Text to embed
 
         Returns:
-            List of (chunk_text, chunk_index) tuples
+            List of floats representing the embedding
         """
-        if not text or not text.strip():
-            return []
-
-        # Split by sentences first
-        sentences = self._split_into_sentences(text)
-
-        chunks = []
-        current_chunk = []
-        current_length = 0
-        chunk_index = 0
-
-        for sentence in sentences:
-            sentence_length = len(sentence)
-
-            if current_length + sentence_length > max_chunk_size and current_chunk:
-                # Save current chunk
-                chunk_text = " ".join(current_chunk)
-                chunks.append((chunk_text, chunk_index))
-                chunk_index += 1
+        return self.encode_query_array(text).tolist()
 
-                # Start new chunk with overlap
-                if overlap > 0 and len(current_chunk) > 1:
-                    # Keep last sentence(s) for overlap
-                    overlap_text = current_chunk[-1]
-                    current_chunk = [overlap_text]
-                    current_length = len(overlap_text)
-                else:
-                    current_chunk = []
-                    current_length = 0
+    def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """
+        Generate embeddings for multiple texts.
 
-            current_chunk.append(sentence)
-            current_length += sentence_length + 1  # +1 for space
+        Args:
+            texts: List of texts to embed
 
-        # Don't forget the last chunk
-        if current_chunk:
-            chunk_text = " ".join(current_chunk)
-            chunks.append((chunk_text, chunk_index))
+        Returns:
+            List of embeddings
+        """
+        return self.encode_array(texts).tolist()
 
-        return chunks
+    @property
+    def tokenizer(self):
+        """The model's fast tokenizer, or None if it cannot report offsets"""
+        tokenizer = getattr(self.model, "tokenizer", None)
+        return tokenizer if getattr(tokenizer, "is_fast", False) else None
 
-    def _split_into_sentences(self, text: str) -> List[str]:
+    @property
+    def max_chunk_tokens(self) -> int:
+        """Token budget per chunk: the model window minus special tokens"""
+        if settings.EMBEDDING_CHUNK_MAX_TOKENS > 0:
+            return settings.EMBEDDING_CHUNK_MAX_TOKENS
+        special_tokens = 2  # [CLS] and [SEP]
+        if self.tokenizer is not None:
+            special_tokens = self.tokenizer.num_special_tokens_to_add(pair=False)
+        return self.model.max_seq_length - special_tokens
+
+    def _get_chunker(
+        self, max_tokens: Optional[int], overlap_tokens: Optional[int]
+    ) -> TokenChunker:
+        """Return a cached chunker for the given budget"""
+        max_tokens = max_tokens or self.max_chunk_tokens
+        if overlap_tokens is None:
+            overlap_tokens = settings.EMBEDDING_CHUNK_OVERLAP_TOKENS
+
+        key = (max_tokens, overlap_tokens)
+        chunker = self._chunkers.get(key)
+        if chunker is None:
+            chunker = self._chunkers[key] = TokenChunker(
+                max_tokens=max_tokens,
+                overlap_tokens=overlap_tokens,
+                tokenizer=self.tokenizer,
+            )
+        return chunker
+
+    def iter_chunks(
+        self,
+        text: str,
+        max_tokens: Optional[int] = None,
+        overlap_tokens: Optional[int] = None,
+    ) -> Iterator[Tuple[str, int]]:
         """
-        Split text into sentences.
+        Lazily split text into chunks that fit the model's token window.
 
         Args:
-            text: Text to split
+            text: Text to chunk
+            max_tokens: Maximum model tokens per chunk (default: model window)
+            overlap_tokens: Tokens shared with the previous chunk
+                (default EMBEDDING_CHUNK_OVERLAP_TOKENS)
 
         Returns:
-            List of sentences
+            Iterator of (chunk_text, chunk_index) tuples
         """
-        import re
+        return self._get_chunker(max_tokens, overlap_tokens).iter_chunks(text)
 
-        # Simple sentence splitting
-        # Split on period, exclamation, question mark followed by space or end
-        sentences = re.split(r"(?<=[.!?])\s+", text)
+    def chunk_text(
+        self,
+        text: str,
+        max_tokens: Optional[int] = None,
+        overlap_tokens: Optional[int] = None,
+    ) -> List[Tuple[str, int]]:
+        """
+        Split text into chunks for embedding.
 
-        # Clean up
-        sentences = [s.strip() for s in sentences if s.strip()]
+        Args:
+            text: Text to chunk
+            max_tokens: Maximum model tokens per chunk (default: model window)
+            overlap_tokens: Tokens shared with the previous chunk
 
-        return sentences
+        Returns:
+            List of (chunk_text, chunk_index) tuples
+        """
+        return list(self.iter_chunks(text, max_tokens, overlap_tokens))
 
     def compute_similarity(
-        self, embedding1: List[float], embedding2: List[float]
+        self,
+        embedding1: Union[np.ndarray, List[float]],
+        embedding2: Union[np.ndarray, List[float]],
     ) -> float:
         """
         Compute cosine similarity between two embeddings.
@@ -163,8 +397,8 @@ class EmbeddingService:
         Returns:
             Similarity score (0-1)
         """
-        vec1 = np.array(embedding1)
-        vec2 = np.array(embedding2)
+        vec1 = np.asarray(embedding1, dtype=np.float32)
+        vec2 = np.asarray(embedding2, dtype=np.float32)
 
         # Cosine similarity
         dot_product = np.dot(vec1, vec2)
@@ -178,75 +412,203 @@ class EmbeddingService:
 
     def find_most_similar(
         self,
-        query_embedding: List[float],
-        embeddings: List[List[float]],
+        query_embedding: Union[np.ndarray, List[float]],
+        embeddings: Union[np.ndarray, List[List[float]]],
         top_k: int = 5,
+        normalized: bool = False,
     ) -> List[Tuple[int, float]]:
         """
         Find most similar embeddings to a query.
 
         Args:
             query_embedding: Query embedding
-            embeddings: List of embeddings to search
+            embeddings: Matrix (or list) of embeddings to search
             top_k: Number of results to return
+            normalized: True if embeddings rows are already L2-normalized
+                (pass a matrix from normalize_rows to reuse it across queries)
 
         Returns:
             List of (index, similarity_score) tuples
         """
-        if not embeddings:
+        if len(embeddings) == 0:
             return []
 
-        similarities = []
-        for i, emb in enumerate(embeddings):
-            sim = self.compute_similarity(query_embedding, emb)
-            similarities.append((i, sim))
+        matrix = (
+            np.asarray(embeddings, dtype=np.float32)
+            if normalized
+            else normalize_rows(embeddings)
+        )
 
-        # Sort by similarity (descending)
-        similarities.sort(key=lambda x: x[1], reverse=True)
+        # One matrix-vector product instead of a Python loop
+        scores = matrix @ normalize_rows(query_embedding)
+        indices = top_k_indices(scores, top_k)
 
-        return similarities[:top_k]
+        return [(int(i), float(scores[i])) for i in indices]
 
-    def process_note_for_embedding(
-        self, text: str, max_chunk_size: int = 500, overlap: int = 50
-    ) -> List[Tuple[str, List[float]]]:
+    def find_most_similar_batch(
+        self,
+        query_embeddings: Union[np.ndarray, List[List[float]]],
+        embeddings: Union[np.ndarray, List[List[float]]],
+        top_k: int = 5,
+        normalized: bool = False,
+        query_block_size: int = 64,
+    ) -> List[List[Tuple[int, float]]]:
         """
-        Process a note text into chunks and generate embeddings.
+        Find the most similar embeddings for many queries at once.
+
+        Args:
+            query_embeddings: Matrix (or list) of query embeddings
+            embeddings: Matrix (or list) of embeddings to search
+            top_k: Number of results per query
+            normalized: True if embeddings rows are already L2-normalized
+            query_block_size: Queries scored per matrix product, bounding the
+                (queries x documents) score matrix in memory
+
+        Returns:
+            One list of (index, similarity_score) tuples per query
+        """
+        if len(query_embeddings) == 0:
+            return []
+        if len(embeddings) == 0:
+            return [[] for _ in range(len(query_embeddings))]
+
+        matrix = (
+            np.asarray(embeddings, dtype=np.float32)
+            if normalized
+            else normalize_rows(embeddings)
+        )
+        queries = normalize_rows(query_embeddings)
+
+        results = []
+        for start in range(0, len(queries), query_block_size):
+            scores = queries[start : start + query_block_size] @ matrix.T
+            indices, top_scores = top_k_indices_2d(scores, top_k)
+            for row_indices, row_scores in zip(indices, top_scores):
+                results.append(
+                    [
+                        (int(i), float(score))
+                        for i, score in zip(row_indices, row_scores)
+                    ]
+                )
+
+        return results
+
+    def iter_note_embeddings(
+        self,
+        text: str,
+        max_tokens: Optional[int] = None,
+        overlap_tokens: Optional[int] = None,
+        batch_size: Optional[int] = None,
+    ) -> Iterator[Tuple[str, np.ndarray]]:
+        """
+        Lazily chunk and embed a note, one model batch at a time.
+
+        Only batch_size chunks are held at once, so the pairs can be streamed
+        straight into VectorService.store_embeddings_stream.
 
         Args:
             text: Note text to process
-            max_chunk_size: Maximum characters per chunk
-            overlap: Number of characters to overlap between chunks
+            max_tokens: Maximum model tokens per chunk
+            overlap_tokens: Tokens shared with the previous chunk
+            batch_size: Chunks embedded per encode_array call
+                (default ingest_batch_size)
 
         Returns:
-            List of (chunk_text, embedding) tuples
+            Iterator of (chunk_text, float32 embedding) pairs in chunk order
+        """
+        batch_size = batch_size or self.ingest_batch_size
+        chunks = self.iter_chunks(text, max_tokens, overlap_tokens)
+        while True:
+            chunk_texts = [chunk for chunk, _ in islice(chunks, batch_size)]
+            if not chunk_texts:
+                return
+            yield from zip(chunk_texts, self.encode_array(chunk_texts))
+
+    def process_note_for_embedding_array(
+        self,
+        text: str,
+        max_tokens: Optional[int] = None,
+        overlap_tokens: Optional[int] = None,
+    ) -> Tuple[List[str], np.ndarray]:
         """
-        # Chunk the text
-        chunks = self.chunk_text(text, max_chunk_size, overlap)
+        Process a note text into chunks and a float32 embedding matrix.
 
-        if not chunks:
-            return []
+        Args:
+            text: Note text to process
+            max_tokens: Maximum model tokens per chunk
+            overlap_tokens: Tokens shared with the previous chunk
 
-        # Extract just the text from chunks (ignore index)
-        chunk_texts = [chunk_text for chunk_text, _ in chunks]
+        Returns:
+            Tuple of (chunk_texts, embeddings) where row i embeds chunk i
+        """
+        chunk_texts = [
+            chunk for chunk, _ in self.iter_chunks(text, max_tokens, overlap_tokens)
+        ]
 
-        # Generate embeddings for all chunks
-        embeddings = self.generate_embeddings(chunk_texts)
+        return chunk_texts, self.encode_array(chunk_texts)
 
-        # Combine chunks with their embeddings
-        return list(zip(chunk_texts, embeddings))
+    def process_note_for_embedding(
+        self,
+        text: str,
+        max_tokens: Optional[int] = None,
+        overlap_tokens: Optional[int] = None,
+    ) -> List[Tuple[str, List[float]]]:
+        """
+        Process a note text into chunks and generate embeddings.
 
+        Args:
+            text: Note text to process
+            max_tokens: Maximum model tokens per chunk
+            overlap_tokens: Tokens shared with the previous chunk
+
+        Returns:
+            List of (chunk_text, embedding) tuples
+        """
+        chunk_texts, embeddings = self.process_note_for_embedding_array(
+            text, max_tokens, overlap_tokens
+        )
 
-# Singleton instance
-embedding_service = EmbeddingService()
+        # Combine chunks with their embeddings
+        return list(zip(chunk_texts, embeddings.tolist()))
 
 
-# Global instance
+# Global instance, shared by the API, the Celery tasks and the scripts
 _embedding_service = None
+_embedding_service_lock = threading.Lock()
 
 
 def get_embedding_service() -> EmbeddingService:
     """Get or create the global embedding service instance"""
     global _embedding_service
     if _embedding_service is None:
-        _embedding_service = EmbeddingService()
+        with _embedding_service_lock:
+            if _embedding_service is None:
+                _embedding_service = EmbeddingService()
     return _embedding_service
+
+
+def preload_embedding_model() -> Dict[str, Any]:
+    """
+    Load and warm the shared model (API lifespan and Celery worker startup).
+
+    Failures are reported instead of raised, so a missing model does not stop
+    the process from starting; it then loads lazily on first use.
+
+    Returns:
+        Startup stats of the shared service, with "error" set on failure
+    """
+    service = get_embedding_service()
+    try:
+        stats = service.warm_up()
+    except Exception as e:
+        print(f"✗ Embedding model preload failed: {e}")
+        service._startup_stats["error"] = str(e)
+        return service.get_startup_stats()
+
+    print(
+        f"✓ Embedding model ready: cold start {stats['cold_start_seconds']:.2f}s "
+        f"(load {stats.get('load_seconds', 0):.2f}s, "
+        f"first batch {stats['first_batch_seconds']:.3f}s, "
+        f"warm batch {stats['warm_batch_seconds']:.3f}s)"
+    )
+    return stats
@@ -0,0 +1,439 @@
+"""
+Lexical (BM25) search over note chunks, and fusion with semantic results.
+
+Dense retrieval misses exact terms such as acronyms, equation names and
+citation keys. Each (user, report) gets a compact in-memory BM25 index built
+from NoteEmbedding.chunk_text: postings are array-backed (row ids and term
+frequencies as C ints) and scored with numpy. Indexes are built lazily from
+the database and kept current incrementally as notes are added or deleted.
+"""
+
+import math
+import re
+import threading
+import time
+from array import array
+from itertools import islice
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.note import Note, NoteEmbedding
+from app.services.vector_math import top_k_indices
+
+# Words, optionally joined by -.:/ so "navier-stokes" or "smith2020:bert" survive
+TOKEN_PATTERN = re.compile(r"\w+(?:[-.:/]\w+)*")
+TOKEN_SEPARATOR_PATTERN = re.compile(r"[-.:/]")
+
+# Rows tokenized and merged into the postings at a time
+ADD_BATCH_SIZE = 4096
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase terms.
+
+    Compound terms are emitted whole as well as word by word, so
+    "Navier-Stokes" matches both "navier-stokes" and "stokes".
+
+    Args:
+        text: Text to tokenize
+
+    Returns:
+        List of terms (with repeats)
+    """
+    terms = TOKEN_PATTERN.findall(text.lower())
+    compounds = [
+        term
+        for term in terms
+        if not term.isalnum() and TOKEN_SEPARATOR_PATTERN.search(term)
+    ]
+    for term in compounds:
+        terms.extend(TOKEN_SEPARATOR_PATTERN.split(term))
+    return terms
+
+
+def _int_view(values: array) -> np.ndarray:
+    """Zero-copy numpy view of an array('i')"""
+    return np.frombuffer(values, dtype=np.intc, count=len(values))
+
+
+class BM25Index:
+    """
+    BM25 index over the chunks of one (user, report) partition.
+
+    Rows are append-only; deleting a note marks its rows dead. Document
+    frequencies include dead rows until the index is rebuilt, which slightly
+    skews IDF after heavy deletion (see dead_fraction).
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+
+        # Per row: NoteEmbedding.id, note id, chunk length, liveness
+        self.row_ids = array("i")
+        self.note_ids = array("i")
+        self.doc_lengths = array("i")
+        self.alive = bytearray()
+
+        # term -> term id -> (rows, term frequencies), rows ascending
+        self.vocab: Dict[str, int] = {}
+        self.postings: List[Tuple[array, array]] = []
+
+        self.live_count = 0
+        self.live_length = 0
+        self.max_row_id = 0
+        self.synced_at = 0.0  # time.monotonic() of the last DB check
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return self.live_count
+
+    @property
+    def dead_fraction(self) -> float:
+        """Share of rows that belong to deleted notes"""
+        total = len(self.alive)
+        return (total - self.live_count) / total if total else 0.0
+
+    def add(self, rows: Iterable[Tuple[int, int, str]]) -> int:
+        """
+        Index chunks.
+
+        Args:
+            rows: (NoteEmbedding.id, note_id, chunk_text) tuples
+
+        Returns:
+            Number of chunks added
+        """
+        added = 0
+        iterator = iter(rows)
+        with self._lock:
+            while True:
+                batch = list(islice(iterator, ADD_BATCH_SIZE))
+                if not batch:
+                    return added
+                self._add_batch(batch)
+                added += len(batch)
+
+    def _add_batch(self, batch: List[Tuple[int, int, str]]):
+        """Tokenize a batch of rows and merge it into the postings (lock held)"""
+        first_row = len(self.row_ids)
+        lengths = []
+        tokens = []
+        for _, _, chunk_text in batch:
+            chunk_tokens = tokenize(chunk_text)
+            lengths.append(len(chunk_tokens))
+            tokens.extend(chunk_tokens)
+
+        for term in set(tokens).difference(self.vocab):
+            self.vocab[term] = len(self.postings)
+            self.postings.append((array("i"), array("i")))
+
+        # Count (term, row) pairs at once: unique keys sort by term, then row
+        n = len(batch)
+        term_ids = np.fromiter(
+            map(self.vocab.__getitem__, tokens), dtype=np.int64, count=len(tokens)
+        )
+        keys = term_ids * n + np.repeat(np.arange(n), lengths)
+        keys, counts = np.unique(keys, return_counts=True)
+        key_terms = keys // n
+        rows = (keys % n + first_row).astype(np.intc)
+        counts = counts.astype(np.intc)
+
+        starts = np.flatnonzero(np.diff(key_terms, prepend=-1))
+        ends = np.append(starts[1:], len(keys))
+        for term_id, start, end in zip(
+            key_terms[starts].tolist(), starts.tolist(), ends.tolist()
+        ):
+            posting_rows, posting_counts = self.postings[term_id]
+            posting_rows.frombytes(rows[start:end].tobytes())
+            posting_counts.frombytes(counts[start:end].tobytes())
+
+        self.row_ids.extend(row[0] for row in batch)
+        self.note_ids.extend(row[1] for row in batch)
+        self.doc_lengths.extend(lengths)
+        self.alive.extend(b"\x01" * n)
+
+        self.live_count += n
+        self.live_length += sum(lengths)
+        self.max_row_id = max(self.max_row_id, max(row[0] for row in batch))
+
+    def remove_note(self, note_id: int) -> int:
+        """
+        Mark every chunk of a note as deleted.
+
+        Args:
+            note_id: Note to remove
+
+        Returns:
+            Number of chunks removed
+        """
+        with self._lock:
+            if not self.note_ids:
+                return 0
+            alive = np.frombuffer(self.alive, dtype=np.uint8)
+            rows = np.flatnonzero((_int_view(self.note_ids) == note_id) & (alive == 1))
+            for row in rows.tolist():
+                self.alive[row] = 0
+                self.live_length -= self.doc_lengths[row]
+            self.live_count -= len(rows)
+            return len(rows)
+
+    def search(self, query: str, limit: int = 5) -> List[Tuple[int, float]]:
+        """
+        Score live chunks against a query with BM25.
+
+        Args:
+            query: Query text
+            limit: Maximum number of results
+
+        Returns:
+            List of (NoteEmbedding.id, score), best first, positive scores only
+        """
+        terms = set(tokenize(query))
+        with self._lock:
+            n_rows = len(self.row_ids)
+            if not terms or not self.live_count:
+                return []
+
+            doc_lengths = _int_view(self.doc_lengths)
+            avg_length = self.live_length / self.live_count or 1.0
+            scores = np.zeros(n_rows, dtype=np.float32)
+
+            for term in terms:
+                term_id = self.vocab.get(term)
+                if term_id is None:
+                    continue
+                posting_rows, posting_counts = self.postings[term_id]
+                rows = _int_view(posting_rows)
+                tf = _int_view(posting_counts).astype(np.float32)
+                df = len(rows)
+                idf = math.log(1.0 + (n_rows - df + 0.5) / (df + 0.5))
+                norm = self.k1 * (
+                    1.0 - self.b + self.b * doc_lengths[rows] / avg_length
+                )
+                # Each row appears once per posting list, so fancy-index += is safe
+                scores[rows] += idf * tf * (self.k1 + 1.0) / (tf + norm)
+
+            scores *= np.frombuffer(self.alive, dtype=np.uint8)
+            top = top_k_indices(scores, limit)
+            row_ids = _int_view(self.row_ids)
+            return [
+                (int(row_ids[row]), float(scores[row]))
+                for row in top.tolist()
+                if scores[row] > 0
+            ]
+
+
+class LexicalSearchService:
+    """Per-(user, report) BM25 indexes kept in sync with NoteEmbedding rows"""
+
+    # Rebuild an index from the database once this share of rows is dead
+    COMPACT_DEAD_FRACTION = 0.5
+
+    def __init__(self):
+        self._indexes: Dict[Tuple[int, int], BM25Index] = {}
+        self._lock = threading.Lock()
+
+    def _chunk_query(self, db: Session, report_id: int, user_id: int):
+        """Query of (NoteEmbedding.id, note_id, chunk_text) for a partition"""
+        return (
+            db.query(NoteEmbedding.id, NoteEmbedding.note_id, NoteEmbedding.chunk_text)
+            .join(Note, Note.id == NoteEmbedding.note_id)
+            .filter(Note.report_id == report_id, Note.user_id == user_id)
+        )
+
+    def _sync(self, db: Session, report_id: int, user_id: int) -> BM25Index:
+        """
+        Return the partition's index, building or catching it up from the DB.
+
+        At most once per LEXICAL_INDEX_SYNC_SECONDS, one aggregate query
+        detects chunks written by other processes (e.g. Celery workers): new
+        rows are appended; if rows disappeared that this process did not see
+        deleted, the index is rebuilt.
+        """
+        key = (user_id, report_id)
+        with self._lock:
+            index = self._indexes.get(key)
+            if index is None or index.dead_fraction > self.COMPACT_DEAD_FRACTION:
+                index = self._indexes[key] = BM25Index()
+
+        with index._lock:
+            now = time.monotonic()
+            if now - index.synced_at < settings.LEXICAL_INDEX_SYNC_SECONDS:
+                return index
+            index.synced_at = now
+
+            count, max_id = (
+                self._chunk_query(db, report_id, user_id)
+                .with_entities(func.count(NoteEmbedding.id), func.max(NoteEmbedding.id))
+                .one()
+            )
+            if count == len(index) and (max_id or 0) == index.max_row_id:
+                return index
+
+            index.add(
+                self._chunk_query(db, report_id, user_id)
+                .filter(NoteEmbedding.id > index.max_row_id)
+                .order_by(NoteEmbedding.id)
+                .yield_per(1000)
+            )
+
+            if len(index) != count:
+                print(
+                    f"Lexical index for report {report_id} out of sync "
+                    f"({len(index)} != {count} chunks), rebuilding"
+                )
+                index = BM25Index()
+                index.synced_at = now
+                index.add(
+                    self._chunk_query(db, report_id, user_id)
+                    .order_by(NoteEmbedding.id)
+                    .yield_per(1000)
+                )
+                with self._lock:
+                    self._indexes[key] = index
+
+        return index
+
+    def add_chunks(
+        self,
+        report_id: int,
+        user_id: int,
+        rows: Sequence[Tuple[int, int, str]],
+    ):
+        """
+        Add freshly committed chunks to a loaded index.
+
+        Indexes not yet loaded pick the rows up when they are built.
+
+        Args:
+            report_id: ID of the report
+            user_id: ID of the user
+            rows: (NoteEmbedding.id, note_id, chunk_text) tuples
+        """
+        index = self._indexes.get((user_id, report_id))
+        if index is None:
+            return
+        with index._lock:
+            index.add(row for row in rows if row[0] > index.max_row_id)
+
+    def remove_note(self, note_id: int, report_id: int, user_id: int):
+        """Drop a deleted note's chunks from a loaded index"""
+        index = self._indexes.get((user_id, report_id))
+        if index is not None:
+            index.remove_note(note_id)
+
+    def drop_report(self, report_id: int, user_id: int):
+        """Forget a report's index"""
+        with self._lock:
+            self._indexes.pop((user_id, report_id), None)
+
+    def search(
+        self,
+        db: Session,
+        query: str,
+        report_id: int,
+        user_id: int,
+        limit: int = 5,
+    ) -> List[Dict[str, Any]]:
+        """
+        BM25 search within one report.
+
+        Args:
+            db: Database session
+            query: Query text
+            report_id: ID of the report
+            user_id: ID of the user
+            limit: Maximum number of results
+
+        Returns:
+            Search results in the same format as VectorService.search_similar
+        """
+        hits = self._sync(db, report_id, user_id).search(query, limit)
+        if not hits:
+            return []
+
+        rows = {
+            row.id: row
+            for row in db.query(
+                NoteEmbedding.id,
+                NoteEmbedding.note_id,
+                NoteEmbedding.chunk_index,
+                NoteEmbedding.chunk_text,
+                Note.filename,
+                Note.file_type,
+            )
+            .join(Note, Note.id == NoteEmbedding.note_id)
+            .filter(NoteEmbedding.id.in_([row_id for row_id, _ in hits]))
+        }
+
+        return [
+            {
+                "score": score,
+                "note_id": rows[row_id].note_id,
+                "chunk_index": rows[row_id].chunk_index,
+                "chunk_text": rows[row_id].chunk_text,
+                "filename": rows[row_id].filename,
+                "file_type": rows[row_id].file_type,
+            }
+            for row_id, score in hits
+            if row_id in rows
+        ]
+
+
+def reciprocal_rank_fusion(
+    result_lists: Dict[str, List[Dict[str, Any]]],
+    limit: int = 5,
+    k: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Fuse ranked result lists with reciprocal-rank fusion.
+
+    Each chunk scores sum(1 / (k + rank)) over the lists it appears in, so
+    BM25 and cosine scores never need to be put on a common scale.
+
+    Args:
+        result_lists: Ranked results keyed by source name (e.g. "semantic")
+        limit: Maximum number of fused results
+        k: RRF constant (default HYBRID_RRF_K)
+
+    Returns:
+        Fused results; "score" is the RRF score and "<source>_score" holds
+        each source's original score (None when the chunk was not retrieved)
+    """
+    k = settings.HYBRID_RRF_K if k is None else k
+    fused: Dict[Tuple[int, int], Dict[str, Any]] = {}
+
+    for source, results in result_lists.items():
+        for rank, result in enumerate(results, start=1):
+            key = (result["note_id"], result["chunk_index"])
+            entry = fused.get(key)
+            if entry is None:
+                entry = fused[key] = {
+                    **result,
+                    "score": 0.0,
+                    **{f"{name}_score": None for name in result_lists},
+                }
+            entry["score"] += 1.0 / (k + rank)
+            entry[f"{source}_score"] = result["score"]
+
+    return sorted(fused.values(), key=lambda entry: entry["score"], reverse=True)[
+        :limit
+    ]
+
+
+# Global instance
+_lexical_search_service = None
+
+
+def get_lexical_search_service() -> LexicalSearchService:
+    """Get or create the global lexical search service instance"""
+    global _lexical_search_service
+    if _lexical_search_service is None:
+        _lexical_search_service = LexicalSearchService()
+    return _lexical_search_service
@@ -0,0 +1,306 @@
+"""
+Note indexing pipeline: chunk, embed, upsert vectors and store NoteEmbedding rows.
+
+Notes are indexed in groups: the chunks of a group's new notes share
+encode batches (see EmbeddingService.ingest_batch_size), and each batch is stored
+(vectors and rows) before the next is embedded, so only one batch of
+vectors is held at a time.
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from app.models.note import Note, NoteEmbedding
+from app.models.upload_job import UploadJob
+from app.services.embedding_codec import encode_embedding
+from app.services.embedding_service import get_embedding_service
+from app.services.lexical_index import get_lexical_search_service
+from app.services.progress_service import publish_note_status, publish_progress
+from app.services.vector_service import get_vector_service
+
+
+def save_chunk_rows(
+    db: Session,
+    note: Note,
+    chunks: List[str],
+    point_ids: List[str],
+    embeddings: Sequence[Optional[np.ndarray]],
+) -> bool:
+    """
+    Replace a note's NoteEmbedding rows and update the lexical index.
+
+    The rows hold the chunk text used by lexical (BM25) search and a binary
+    backup of each vector, and are written with one bulk INSERT. Chunks
+    given no vector keep the stored vector of an identical previous chunk.
+
+    Args:
+        db: Database session
+        note: Note the chunks belong to
+        chunks: Chunk texts in order
+        point_ids: Vector store point ID of each chunk
+        embeddings: Vector of each chunk, or None to reuse the stored one
+
+    Returns:
+        True if the note had rows before (i.e. it was indexed already)
+    """
+    lexical_service = get_lexical_search_service()
+
+    previous = {
+        row.chunk_text: (row.embedding, row.embedding_dtype)
+        for row in db.query(
+            NoteEmbedding.chunk_text,
+            NoteEmbedding.embedding,
+            NoteEmbedding.embedding_dtype,
+        ).filter(NoteEmbedding.note_id == note.id)
+    }
+    if previous:
+        db.query(NoteEmbedding).filter(NoteEmbedding.note_id == note.id).delete(
+            synchronize_session=False
+        )
+        lexical_service.remove_note(note.id, note.report_id, note.user_id)
+
+    rows = []
+    for idx, (chunk_text, point_id, vector) in enumerate(
+        zip(chunks, point_ids, embeddings)
+    ):
+        if vector is not None:
+            blob, dtype_name = encode_embedding(vector)
+        else:
+            blob, dtype_name = previous.get(chunk_text, (None, None))
+        rows.append(
+            {
+                "note_id": note.id,
+                "chunk_index": idx,
+                "chunk_text": chunk_text,
+                "embedding": blob,
+                "embedding_dtype": dtype_name,
+                "qdrant_id": point_id,
+            }
+        )
+
+    _insert_chunk_rows(db, rows, {note.id: (note.report_id, note.user_id)})
+    return bool(previous)
+
+
+def _insert_chunk_rows(
+    db: Session, rows: List[Dict], owners: Dict[int, Tuple[int, int]]
+):
+    """
+    Insert NoteEmbedding rows with one bulk INSERT and add them to the
+    lexical index once committed.
+
+    Args:
+        db: Database session
+        rows: NoteEmbedding column values
+        owners: (report_id, user_id) of each note ID in the rows
+    """
+    row_ids = []
+    if rows:
+        row_ids = db.scalars(
+            insert(NoteEmbedding).returning(
+                NoteEmbedding.id, sort_by_parameter_order=True
+            ),
+            rows,
+        ).all()
+    db.commit()
+
+    by_index: Dict[Tuple[int, int], List[Tuple[int, int, str]]] = {}
+    for row_id, row in zip(row_ids, rows):
+        by_index.setdefault(owners[row["note_id"]], []).append(
+            (row_id, row["note_id"], row["chunk_text"])
+        )
+    lexical_service = get_lexical_search_service()
+    for (report_id, user_id), index_rows in by_index.items():
+        lexical_service.add_chunks(report_id, user_id, index_rows)
+
+
+def reindex_note(db: Session, note: Note) -> Dict[str, Any]:
+    """
+    Re-index an indexed note, embedding only chunks whose text changed.
+
+    Points past the new last chunk are deleted, and the note's NoteEmbedding
+    rows are replaced (unchanged chunks keep their stored vectors).
+
+    Args:
+        db: Database session
+        note: Note to re-index
+
+    Returns:
+        Chunk counts from VectorService.reindex_note_embeddings
+    """
+    embedding_service = get_embedding_service()
+    chunks = [chunk for chunk, _ in embedding_service.iter_chunks(note.content)]
+
+    # Keep the vectors of re-embedded chunks for the database backup
+    computed = {}
+
+    def embed(texts):
+        vectors = embedding_service.encode_array(texts)
+        computed.update(zip(texts, vectors))
+        return vectors
+
+    result = get_vector_service().reindex_note_embeddings(
+        note_id=note.id,
+        chunks=chunks,
+        embed=embed,
+        report_id=note.report_id,
+        user_id=note.user_id,
+        filename=note.filename,
+        file_type=note.file_type,
+    )
+    save_chunk_rows(
+        db, note, chunks, result["point_ids"], [computed.get(c) for c in chunks]
+    )
+    return result
+
+
+def _index_new_notes(db: Session, notes: List[Note]) -> int:
+    """
+    Embed and store the chunks of notes that have no rows yet.
+
+    The chunks of all the notes are embedded in shared batches of
+    EmbeddingService.ingest_batch_size texts (EMBEDDING_BATCH_MAX_SIZE, or
+    EMBEDDING_POOL_MIN_TEXTS when the embedding pool is used); each batch is saved as NoteEmbedding
+    rows and upserted as soon as it is embedded, so only one batch of
+    vectors is held at a time.
+
+    Returns:
+        Number of chunks embedded
+    """
+    embedding_service = get_embedding_service()
+    vector_service = get_vector_service()
+
+    # Read once: every commit below expires the loaded notes
+    fields = {
+        note.id: (note.report_id, note.user_id, note.filename, note.file_type)
+        for note in notes
+    }
+    owners = {note_id: values[:2] for note_id, values in fields.items()}
+    work = [
+        (note.id, chunk_index, chunk)
+        for note in notes
+        for chunk, chunk_index in embedding_service.iter_chunks(note.content)
+    ]
+    batch_size = embedding_service.ingest_batch_size
+
+    def point_batches():
+        for start in range(0, len(work), batch_size):
+            batch = work[start : start + batch_size]
+            vectors = embedding_service.encode_array([chunk for _, _, chunk in batch])
+
+            points = []
+            rows = []
+            for (note_id, chunk_index, chunk), vector in zip(batch, vectors):
+                point = vector_service.build_point(
+                    note_id, chunk_index, chunk, vector, *fields[note_id]
+                )
+                blob, dtype_name = encode_embedding(vector)
+                points.append(point)
+                rows.append(
+                    {
+                        "note_id": note_id,
+                        "chunk_index": chunk_index,
+                        "chunk_text": chunk,
+                        "embedding": blob,
+                        "embedding_dtype": dtype_name,
+                        "qdrant_id": point.id,
+                    }
+                )
+            _insert_chunk_rows(db, rows, owners)
+            yield points
+
+    vector_service.upsert_batches(point_batches())
+    return len(work)
+
+
+def index_notes(db: Session, note_ids: List[int]) -> Dict[str, Any]:
+    """
+    Chunk, embed and store a group of notes.
+
+    The chunks of the group's new notes are embedded together in full model
+    batches (see _index_new_notes); notes indexed before are re-indexed one
+    by one, re-embedding only their changed chunks. A failing re-indexed
+    note does not fail the rest. Upload jobs linked to the notes are
+    completed (or failed) too.
+
+    Args:
+        db: Database session
+        note_ids: IDs of the notes to index
+
+    Returns:
+        Dict with the number of notes indexed/failed and chunks embedded
+    """
+    notes = db.query(Note).filter(Note.id.in_(note_ids)).order_by(Note.id).all()
+    if not notes:
+        return {"indexed": 0, "failed": 0, "chunks": 0}
+
+    for note in notes:
+        note.status = "processing"
+    db.commit()
+
+    indexed_ids = set(
+        db.scalars(
+            select(NoteEmbedding.note_id)
+            .where(NoteEmbedding.note_id.in_([note.id for note in notes]))
+            .distinct()
+        )
+    )
+
+    indexed = 0
+    chunks = 0
+    new_notes = [note for note in notes if note.id not in indexed_ids]
+    if new_notes:
+        try:
+            chunks += _index_new_notes(db, new_notes)
+        except Exception as e:
+            db.rollback()
+            for note in new_notes:
+                _finish_note(db, note, error=str(e))
+        else:
+            for note in new_notes:
+                _finish_note(db, note)
+            indexed += len(new_notes)
+
+    for note in notes:
+        if note.id not in indexed_ids:
+            continue
+        try:
+            chunks += reindex_note(db, note)["upserted"]
+            _finish_note(db, note)
+            indexed += 1
+        except Exception as e:
+            db.rollback()
+            _finish_note(db, note, error=str(e))
+
+    return {"indexed": indexed, "failed": len(notes) - indexed, "chunks": chunks}
+
+
+def _finish_note(db: Session, note: Note, error: Optional[str] = None):
+    """Mark a note and its pending upload jobs completed or failed"""
+    note.status = "failed" if error else "completed"
+    note.processing_error = error
+
+    jobs = (
+        db.query(UploadJob)
+        .filter(
+            UploadJob.note_id == note.id,
+            UploadJob.status.notin_(["completed", "failed"]),
+        )
+        .all()
+    )
+    for job in jobs:
+        job.status = note.status
+        job.error_message = error
+        if not error:
+            job.progress = 100
+            job.completed_at = datetime.utcnow()
+    db.commit()
+
+    # Status polling reads the progress channel first
+    for job in jobs:
+        publish_progress(job)
+    publish_note_status(note)
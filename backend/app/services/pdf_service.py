@@ -3,10 +3,55 @@ PDF processing service for extracting text and structure from PDF files
 """
 
 import fitz  # PyMuPDF
-from typing import List, Dict, Tuple, Optional
+from typing import List, Dict, Tuple, Optional, Iterable, Iterator, Union
+import io
+import itertools
+import multiprocessing
+import os
 import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from dataclasses import dataclass
 
+import numpy as np
+
+from app.core.config import settings
+
+# Compact spans of one page: (texts, font names, float64 [font_size, x0, y0, x1, y1] rows)
+PageSpans = Tuple[List[str], List[str], np.ndarray]
+
+# Image blocks are skipped anyway, so don't have MuPDF decode them
+TEXT_FLAGS = fitz.TEXTFLAGS_DICT & ~fitz.TEXT_PRESERVE_IMAGES
+
+
+def _extract_page_spans(page) -> PageSpans:
+    """Collect the non-empty text spans of a page as compact arrays"""
+    texts = []
+    fonts = []
+    numbers = []
+    for block in page.get_text("dict", flags=TEXT_FLAGS)["blocks"]:
+        if block.get("type") == 0:  # Text block
+            for line in block.get("lines", []):
+                for span in line.get("spans", []):
+                    text = span.get("text", "").strip()
+                    if text:
+                        texts.append(text)
+                        fonts.append(span.get("font", ""))
+                        numbers.append(
+                            (span.get("size", 12.0), *span.get("bbox", (0, 0, 0, 0)))
+                        )
+    return texts, fonts, np.array(numbers, dtype=np.float64).reshape(-1, 5)
+
+
+def _extract_page_range(file_path: str, start: int, stop: int) -> List[PageSpans]:
+    """Worker task: open the document and extract pages [start, stop)"""
+    doc = fitz.open(file_path)
+    try:
+        return [_extract_page_spans(doc[index]) for index in range(start, stop)]
+    finally:
+        doc.close()
+
 
 @dataclass
 class PDFTextBlock:
@@ -21,6 +66,190 @@ class PDFTextBlock:
     bbox: Tuple[float, float, float, float]  # (x0, y0, x1, y1)
 
 
+class PDFBlockStore:
+    """
+    Columnar storage for the text blocks of a PDF.
+
+    Per-block values live in NumPy arrays, font names in an interned table
+    and the texts in one string buffer with offsets, instead of one
+    PDFTextBlock object per span. Indexing or iterating the store yields
+    PDFTextBlockView objects with the same attributes as PDFTextBlock.
+    """
+
+    def __init__(
+        self,
+        texts: List[str],
+        font_names: List[str],
+        numbers: np.ndarray,
+        page_numbers: np.ndarray,
+        is_bold: Optional[np.ndarray] = None,
+        position_top: Optional[np.ndarray] = None,
+    ):
+        """
+        Build the store from per-block columns.
+
+        Args:
+            texts: Block texts
+            font_names: Font name of each block
+            numbers: float64 [font_size, x0, y0, x1, y1] row of each block
+            page_numbers: Page number of each block
+            is_bold: Bold flag of each block (default: from the font name)
+            position_top: Top position of each block (default: bbox y0)
+        """
+        font_table: Dict[str, int] = {}
+        self.font_ids = np.fromiter(
+            (font_table.setdefault(name, len(font_table)) for name in font_names),
+            dtype=np.int32,
+            count=len(font_names),
+        )
+        self.font_names = list(font_table)
+
+        self.text = "".join(texts)
+        self.offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+        np.cumsum([len(text) for text in texts], out=self.offsets[1:])
+
+        numbers = np.asarray(numbers, dtype=np.float64).reshape(-1, 5)
+        self.page_number = np.asarray(page_numbers, dtype=np.int32)
+        self.font_size = np.ascontiguousarray(numbers[:, 0])
+        self.bbox = np.ascontiguousarray(numbers[:, 1:])
+        if position_top is None:
+            position_top = self.bbox[:, 1]
+        self.position_top = np.array(position_top, dtype=np.float64)
+        if is_bold is None:
+            bold_fonts = np.array(
+                ["bold" in name.lower() for name in self.font_names], dtype=bool
+            )
+            is_bold = bold_fonts[self.font_ids]
+        self.is_bold = np.asarray(is_bold, dtype=bool)
+
+    @classmethod
+    def from_page_spans(cls, page_number: int, spans: PageSpans) -> "PDFBlockStore":
+        """Build the store of one page from its compact spans"""
+        texts, fonts, numbers = spans
+        return cls(
+            texts, fonts, numbers, np.full(len(texts), page_number, dtype=np.int32)
+        )
+
+    @classmethod
+    def from_pages(cls, pages: Iterable[Tuple[int, PageSpans]]) -> "PDFBlockStore":
+        """Build one store from (page_number, spans) pairs"""
+        texts = []
+        fonts = []
+        numbers = []
+        page_numbers = []
+        for page_number, (page_texts, page_fonts, page_values) in pages:
+            texts.extend(page_texts)
+            fonts.extend(page_fonts)
+            numbers.append(page_values)
+            page_numbers.append(np.full(len(page_texts), page_number, dtype=np.int32))
+        return cls(
+            texts,
+            fonts,
+            np.concatenate(numbers) if numbers else np.empty((0, 5)),
+            np.concatenate(page_numbers) if page_numbers else np.empty(0),
+        )
+
+    @classmethod
+    def from_blocks(cls, blocks: Iterable) -> "PDFBlockStore":
+        """Build the store from PDFTextBlock (or view) objects"""
+        blocks = list(blocks)
+        return cls(
+            [block.text for block in blocks],
+            [block.font_name for block in blocks],
+            [(block.font_size, *block.bbox) for block in blocks],
+            [block.page_number for block in blocks],
+            is_bold=[block.is_bold for block in blocks],
+            position_top=[block.position_top for block in blocks],
+        )
+
+    def __len__(self) -> int:
+        return len(self.font_size)
+
+    def __getitem__(self, index: int) -> "PDFTextBlockView":
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("block index out of range")
+        return PDFTextBlockView(self, index)
+
+    def __iter__(self) -> Iterator["PDFTextBlockView"]:
+        for index in range(len(self)):
+            yield PDFTextBlockView(self, index)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, PDFBlockStore):
+            return NotImplemented
+        columns = ("page_number", "position_top", "font_size", "is_bold", "bbox")
+        return (
+            self.texts() == other.texts()
+            and self.block_font_names() == other.block_font_names()
+            and all(
+                np.array_equal(getattr(self, name), getattr(other, name))
+                for name in columns
+            )
+        )
+
+    __hash__ = None
+
+    def text_at(self, index: int) -> str:
+        """Text of one block"""
+        return self.text[self.offsets[index] : self.offsets[index + 1]]
+
+    def block_font_names(self) -> List[str]:
+        """Font name of every block"""
+        return [self.font_names[font_id] for font_id in self.font_ids.tolist()]
+
+    def texts(self, start: int = 0, stop: Optional[int] = None) -> List[str]:
+        """Texts of the blocks in [start, stop)"""
+        bounds = self.offsets[start : (len(self) if stop is None else stop) + 1]
+        bounds = bounds.tolist()
+        return [self.text[a:b] for a, b in zip(bounds, bounds[1:])]
+
+
+class PDFTextBlockView:
+    """Read-only PDFTextBlock-like view of one block in a PDFBlockStore"""
+
+    __slots__ = ("_store", "_index")
+
+    def __init__(self, store: PDFBlockStore, index: int):
+        self._store = store
+        self._index = index
+
+    @property
+    def text(self) -> str:
+        return self._store.text_at(self._index)
+
+    @property
+    def page_number(self) -> int:
+        return int(self._store.page_number[self._index])
+
+    @property
+    def position_top(self) -> float:
+        return float(self._store.position_top[self._index])
+
+    @property
+    def font_size(self) -> float:
+        return float(self._store.font_size[self._index])
+
+    @property
+    def font_name(self) -> str:
+        return self._store.font_names[self._store.font_ids[self._index]]
+
+    @property
+    def is_bold(self) -> bool:
+        return bool(self._store.is_bold[self._index])
+
+    @property
+    def bbox(self) -> Tuple[float, float, float, float]:
+        return tuple(self._store.bbox[self._index].tolist())
+
+    def __repr__(self) -> str:
+        return (
+            f"PDFTextBlockView(text={self.text!r}, page_number={self.page_number}, "
+            f"font_size={self.font_size}, font_name={self.font_name!r})"
+        )
+
+
 @dataclass
 class PDFSection:
     """Represents a section identified in PDF"""
@@ -40,120 +269,348 @@ class PDFSection:
 class PDFService:
     """Service for processing PDF files"""
 
-    # Common heading patterns
-    HEADING_PATTERNS = [
-        r"^\d+\.\s+",  # 1. Introduction
-        r"^\d+\.\d+\s+",  # 1.1 Background
-        r"^\d+\.\d+\.\d+\s+",  # 1.1.1 Details
-        r"^[A-Z][A-Z\s]+$",  # ALL CAPS HEADINGS
-        r"^Chapter\s+\d+",  # Chapter 1
-        r"^Section\s+\d+",  # Section 1
-        r"^Part\s+[IVX]+",  # Part I, Part II
-        r"^[IVX]+\.\s+",  # I. Introduction, II. Background
-        r"^[A-Z]\.\s+",  # A. First Section
-    ]
+    # Version of the extraction and segmentation output; bump it whenever a
+    # change alters the sections produced, so cached structures are rebuilt
+    EXTRACTOR_VERSION = "1"
+
+    # Common heading patterns, as one regex matched at the start of a block.
+    # The numbered alternatives come first; their group names give the level.
+    HEADING_REGEX = re.compile(
+        r"""
+        (?P<level3>\d+\.\d+\.\d+\s+)    # 1.1.1 Details
+        | (?P<level2>\d+\.\d+\s+)       # 1.1 Background
+        | (?P<level1>\d+\.\s+)          # 1. Introduction
+        | [A-Z][A-Z\s]+$                # ALL CAPS HEADINGS
+        | Chapter\s+\d+                 # Chapter 1
+        | Section\s+\d+                 # Section 1
+        | Part\s+[IVX]+                 # Part I, Part II
+        | [IVX]+\.\s+                   # I. Introduction, II. Background
+        | [A-Z]\.\s+                    # A. First Section
+        """,
+        re.VERBOSE,
+    )
+    NUMBERED_LEVELS = {"level1": 1, "level2": 2, "level3": 3}
+
+    # Pages per parallel extraction task; with a few tasks in flight per
+    # process this bounds how far extraction runs ahead of the consumer
+    PARALLEL_PAGES_PER_TASK = 16
+
+    @staticmethod
+    def get_metadata(doc) -> Dict:
+        """
+        Read document metadata.
+
+        Args:
+            doc: Open PyMuPDF document
+
+        Returns:
+            Metadata dict, including total_pages
+        """
+        return {
+            "title": doc.metadata.get("title", ""),
+            "author": doc.metadata.get("author", ""),
+            "subject": doc.metadata.get("subject", ""),
+            "creator": doc.metadata.get("creator", ""),
+            "producer": doc.metadata.get("producer", ""),
+            "creation_date": doc.metadata.get("creationDate", ""),
+            "modification_date": doc.metadata.get("modDate", ""),
+            "total_pages": len(doc),
+        }
+
+    @staticmethod
+    def iter_pages(
+        file_path: str, parallel: Optional[bool] = None
+    ) -> Iterator[PDFBlockStore]:
+        """
+        Yield the text blocks of a PDF one page at a time.
+
+        Only the current page (plus the pages already extracted by a
+        parallel pool) is held in memory. Pages without text yield an
+        empty store, so the n-th item is always page n.
+
+        Args:
+            file_path: Path to PDF file
+            parallel: Split the pages across a process pool (default: when
+                the document has at least PDF_PARALLEL_MIN_PAGES pages).
+                The output is identical to the serial path.
+
+        Yields:
+            Block store of each page, in page order
+        """
+        for page_num, spans in enumerate(
+            PDFService._iter_page_spans(file_path, parallel), start=1
+        ):
+            yield PDFBlockStore.from_page_spans(page_num, spans)
+
+    @staticmethod
+    def iter_blocks(
+        file_path: str, parallel: Optional[bool] = None
+    ) -> Iterator[PDFTextBlockView]:
+        """
+        Yield the text blocks of a PDF in reading order, page by page.
+
+        Args:
+            file_path: Path to PDF file
+            parallel: See iter_pages
+
+        Yields:
+            Text block views
+        """
+        for page_blocks in PDFService.iter_pages(file_path, parallel):
+            yield from page_blocks
+
+    @staticmethod
+    def extract_full_text(
+        file_path: str, parallel: Optional[bool] = None
+    ) -> Tuple[str, Dict, float]:
+        """
+        Extract the text of a PDF without keeping its text blocks.
+
+        Streams the pages, so memory is bounded by one page plus the text
+        (and one float per block for the font sizes). The average font size
+        is what identify_sections needs to classify a page stream (see
+        identify_sections).
+
+        Args:
+            file_path: Path to PDF file
+            parallel: See iter_pages
+
+        Returns:
+            Tuple of (full_text, metadata, average font size of all blocks)
+        """
+        try:
+            doc = fitz.open(file_path)
+            metadata = PDFService.get_metadata(doc)
+            doc.close()
+
+            buffer = io.StringIO()
+            font_sizes = []
+            for texts, _, numbers in PDFService._iter_page_spans(file_path, parallel):
+                for text in texts:
+                    buffer.write(text)
+                    buffer.write(" ")
+                font_sizes.append(numbers[:, 0])
+
+                # Add page break
+                buffer.write("\n\n")
+
+            avg_font_size = PDFService._average_font_size(font_sizes)
+            return buffer.getvalue().strip(), metadata, avg_font_size
+
+        except Exception as e:
+            raise Exception(f"Failed to extract text from PDF: {str(e)}")
 
     @staticmethod
-    def extract_text_from_pdf(file_path: str) -> Tuple[str, List[PDFTextBlock], Dict]:
+    def extract_structure(
+        file_path: str, parallel: Optional[bool] = None
+    ) -> Tuple[str, Dict, List[PDFSection]]:
+        """
+        Extract the text, metadata and sections of a PDF in two streaming passes.
+
+        Headings are classified against the document's average font size,
+        which is only known once every page has been read. The first pass
+        (extract_full_text) keeps just the text and one font size per block;
+        the second streams the pages again through identify_sections. Pages
+        are parsed twice, but memory stays bounded by a page (plus the text
+        and sections) instead of growing with every page's spans.
+
+        Args:
+            file_path: Path to PDF file
+            parallel: See iter_pages
+
+        Returns:
+            Tuple of (full_text, metadata, sections)
+        """
+        full_text, metadata, avg_font_size = PDFService.extract_full_text(
+            file_path, parallel
+        )
+
+        try:
+            pages = PDFService.iter_pages(file_path, parallel)
+            sections = PDFService.identify_sections(pages, avg_font_size)
+        except Exception as e:
+            raise Exception(f"Failed to extract structure from PDF: {str(e)}")
+
+        return full_text, metadata, sections
+
+    @staticmethod
+    def extract_text_from_pdf(
+        file_path: str, parallel: Optional[bool] = None
+    ) -> Tuple[str, PDFBlockStore, Dict]:
         """
         Extract text and structure from PDF file.
 
+        Loads every text block (into one columnar store); use iter_pages or
+        extract_full_text to stream large documents instead.
+
         Args:
             file_path: Path to PDF file
+            parallel: See iter_pages
 
         Returns:
             Tuple of (full_text, text_blocks, metadata)
         """
         try:
             doc = fitz.open(file_path)
-            full_text = ""
-            text_blocks = []
-
-            # Extract metadata
-            metadata = {
-                "title": doc.metadata.get("title", ""),
-                "author": doc.metadata.get("author", ""),
-                "subject": doc.metadata.get("subject", ""),
-                "creator": doc.metadata.get("creator", ""),
-                "producer": doc.metadata.get("producer", ""),
-                "creation_date": doc.metadata.get("creationDate", ""),
-                "modification_date": doc.metadata.get("modDate", ""),
-                "total_pages": len(doc),
-            }
-
-            # Extract text blocks from each page
-            for page_num, page in enumerate(doc, start=1):
-                # Get text with formatting information
-                blocks = page.get_text("dict")["blocks"]
-
-                for block in blocks:
-                    if block.get("type") == 0:  # Text block
-                        for line in block.get("lines", []):
-                            for span in line.get("spans", []):
-                                text = span.get("text", "").strip()
-                                if text:
-                                    # Extract formatting information
-                                    font_size = span.get("size", 12.0)
-                                    font_name = span.get("font", "")
-                                    is_bold = "bold" in font_name.lower()
-                                    bbox = span.get("bbox", (0, 0, 0, 0))
-
-                                    text_block = PDFTextBlock(
-                                        text=text,
-                                        page_number=page_num,
-                                        position_top=bbox[1],
-                                        font_size=font_size,
-                                        font_name=font_name,
-                                        is_bold=is_bold,
-                                        bbox=bbox,
-                                    )
-                                    text_blocks.append(text_block)
-                                    full_text += text + " "
+            metadata = PDFService.get_metadata(doc)
+            doc.close()
+
+            text_parts = []
+            pages = []
+            for page_num, spans in enumerate(
+                PDFService._iter_page_spans(file_path, parallel), start=1
+            ):
+                for text in spans[0]:
+                    text_parts.append(text)
+                    text_parts.append(" ")
+                pages.append((page_num, spans))
 
                 # Add page break
-                full_text += "\n\n"
+                text_parts.append("\n\n")
 
-            doc.close()
-            return full_text.strip(), text_blocks, metadata
+            text_blocks = PDFBlockStore.from_pages(pages)
+            return "".join(text_parts).strip(), text_blocks, metadata
 
         except Exception as e:
             raise Exception(f"Failed to extract text from PDF: {str(e)}")
 
     @staticmethod
-    def identify_sections(text_blocks: List[PDFTextBlock]) -> List[PDFSection]:
+    def _iter_page_spans(
+        file_path: str, parallel: Optional[bool] = None
+    ) -> Iterator[PageSpans]:
+        """
+        Yield the compact spans of every page, serially or from the pool.
+
+        If the pool cannot start or breaks, the remaining pages are
+        extracted serially.
+        """
+        doc = fitz.open(file_path)
+        try:
+            page_count = len(doc)
+            processes = PDFService._extract_processes(page_count, parallel)
+            extracted = 0
+            if processes > 1:
+                try:
+                    for spans in PDFService._iter_pages_parallel(
+                        file_path, page_count, processes
+                    ):
+                        yield spans
+                        extracted += 1
+                    return
+                except (AssertionError, OSError, BrokenProcessPool) as e:
+                    print(
+                        f"Parallel PDF extraction failed ({e!r}), "
+                        f"extracting from page {extracted + 1} serially"
+                    )
+
+            for index in range(extracted, page_count):
+                yield _extract_page_spans(doc[index])
+        finally:
+            doc.close()
+
+    @staticmethod
+    def _extract_processes(page_count: int, parallel: Optional[bool]) -> int:
+        """
+        Number of extraction processes for a document (1 = serial).
+
+        Always 1 in a daemonic process (e.g. a Celery prefork pool child),
+        which is not allowed to start a process pool.
+        """
+        if parallel is None:
+            parallel = page_count >= settings.PDF_PARALLEL_MIN_PAGES
+        if not parallel or multiprocessing.current_process().daemon:
+            return 1
+        processes = settings.PDF_EXTRACT_PROCESSES or os.cpu_count() or 1
+        return max(1, min(processes, page_count))
+
+    @staticmethod
+    def _iter_pages_parallel(
+        file_path: str, page_count: int, processes: int
+    ) -> Iterator[PageSpans]:
+        """
+        Extract pages across a process pool, yielding them in page order.
+
+        Pages are split into contiguous ranges (a few per process, so uneven
+        pages balance out, and at most PARALLEL_PAGES_PER_TASK pages each);
+        each worker opens the document on its own. Only two ranges per
+        process are in flight, so a slow consumer throttles extraction.
+        """
+        range_count = max(
+            processes * 4, -(-page_count // PDFService.PARALLEL_PAGES_PER_TASK)
+        )
+        range_count = min(page_count, range_count)
+        bounds = np.linspace(0, page_count, range_count + 1).astype(int).tolist()
+        ranges = [
+            (start, stop) for start, stop in zip(bounds, bounds[1:]) if stop > start
+        ]
+
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            pending = deque()
+            for start, stop in ranges:
+                pending.append(
+                    executor.submit(_extract_page_range, file_path, start, stop)
+                )
+                if len(pending) >= processes * 2:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+
+    @staticmethod
+    def identify_sections(
+        text_blocks: Union[PDFBlockStore, Iterable],
+        avg_font_size: Optional[float] = None,
+    ) -> List[PDFSection]:
         """
         Identify sections in PDF based on text formatting and patterns.
 
+        Headings are found relative to the document's average font size,
+        with the font checks run over whole pages of blocks at once. When
+        the average is given (see extract_full_text), pages are consumed one
+        at a time, so they can be streamed from iter_pages; otherwise they
+        are loaded to compute it first.
+
         Args:
-            text_blocks: List of text blocks extracted from PDF
+            text_blocks: A PDFBlockStore, an iterable of per-page stores
+                (iter_pages) or an iterable of text blocks, in reading order
+            avg_font_size: Average font size of all the blocks
 
         Returns:
             List of identified sections with hierarchy
         """
-        if not text_blocks:
-            return []
+        pages = PDFService._iter_block_pages(text_blocks)
+        if avg_font_size is None:
+            pages = list(pages)
+            if not any(len(page) for page in pages):
+                return []
 
-        # Calculate average font size for comparison
-        avg_font_size = sum(block.font_size for block in text_blocks) / len(text_blocks)
+            # Calculate average font size for comparison
+            avg_font_size = PDFService._average_font_size(
+                [page.font_size for page in pages]
+            )
 
         sections = []
         current_section = None
         current_content = []
 
-        for i, block in enumerate(text_blocks):
-            is_heading = PDFService._is_heading(block, avg_font_size)
+        for page in pages:
+            texts = page.texts()
+            heading_rows, levels = PDFService._classify_headings(
+                page, texts, avg_font_size
+            )
 
-            if is_heading:
-                # Save previous section if exists
+            start = 0
+            for row, level in zip(heading_rows, levels):
+                # Blocks since the previous heading belong to the current section
                 if current_section:
+                    current_content.extend(texts[start:row])
                     current_section.content = " ".join(current_content).strip()
                     current_section.word_count = len(current_section.content.split())
                     sections.append(current_section)
 
                 # Start new section
-                level = PDFService._determine_heading_level(block, avg_font_size)
+                block = page[row]
                 current_section = PDFSection(
-                    title=block.text,
+                    title=texts[row],
                     level=level,
                     content="",
                     page_number=block.page_number,
@@ -165,10 +622,11 @@ class PDFService:
                     children=[],
                 )
                 current_content = []
-            else:
-                # Add to current section content
-                if current_section:
-                    current_content.append(block.text)
+                start = row + 1
+
+            # Add the rest of the page to current section content
+            if current_section:
+                current_content.extend(texts[start:])
 
         # Save last section
         if current_section:
@@ -182,68 +640,94 @@ class PDFService:
         return hierarchical_sections
 
     @staticmethod
-    def _is_heading(block: PDFTextBlock, avg_font_size: float) -> bool:
-        """
-        Determine if a text block is a heading.
-
-        Args:
-            block: Text block to check
-            avg_font_size: Average font size in document
-
-        Returns:
-            True if block is likely a heading
-        """
-        # Check font size (headings are usually larger)
-        if block.font_size > avg_font_size * 1.2:
-            return True
-
-        # Check if bold
-        if block.is_bold and block.font_size >= avg_font_size:
-            return True
-
-        # Check heading patterns
-        for pattern in PDFService.HEADING_PATTERNS:
-            if re.match(pattern, block.text):
-                return True
-
-        # Check if all caps and short (likely a heading)
-        if block.text.isupper() and len(block.text.split()) <= 10:
-            return True
+    def _iter_block_pages(
+        text_blocks: Union[PDFBlockStore, Iterable],
+    ) -> Iterator[PDFBlockStore]:
+        """Normalize identify_sections input to a stream of block stores"""
+        if isinstance(text_blocks, PDFBlockStore):
+            yield text_blocks
+            return
+
+        items = iter(text_blocks)
+        first = next(items, None)
+        if first is None:
+            return
+        items = itertools.chain([first], items)
+        if isinstance(first, PDFBlockStore):
+            yield from items
+        else:
+            # Loose blocks (e.g. PDFTextBlock objects): one store per page
+            for _, page_blocks in itertools.groupby(
+                items, key=lambda block: block.page_number
+            ):
+                yield PDFBlockStore.from_blocks(page_blocks)
 
-        return False
+    @staticmethod
+    def _average_font_size(font_sizes: List[np.ndarray]) -> float:
+        """Average of per-page font size arrays (0.0 without blocks)"""
+        sizes = np.concatenate(font_sizes) if font_sizes else np.empty(0)
+        return float(sizes.mean()) if len(sizes) else 0.0
 
     @staticmethod
-    def _determine_heading_level(block: PDFTextBlock, avg_font_size: float) -> int:
+    def _classify_headings(
+        page: PDFBlockStore, texts: List[str], avg_font_size: float
+    ) -> Tuple[List[int], List[int]]:
         """
-        Determine the heading level (1-6) based on formatting.
+        Find the headings of a page and their levels (1-6).
+
+        The font checks and size-ratio levels are computed for the whole page
+        at once; each text is then matched once against HEADING_REGEX, which
+        both flags pattern headings and gives numbered headings their level.
 
         Args:
-            block: Text block
+            page: Blocks of the page
+            texts: Texts of the blocks
             avg_font_size: Average font size in document
 
         Returns:
-            Heading level (1-6)
+            Tuple of (heading row indexes, heading levels)
         """
-        # Check for numbered sections
-        if re.match(r"^\d+\.\d+\.\d+\s+", block.text):
-            return 3
-        elif re.match(r"^\d+\.\d+\s+", block.text):
-            return 2
-        elif re.match(r"^\d+\.\s+", block.text):
-            return 1
-
-        # Check font size relative to average
-        size_ratio = block.font_size / avg_font_size
-        if size_ratio >= 1.8:
-            return 1
-        elif size_ratio >= 1.5:
-            return 2
-        elif size_ratio >= 1.3:
-            return 3
-        elif size_ratio >= 1.1:
-            return 4
+        font_size = page.font_size
+
+        if avg_font_size > 0:
+            # Check font size (headings are usually larger), or bold and not smaller
+            is_heading = (font_size > avg_font_size * 1.2) | (
+                page.is_bold & (font_size >= avg_font_size)
+            )
+
+            # Level from font size relative to average
+            size_ratio = font_size / avg_font_size
+            levels = np.select(
+                [
+                    size_ratio >= 1.8,
+                    size_ratio >= 1.5,
+                    size_ratio >= 1.3,
+                    size_ratio >= 1.1,
+                ],
+                [1, 2, 3, 4],
+                default=5,
+            )
         else:
-            return 5
+            # No font sizes to compare against: only the text patterns apply
+            is_heading = np.zeros(len(texts), dtype=bool)
+            levels = np.full(len(texts), 5)
+
+        match_heading = PDFService.HEADING_REGEX.match
+        numbered_levels = PDFService.NUMBERED_LEVELS
+        for row, text in enumerate(texts):
+            match = match_heading(text)
+            if match:
+                is_heading[row] = True
+                # Numbered sections take their level from the numbering
+                if match.lastgroup:
+                    levels[row] = numbered_levels[match.lastgroup]
+
+            # Check if all caps and short (likely a heading)
+            elif not is_heading[row] and text.isupper() and len(text.split()) <= 10:
+                is_heading[row] = True
+
+        rows = np.flatnonzero(is_heading)
+        return rows.tolist(), levels[rows].tolist()
 
     @staticmethod
     def _build_hierarchy(sections: List[PDFSection]) -> List[PDFSection]:
@@ -0,0 +1,183 @@
+"""
+Fan-out of upload progress events to streaming clients
+
+Processing tasks publish upload job and note events to one Redis pub/sub
+channel per user (see app.services.progress_service). Each API process
+holds a single pub/sub connection for all of its clients: a user's channel
+is subscribed when their first stream opens and unsubscribed when their
+last one closes, and one reader task copies every message to the queues of
+that user's open streams. A client that stops reading only loses its own
+oldest events; it never blocks the reader or other clients.
+"""
+
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional, Set
+
+from app.core.config import settings
+from app.services.progress_service import EVENTS_CHANNEL_PREFIX, events_channel
+
+
+class ProgressHub:
+    """Multiplexes per-user Redis event channels over one connection"""
+
+    def __init__(self, redis_url: Optional[str] = None, queue_size: int = 100):
+        """
+        Create a hub (the connection is opened on first subscribe).
+
+        Args:
+            redis_url: Redis URL (default REDIS_URL)
+            queue_size: Events buffered per stream before the oldest is dropped
+        """
+        self.redis_url = redis_url or settings.REDIS_URL
+        self.queue_size = queue_size
+        self._client = None
+        self._pubsub = None
+        self._reader: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+        self._streams: Dict[int, Set[asyncio.Queue]] = {}
+        self._dropped = 0
+
+    async def start(self):
+        """
+        Connect to Redis and start the reader task, if not done yet.
+
+        Raises:
+            Exception: If Redis is unavailable
+        """
+        async with self._lock:
+            await self._connect()
+
+    async def _connect(self):
+        """Body of start(); the caller holds the lock"""
+        if self._pubsub is not None:
+            return
+        import redis.asyncio as aioredis
+
+        client = aioredis.Redis.from_url(self.redis_url)
+        try:
+            await client.ping()
+        except Exception:
+            await client.aclose()
+            raise
+        self._client = client
+        self._pubsub = client.pubsub(ignore_subscribe_messages=True)
+        self._reader = asyncio.create_task(self._read())
+
+    @asynccontextmanager
+    async def subscribe(self, user_id: int) -> AsyncIterator[asyncio.Queue]:
+        """
+        Receive a user's events while the context is open.
+
+        Args:
+            user_id: User whose events to receive
+
+        Yields:
+            Queue of events, each a dict with "type" and "data"
+
+        Raises:
+            Exception: If Redis is unavailable
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        async with self._lock:
+            await self._connect()
+            streams = self._streams.setdefault(user_id, set())
+            if not streams:
+                try:
+                    await self._pubsub.subscribe(events_channel(user_id))
+                except Exception:
+                    del self._streams[user_id]
+                    raise
+            streams.add(queue)
+        try:
+            yield queue
+        finally:
+            async with self._lock:
+                streams = self._streams.get(user_id, set())
+                streams.discard(queue)
+                if not streams:
+                    self._streams.pop(user_id, None)
+                    try:
+                        await self._pubsub.unsubscribe(events_channel(user_id))
+                    except Exception as e:
+                        print(f"Failed to unsubscribe upload events of {user_id}: {e}")
+
+    async def _read(self):
+        """Copy messages from Redis to the queues of the channel's streams"""
+        while True:
+            if not self._pubsub.subscribed:
+                await asyncio.sleep(0.1)
+                continue
+            try:
+                message = await self._pubsub.get_message(timeout=1.0)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # The pub/sub connection resubscribes when it reconnects
+                print(f"Upload event channel error: {e}")
+                await asyncio.sleep(1.0)
+                continue
+            if message is None or message["type"] != "message":
+                continue
+
+            channel = message["channel"]
+            if isinstance(channel, bytes):
+                channel = channel.decode()
+            try:
+                user_id = int(channel[len(EVENTS_CHANNEL_PREFIX) :])
+                event = json.loads(message["data"])
+            except ValueError:
+                continue
+            self._dispatch(user_id, event)
+
+    def _dispatch(self, user_id: int, event: Dict[str, Any]):
+        for queue in self._streams.get(user_id, ()):
+            if queue.full():
+                # Slow client: drop its oldest event rather than block
+                queue.get_nowait()
+                self._dropped += 1
+            queue.put_nowait(event)
+
+    def get_stats(self) -> Dict[str, int]:
+        """Number of subscribed users, open streams and dropped events"""
+        return {
+            "users": len(self._streams),
+            "streams": sum(len(streams) for streams in self._streams.values()),
+            "dropped_events": self._dropped,
+        }
+
+    async def close(self):
+        """Stop the reader task and close the Redis connection"""
+        if self._reader is not None:
+            self._reader.cancel()
+            try:
+                await self._reader
+            except asyncio.CancelledError:
+                pass
+            self._reader = None
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+            await self._client.aclose()
+            self._pubsub = None
+            self._client = None
+        self._streams.clear()
+
+
+_hub: Optional[ProgressHub] = None
+
+
+def get_progress_hub() -> ProgressHub:
+    """Get the process-wide progress hub"""
+    global _hub
+    if _hub is None:
+        _hub = ProgressHub(queue_size=settings.PROGRESS_STREAM_QUEUE_SIZE)
+    return _hub
+
+
+async def close_progress_hub():
+    """Close the progress hub if it was started (on application shutdown)"""
+    global _hub
+    if _hub is not None:
+        await _hub.close()
+        _hub = None
@@ -0,0 +1,255 @@
+"""
+Upload job progress reporting
+
+Processing tasks report progress through a ProgressReporter. Intermediate
+progress is published to a Redis key per upload job, at most once per
+PROGRESS_PUBLISH_INTERVAL_SECONDS, and the upload status endpoint reads it
+from there. The UploadJob row is only written when the job changes state
+(processing, completed, failed). Every state change is published as well,
+so Redis never lags behind the database. If Redis is unavailable, progress
+falls back to being committed to the UploadJob row.
+
+Each publish is also sent as an event on a per-user pub/sub channel, along
+with note status changes, so connected clients are pushed updates instead
+of polling (see app.services.progress_hub).
+"""
+
+import json
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.note import Note
+from app.models.upload_job import UploadJob
+
+PROGRESS_KEY_PREFIX = "upload:progress:"
+EVENTS_CHANNEL_PREFIX = "upload:events:"
+
+# Progress entries outlive any polling client; the row stays authoritative
+PROGRESS_TTL_SECONDS = 24 * 3600
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def _redis_client():
+    """Get the shared Redis client (created on first use)"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                import redis
+
+                _client = redis.Redis.from_url(settings.REDIS_URL)
+    return _client
+
+
+def _progress_key(upload_job_id: int) -> str:
+    return f"{PROGRESS_KEY_PREFIX}{upload_job_id}"
+
+
+def events_channel(user_id: int) -> str:
+    """Pub/sub channel carrying a user's upload and note events"""
+    return f"{EVENTS_CHANNEL_PREFIX}{user_id}"
+
+
+def _event(event_type: str, data: Dict[str, Any]) -> str:
+    return json.dumps({"type": event_type, "data": data})
+
+
+def _serialize_time(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+def upload_job_event_data(
+    upload_job: UploadJob, message: Optional[str] = None
+) -> Dict[str, Any]:
+    """Fields of an upload job published to Redis and sent in "upload_job" events"""
+    return {
+        "id": upload_job.id,
+        "user_id": upload_job.user_id,
+        "filename": upload_job.filename,
+        "file_type": upload_job.file_type,
+        "status": upload_job.status,
+        "progress": upload_job.progress,
+        "message": message,
+        "error_message": upload_job.error_message,
+        "created_at": _serialize_time(upload_job.created_at),
+        "completed_at": _serialize_time(upload_job.completed_at),
+    }
+
+
+def publish_progress(upload_job: UploadJob, message: Optional[str] = None) -> bool:
+    """
+    Publish the current state of an upload job to Redis and to its user's
+    event channel.
+
+    Args:
+        upload_job: Upload job to publish
+        message: Optional description of the current step
+
+    Returns:
+        True if published, False if Redis is unavailable
+    """
+    payload = upload_job_event_data(upload_job, message)
+    try:
+        pipe = _redis_client().pipeline(transaction=False)
+        pipe.set(
+            _progress_key(upload_job.id), json.dumps(payload), ex=PROGRESS_TTL_SECONDS
+        )
+        pipe.publish(events_channel(upload_job.user_id), _event("upload_job", payload))
+        pipe.execute()
+        return True
+    except Exception as e:
+        print(f"Progress channel unavailable for upload job {upload_job.id}: {e}")
+        return False
+
+
+def note_event_data(note: Note) -> Dict[str, Any]:
+    """Fields of a note sent in "note" events"""
+    return {
+        "id": note.id,
+        "report_id": note.report_id,
+        "filename": note.filename,
+        "status": note.status,
+        "processing_error": note.processing_error,
+    }
+
+
+def publish_note_status(note: Note) -> bool:
+    """
+    Publish a note's status to its user's event channel.
+
+    Args:
+        note: Note whose status changed (after the change is committed)
+
+    Returns:
+        True if published, False if Redis is unavailable
+    """
+    try:
+        _redis_client().publish(
+            events_channel(note.user_id), _event("note", note_event_data(note))
+        )
+        return True
+    except Exception as e:
+        print(f"Progress channel unavailable for note {note.id}: {e}")
+        return False
+
+
+def read_progress(upload_job_id: int) -> Optional[Dict[str, Any]]:
+    """
+    Read the latest published state of an upload job.
+
+    Args:
+        upload_job_id: Upload job ID
+
+    Returns:
+        Published state, or None if nothing was published or Redis is down
+    """
+    try:
+        value = _redis_client().get(_progress_key(upload_job_id))
+    except Exception:
+        return None
+    return json.loads(value) if value else None
+
+
+def clear_progress(upload_job_id: int):
+    """Remove the published state of an upload job (e.g. when it is deleted)"""
+    try:
+        _redis_client().delete(_progress_key(upload_job_id))
+    except Exception:
+        pass
+
+
+class ProgressReporter:
+    """Reports an upload job's progress while a task processes it"""
+
+    def __init__(
+        self,
+        db: Session,
+        upload_job: UploadJob,
+        min_interval: Optional[float] = None,
+    ):
+        """
+        Create a reporter for one upload job.
+
+        Args:
+            db: Database session the job belongs to
+            upload_job: Upload job being processed
+            min_interval: Minimum seconds between progress publishes
+                (default PROGRESS_PUBLISH_INTERVAL_SECONDS)
+        """
+        self.db = db
+        self.upload_job = upload_job
+        self.min_interval = (
+            settings.PROGRESS_PUBLISH_INTERVAL_SECONDS
+            if min_interval is None
+            else min_interval
+        )
+        self._last_publish = 0.0
+
+    def update(self, progress: int, message: Optional[str] = None):
+        """
+        Report progress within the current state.
+
+        Publishes to Redis unless the previous publish was less than
+        min_interval ago; does not write to the database (unless Redis is
+        unavailable).
+
+        Args:
+            progress: Percentage, 0-100
+            message: Optional description of the current step
+        """
+        self.upload_job.progress = progress
+        now = time.monotonic()
+        if now - self._last_publish < self.min_interval:
+            return
+        self._last_publish = now
+        if not publish_progress(self.upload_job, message):
+            self.db.commit()
+
+    def set_status(
+        self,
+        status: str,
+        progress: Optional[int] = None,
+        error_message: Optional[str] = None,
+    ):
+        """
+        Move the job to a new state, committing it and publishing it.
+
+        The commit includes any other pending changes in the session.
+
+        Args:
+            status: New status (processing, completed, failed)
+            progress: Percentage, 0-100 (default: unchanged, 100 when
+                completed)
+            error_message: Error to record (for failed)
+        """
+        self.upload_job.status = status
+        if progress is not None:
+            self.upload_job.progress = progress
+        elif status == "completed":
+            self.upload_job.progress = 100
+        if error_message is not None:
+            self.upload_job.error_message = error_message
+        if status == "completed":
+            self.upload_job.completed_at = datetime.utcnow()
+        self.db.commit()
+
+        self._last_publish = time.monotonic()
+        publish_progress(self.upload_job)
+
+    def fail(self, error_message: str):
+        """
+        Mark the job failed after an error, discarding the task's pending
+        changes.
+
+        Args:
+            error_message: Error to record
+        """
+        self.db.rollback()
+        self.set_status("failed", error_message=error_message)
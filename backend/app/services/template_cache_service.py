@@ -0,0 +1,132 @@
+"""
+Template structure cache keyed by PDF content
+
+Extracting and segmenting a template PDF is by far the slowest part of
+template ingestion, and the same template (e.g. a university's report
+template) is uploaded for many reports. The section tree extracted from a
+PDF is therefore stored once per sha256(pdf bytes) and extractor version;
+later uploads of the same file reuse it without opening the PDF.
+"""
+
+import dataclasses
+import hashlib
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.template_structure import TemplateStructureCache
+from app.services.pdf_service import PDFSection, PDFService
+
+
+class TemplateCacheService:
+    """Service for caching extracted template structures"""
+
+    @staticmethod
+    def content_hash(content: bytes) -> str:
+        """
+        Hash PDF bytes for use as a cache key.
+
+        Args:
+            content: Raw file content
+
+        Returns:
+            SHA-256 hex digest
+        """
+        return hashlib.sha256(content).hexdigest()
+
+    @staticmethod
+    def lookup(
+        db: Session, content_hash: str
+    ) -> Optional[Tuple[str, Dict, List[PDFSection]]]:
+        """
+        Get the cached structure of a PDF and record the hit.
+
+        Args:
+            db: Database session (the hit is committed with the caller's work)
+            content_hash: SHA-256 hex digest of the PDF
+
+        Returns:
+            Tuple of (full_text, metadata, sections) or None on a miss
+        """
+        entry = (
+            db.query(TemplateStructureCache)
+            .filter(
+                TemplateStructureCache.content_hash == content_hash,
+                TemplateStructureCache.extractor_version
+                == PDFService.EXTRACTOR_VERSION,
+            )
+            .first()
+        )
+        if entry is None:
+            return None
+
+        # Incremented in SQL, so concurrent hits are not lost
+        db.execute(
+            update(TemplateStructureCache)
+            .where(TemplateStructureCache.id == entry.id)
+            .values(
+                hit_count=TemplateStructureCache.hit_count + 1,
+                last_used_at=datetime.utcnow(),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        sections = [_section_from_dict(data) for data in entry.sections]
+        return entry.full_text or "", entry.pdf_metadata or {}, sections
+
+    @staticmethod
+    def store(
+        db: Session,
+        content_hash: str,
+        full_text: str,
+        metadata: Dict,
+        sections: List[PDFSection],
+    ) -> bool:
+        """
+        Cache the structure extracted from a PDF.
+
+        Runs in a savepoint, so a concurrent worker storing the same PDF
+        first does not affect the caller's transaction.
+
+        Args:
+            db: Database session
+            content_hash: SHA-256 hex digest of the PDF
+            full_text: Extracted text
+            metadata: PDF metadata
+            sections: Identified section hierarchy
+
+        Returns:
+            True if an entry was added, False if one already existed
+        """
+        entry = TemplateStructureCache(
+            content_hash=content_hash,
+            extractor_version=PDFService.EXTRACTOR_VERSION,
+            total_pages=metadata.get("total_pages", 0),
+            full_text=full_text,
+            pdf_metadata=metadata,
+            sections=[dataclasses.asdict(section) for section in sections],
+            section_count=_count_sections(sections),
+        )
+        try:
+            with db.begin_nested():
+                db.add(entry)
+            return True
+        except IntegrityError:
+            return False
+
+
+def _section_from_dict(data: Dict) -> PDFSection:
+    """Rebuild a PDFSection tree from its dataclasses.asdict() form"""
+    children = [_section_from_dict(child) for child in data.get("children", [])]
+    return PDFSection(**{**data, "children": children})
+
+
+def _count_sections(sections: List[PDFSection]) -> int:
+    """Number of sections in a tree"""
+    return sum(1 + _count_sections(section.children) for section in sections)
+
+
+# Singleton instance
+template_cache_service = TemplateCacheService()
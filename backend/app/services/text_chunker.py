@@ -0,0 +1,172 @@
+"""
+Token-aware streaming text chunker.
+
+Chunks are packed from whole sentences up to a token budget measured with the
+embedding model's own tokenizer, so no chunk is silently truncated by the
+model's max sequence length. Sentences are tokenized once, in small batches,
+and their token offsets are reused both for counting and for cutting a true
+token overlap. Chunks are slices of the original text and are yielded lazily.
+"""
+
+import re
+from itertools import islice
+from typing import Any, Iterator, List, Optional, Tuple
+
+# Sentence boundaries: whitespace after . ! ? or a blank line
+SENTENCE_BOUNDARY_PATTERN = re.compile(r"(?<=[.!?])\s+|\n\s*\n")
+
+# Approximates WordPiece pre-tokenization when no tokenizer is available
+FALLBACK_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+# Sentences sent to the tokenizer per call
+TOKENIZE_BATCH_SIZE = 64
+
+Offsets = List[Tuple[int, int]]
+
+
+def iter_sentence_spans(text: str) -> Iterator[Tuple[int, int]]:
+    """
+    Yield (start, end) character spans of the non-empty sentences in text.
+
+    Args:
+        text: Text to split
+
+    Returns:
+        Iterator of spans with surrounding whitespace trimmed
+    """
+    position = 0
+    for match in SENTENCE_BOUNDARY_PATTERN.finditer(text):
+        yield from _trimmed_span(text, position, match.start())
+        position = match.end()
+    yield from _trimmed_span(text, position, len(text))
+
+
+def _trimmed_span(text: str, start: int, end: int) -> Iterator[Tuple[int, int]]:
+    """Yield the span without leading/trailing whitespace, if any text is left"""
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    if start < end:
+        yield start, end
+
+
+class TokenChunker:
+    """Packs sentences into chunks of at most max_tokens model tokens"""
+
+    def __init__(
+        self,
+        max_tokens: int,
+        overlap_tokens: int = 0,
+        tokenizer: Optional[Any] = None,
+    ):
+        """
+        Initialize the chunker.
+
+        Args:
+            max_tokens: Token budget per chunk (excluding special tokens)
+            overlap_tokens: Tokens repeated from the end of the previous chunk
+                (capped at half of max_tokens)
+            tokenizer: Hugging Face fast tokenizer; None counts regex tokens
+        """
+        if max_tokens <= 0:
+            raise ValueError("max_tokens must be positive")
+        self.max_tokens = max_tokens
+        # At most half the budget, so every chunk advances through the text
+        self.overlap_tokens = max(0, min(overlap_tokens, max_tokens // 2))
+        self.tokenizer = tokenizer
+
+    def _token_offsets(self, text: str, spans: List[Tuple[int, int]]) -> List[Offsets]:
+        """Token (start, end) offsets of each sentence span, absolute within text"""
+        if self.tokenizer is None:
+            return [
+                [match.span() for match in FALLBACK_TOKEN_PATTERN.finditer(text, *span)]
+                for span in spans
+            ]
+        encoded = self.tokenizer(
+            [text[start:end] for start, end in spans],
+            add_special_tokens=False,
+            return_offsets_mapping=True,
+            return_attention_mask=False,
+            return_token_type_ids=False,
+            verbose=False,
+        )
+        return [
+            [
+                (start + token_start, start + token_end)
+                for token_start, token_end in offsets
+            ]
+            for (start, _), offsets in zip(spans, encoded["offset_mapping"])
+        ]
+
+    def count_tokens(self, text: str) -> int:
+        """Number of tokens the chunker counts for a text"""
+        return len(self._token_offsets(text, [(0, len(text))])[0])
+
+    def _iter_sentence_tokens(self, text: str) -> Iterator[Offsets]:
+        """Yield each non-empty sentence's token offsets, tokenized in batches"""
+        spans = iter_sentence_spans(text)
+        while True:
+            batch = list(islice(spans, TOKENIZE_BATCH_SIZE))
+            if not batch:
+                return
+            for offsets in self._token_offsets(text, batch):
+                if offsets:
+                    yield offsets
+
+    def _overlap_start(self, tokens: Offsets) -> int:
+        """
+        Index of the first token kept as overlap, moved forward to a word
+        start so the overlap does not begin with a word-piece continuation
+        """
+        if not self.overlap_tokens:
+            return len(tokens)
+        index = max(1, len(tokens) - self.overlap_tokens)
+        while index < len(tokens) and tokens[index][0] == tokens[index - 1][1]:
+            index += 1
+        return index
+
+    def iter_chunks(self, text: str) -> Iterator[Tuple[str, int]]:
+        """
+        Lazily split text into chunks.
+
+        Args:
+            text: Text to chunk
+
+        Returns:
+            Iterator of (chunk_text, chunk_index) tuples
+        """
+        if not text or text.isspace():
+            return
+
+        chunk_index = 0
+        current: Offsets = []  # Token offsets of the chunk being built
+
+        for sentence in self._iter_sentence_tokens(text):
+            if current and len(current) + len(sentence) > self.max_tokens:
+                yield text[current[0][0] : current[-1][1]], chunk_index
+                chunk_index += 1
+
+                keep_from = self._overlap_start(current)
+                if len(sentence) <= self.max_tokens:
+                    # Shorten the overlap rather than split a sentence that fits
+                    keep_from = max(
+                        keep_from, len(current) - (self.max_tokens - len(sentence))
+                    )
+                current = current[keep_from:]
+
+            # Sentences longer than the budget are cut at token boundaries
+            position = 0
+            while len(current) + len(sentence) - position > self.max_tokens:
+                take = self.max_tokens - len(current)
+                current.extend(sentence[position : position + take])
+                position += take
+
+                yield text[current[0][0] : current[-1][1]], chunk_index
+                chunk_index += 1
+                current = current[self._overlap_start(current) :]
+
+            current.extend(sentence[position:])
+
+        if current:
+            yield text[current[0][0] : current[-1][1]], chunk_index
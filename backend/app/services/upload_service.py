@@ -75,10 +75,14 @@ class UploadService:
             upload_job.progress = 50
             db.commit()
 
-            # Trigger async PDF processing
+            # Trigger async PDF processing (the hash lets cached templates
+            # skip downloading and extraction)
             from app.worker.tasks.pdf_processing import process_template
+            from app.services.template_cache_service import template_cache_service
 
-            process_template.delay(upload_job.id)
+            process_template.delay(
+                upload_job.id, template_cache_service.content_hash(content)
+            )
 
             db.refresh(upload_job)
             return upload_job
@@ -0,0 +1,68 @@
+"""
+Pluggable vector storage backends for VectorService
+"""
+
+from typing import Optional
+
+from app.services.vector_backends.base import VectorBackend, VectorHit, VectorPoint
+
+
+def create_vector_backend(
+    collection_name: str,
+    embedding_dim: int,
+    backend: Optional[str] = None,
+    quantization: Optional[str] = None,
+) -> VectorBackend:
+    """
+    Build the configured vector backend.
+
+    Args:
+        collection_name: Qdrant collection name
+        embedding_dim: Vector dimension
+        backend: "qdrant", "local", or "auto" (Qdrant, falling back to the
+            local backend when the server is unreachable); defaults to
+            settings.VECTOR_BACKEND
+        quantization: "none", "int8", or "binary"; defaults to
+            settings.VECTOR_QUANTIZATION
+
+    Returns:
+        VectorBackend instance
+    """
+    from app.core.config import settings
+
+    backend = (backend or settings.VECTOR_BACKEND).lower()
+    quantization = quantization or settings.VECTOR_QUANTIZATION
+
+    if backend in ("qdrant", "auto"):
+        try:
+            from app.services.vector_backends.qdrant import QdrantVectorBackend
+
+            return QdrantVectorBackend(
+                url=settings.QDRANT_URL,
+                collection_name=collection_name,
+                embedding_dim=embedding_dim,
+                layout=settings.QDRANT_COLLECTION_LAYOUT,
+                quantization=quantization,
+                rescore_oversampling=settings.VECTOR_RESCORE_OVERSAMPLING,
+            )
+        except Exception as e:
+            if backend == "qdrant":
+                raise
+            print(f"Qdrant unavailable ({e}), using local vector backend")
+    elif backend != "local":
+        raise ValueError(f"Unknown vector backend: {backend}")
+
+    from app.services.vector_backends.local import LocalVectorBackend
+
+    return LocalVectorBackend(
+        directory=settings.LOCAL_VECTOR_INDEX_DIR,
+        embedding_dim=embedding_dim,
+        search_mode=settings.LOCAL_VECTOR_SEARCH_MODE,
+        ivf_min_points=settings.LOCAL_VECTOR_IVF_MIN_POINTS,
+        ivf_nprobe=settings.LOCAL_VECTOR_IVF_NPROBE,
+        quantization=quantization,
+        rescore_oversampling=settings.VECTOR_RESCORE_OVERSAMPLING,
+    )
+
+
+__all__ = ["VectorBackend", "VectorHit", "VectorPoint", "create_vector_backend"]
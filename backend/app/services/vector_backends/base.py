@@ -0,0 +1,94 @@
+"""
+Vector backend interface used by VectorService
+"""
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+
+@dataclass
+class VectorPoint:
+    """A vector with its point ID and payload"""
+
+    id: str
+    vector: np.ndarray
+    payload: Dict[str, Any]
+
+
+@dataclass
+class VectorHit:
+    """A search result: similarity score and stored payload"""
+
+    id: str
+    score: float
+    payload: Dict[str, Any]
+
+
+class VectorBackend(ABC):
+    """
+    Storage and similarity search for note embeddings.
+
+    Points are partitioned by the (user_id, report_id) in their payload, and
+    every search is scoped to one partition. Lookups and deletes accept an
+    optional user_id so tenant-partitioned backends can skip other tenants.
+    """
+
+    @abstractmethod
+    def upsert(self, points: List[VectorPoint], wait: bool = True):
+        """
+        Insert points, replacing any existing point with the same ID.
+
+        With wait=False a backend may return once the write is accepted,
+        before it is visible to searches.
+        """
+
+    @abstractmethod
+    def search(
+        self,
+        query: np.ndarray,
+        report_id: int,
+        user_id: int,
+        limit: int = 5,
+        file_type_filter: Optional[str] = None,
+    ) -> List[VectorHit]:
+        """Return the most similar points within one (user, report) partition"""
+
+    def search_batch(
+        self,
+        queries: np.ndarray,
+        report_id: int,
+        user_id: int,
+        limit: int = 5,
+        file_type_filter: Optional[str] = None,
+    ) -> List[List[VectorHit]]:
+        """
+        Search one partition with many queries sharing the same filters.
+
+        Backends override this to answer all queries in one request; the
+        default runs one search per query.
+        """
+        return [
+            self.search(query, report_id, user_id, limit, file_type_filter)
+            for query in queries
+        ]
+
+    @abstractmethod
+    def get_note_points(
+        self, note_id: int, user_id: Optional[int] = None
+    ) -> List[VectorHit]:
+        """Return every stored point of a note (payloads only, score 0)"""
+
+    @abstractmethod
+    def delete_points(self, point_ids: List[str], user_id: Optional[int] = None):
+        """Delete points by ID"""
+
+    @abstractmethod
+    def delete_note(self, note_id: int, user_id: Optional[int] = None):
+        """Delete all points belonging to a note"""
+
+    @abstractmethod
+    def delete_report(self, report_id: int, user_id: Optional[int] = None):
+        """Delete all points belonging to a report"""
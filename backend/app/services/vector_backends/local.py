@@ -0,0 +1,918 @@
+"""
+Embedded in-process vector backend.
+
+Each (user_id, report_id) partition is a directory of immutable segments:
+a float32 .npy matrix, a JSON file of point IDs and payloads and, with int8
+or binary quantization, the quantized codes. A manifest lists the segments,
+a bitmap of deleted rows and the int8 scales. Writers add a segment (or a
+new deleted-rows bitmap) and atomically replace the manifest while holding
+the partition's file lock, so an upsert costs O(batch) instead of rewriting
+the partition. Small tail segments are merged as they accumulate, and the
+partition is only rewritten when most of its rows are deleted or its int8
+scales were fitted on far fewer rows than it now holds.
+
+Several processes can share the directory (the API searches what the Celery
+worker writes): every operation first checks the manifest and loads only
+what was added since. Searches use exact dot products or an IVF (inverted
+file) index, which new rows join without retraining. With int8 or binary
+quantization, only the quantized codes are read for the first pass and the
+float32 rows of the top candidates are rescored. No server or network hop is
+needed, which suits single-node deployments and CI benchmarks.
+"""
+
+import json
+import os
+import re
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.services.vector_backends import quantization as quant
+from app.services.vector_backends.base import VectorBackend, VectorHit, VectorPoint
+from app.services.vector_math import normalize_rows, top_k_indices, top_k_indices_2d
+
+try:
+    import fcntl
+except ImportError:  # Windows: writers are only serialized within a process
+    fcntl = None
+
+PartitionKey = Tuple[int, int]  # (user_id, report_id)
+
+_PARTITION_DIR = re.compile(r"^u(\d+)_r(\d+)$")
+_DATA_FILE = re.compile(r"^(seg|dead|scales)-\d+\.")
+
+# The last two segments are merged while the older one is at most this many
+# times larger, so each row is rewritten O(log n) times
+SEGMENT_MERGE_RATIO = 2
+
+# Rewrite int8 codes once the partition holds this many times the rows its
+# scales were fitted on
+SCALES_REFIT_GROWTH = 4
+
+# Retrain IVF centroids once the partition holds this many times the rows
+# they were trained on
+IVF_RETRAIN_GROWTH = 4
+
+
+class _GrowableArray:
+    """Array with amortized O(1) appends"""
+
+    def __init__(self, dtype, width: Optional[int] = None):
+        self._row_shape = () if width is None else (width,)
+        self._data = np.empty((0,) + self._row_shape, dtype=dtype)
+        self._size = 0
+
+    def append(self, values: np.ndarray):
+        needed = self._size + len(values)
+        if needed > len(self._data):
+            capacity = max(needed, 2 * len(self._data), 64)
+            data = np.empty((capacity,) + self._row_shape, dtype=self._data.dtype)
+            data[: self._size] = self._data[: self._size]
+            self._data = data
+        self._data[self._size : needed] = values
+        self._size = needed
+
+    @property
+    def values(self) -> np.ndarray:
+        return self._data[: self._size]
+
+
+def _take(segments: List[np.ndarray], starts: np.ndarray, rows: np.ndarray):
+    """Rows of the matrix formed by stacking the segments"""
+    if len(segments) == 1:
+        return np.asarray(segments[0][rows])
+    vectors = np.empty((len(rows), segments[0].shape[1]), dtype=np.float32)
+    owner = np.searchsorted(starts, rows, side="right") - 1
+    for index in np.unique(owner):
+        mask = owner == index
+        vectors[mask] = segments[index][rows[mask] - starts[index]]
+    return vectors
+
+
+class _IVFIndex:
+    """Inverted-file index: k-means centroids plus rows grouped by centroid"""
+
+    # Rows appended since the lists were last sorted, as a share of the
+    # sorted rows, before they are sorted into the lists
+    UNSORTED_SHARE = 0.1
+
+    def __init__(
+        self,
+        segments: List[np.ndarray],
+        starts: np.ndarray,
+        n: int,
+        iterations: int = 10,
+        seed: int = 0,
+    ):
+        nlist = max(1, int(np.sqrt(n)))
+        rng = np.random.default_rng(seed)
+
+        # Train centroids on a sample (spherical k-means on unit vectors)
+        sample_size = min(n, nlist * 64)
+        sample = _take(
+            segments, starts, np.sort(rng.choice(n, sample_size, replace=False))
+        )
+        centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, sample)
+            filled = np.bincount(assignment, minlength=nlist) > 0
+            centroids[filled] = normalize_rows(sums[filled])
+
+        self.centroids = centroids
+        self.trained_rows = n
+        self.assignment = _GrowableArray(np.int32)
+        for segment in segments:
+            self.assignment.append(self._assign(segment))
+        self._sort()
+
+    def _assign(self, vectors: np.ndarray) -> np.ndarray:
+        """Nearest centroid of each vector, in blocks to bound the score matrix"""
+        assignment = np.empty(len(vectors), dtype=np.int32)
+        for start in range(0, len(vectors), 65536):
+            block = np.asarray(vectors[start : start + 65536])
+            assignment[start : start + len(block)] = np.argmax(
+                block @ self.centroids.T, axis=1
+            )
+        return assignment
+
+    def _sort(self):
+        assignment = self.assignment.values
+        self.rows = np.argsort(assignment, kind="stable")
+        self.offsets = np.searchsorted(
+            assignment[self.rows], np.arange(len(self.centroids) + 1), side="left"
+        )
+        self.sorted_rows = len(assignment)
+
+    def add(self, vectors: np.ndarray):
+        """Add rows appended to the partition to their nearest lists"""
+        self.assignment.append(self._assign(vectors))
+        unsorted = len(self.assignment.values) - self.sorted_rows
+        if unsorted > self.UNSORTED_SHARE * self.sorted_rows:
+            self._sort()
+
+    def needs_retraining(self) -> bool:
+        return len(self.assignment.values) >= IVF_RETRAIN_GROWTH * self.trained_rows
+
+    def candidates(self, query: np.ndarray, nprobe: int) -> np.ndarray:
+        """Rows in the nprobe lists whose centroids are closest to the query"""
+        probe = top_k_indices(self.centroids @ query, nprobe)
+        rows = [self.rows[self.offsets[c] : self.offsets[c + 1]] for c in probe]
+        unsorted = self.assignment.values[self.sorted_rows :]
+        if len(unsorted):
+            rows.append(self.sorted_rows + np.flatnonzero(np.isin(unsorted, probe)))
+        return np.concatenate(rows)
+
+
+class _Partition:
+    """
+    Vectors and payloads for one (user_id, report_id) pair.
+
+    Rows are numbered in the order they were written; replaced and deleted
+    rows stay in place, marked dead, until the partition is rewritten (which
+    starts a new epoch and renumbers them).
+    """
+
+    MANIFEST_FILE = "manifest.json"
+    LOCK_FILE = ".lock"
+
+    # Single-matrix layout of earlier versions, converted on open
+    LEGACY_FILES = ("vectors.npy", "points.json", "codes.npy", "scales.npy")
+
+    def __init__(
+        self,
+        directory: str,
+        embedding_dim: int,
+        quantization: str = quant.QUANTIZATION_NONE,
+    ):
+        self.directory = directory
+        self.embedding_dim = embedding_dim
+        self.quantization = quantization
+        self.manifest = self._empty_manifest()
+        self._manifest_signature = None
+        self._reset(use_codes=False)
+
+        if os.path.exists(self._path(self.LEGACY_FILES[0])):
+            with self._locked():
+                pass  # Converted while locked
+        else:
+            self.refresh()
+
+    def _empty_manifest(self) -> dict:
+        return {
+            "generation": 0,
+            "epoch": 0,
+            "rows": 0,
+            "segments": [],
+            "dead": None,
+            "dead_rows": 0,
+            "quantization": self.quantization,
+            "scales": None,
+            "scales_rows": 0,
+        }
+
+    def _reset(self, use_codes: bool):
+        """Forget all rows (before loading a new epoch)"""
+        self.ids: List[str] = []
+        self.payloads: List[dict] = []
+        self.row_of: Dict[str, int] = {}
+        self.segments: List[np.ndarray] = []
+        self.segment_names: List[str] = []
+        self.starts = np.zeros(0, dtype=np.int64)
+        self._note_ids = _GrowableArray(np.int64)
+        self._file_types = _GrowableArray(object)
+        self._alive = _GrowableArray(bool)
+        self._codes: Optional[_GrowableArray] = None
+        if use_codes:
+            self._codes = _GrowableArray(
+                np.int8 if self.quantization == quant.QUANTIZATION_INT8 else np.uint8,
+                quant.bytes_per_vector(self.quantization, self.embedding_dim),
+            )
+        self.scales: Optional[np.ndarray] = None
+        self.live_count = 0
+        self.ivf: Optional[_IVFIndex] = None
+
+    def _path(self, filename: str) -> str:
+        return os.path.join(self.directory, filename)
+
+    @property
+    def note_ids(self) -> np.ndarray:
+        return self._note_ids.values
+
+    @property
+    def file_types(self) -> np.ndarray:
+        return self._file_types.values
+
+    @property
+    def alive(self) -> np.ndarray:
+        return self._alive.values
+
+    @property
+    def codes(self) -> Optional[np.ndarray]:
+        """Quantized codes of every row (None when quantization is off)"""
+        return None if self._codes is None else self._codes.values
+
+    @property
+    def has_dead_rows(self) -> bool:
+        return self.live_count < len(self.ids)
+
+    def __len__(self) -> int:
+        return self.live_count
+
+    def refresh(self):
+        """Load what other processes wrote since the last refresh"""
+        path = self._path(self.MANIFEST_FILE)
+        for _ in range(3):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                if self.ids:
+                    self._reset(use_codes=False)
+                    self.manifest = self._empty_manifest()
+                self._manifest_signature = None
+                return
+            signature = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+            if signature == self._manifest_signature:
+                return
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self._apply(json.load(f))
+            except FileNotFoundError:
+                # A writer replaced the files while we read them: retry
+                continue
+            self._manifest_signature = signature
+            return
+
+    def _apply(self, manifest: dict):
+        """Bring the in-memory state up to a manifest, loading only new rows"""
+        use_codes = (
+            self.quantization != quant.QUANTIZATION_NONE
+            and manifest["quantization"] == self.quantization
+        )
+        full = (
+            manifest["epoch"] != self.manifest["epoch"]
+            or use_codes != (self._codes is not None)
+            or manifest["rows"] < len(self.ids)
+        )
+        known = 0 if full else len(self.ids)
+        loaded = {} if full else dict(zip(self.segment_names, self.segments))
+
+        # Load everything first, so a missing file leaves the state untouched
+        names = [segment["name"] for segment in manifest["segments"]]
+        sizes = [segment["rows"] for segment in manifest["segments"]]
+        segments = [
+            (
+                loaded[name]
+                if name in loaded
+                else np.load(self._path(f"{name}.npy"), mmap_mode="r")
+            )
+            for name in names
+        ]
+        starts = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.int64)
+
+        points, new_vectors, new_codes = [], [], []
+        for name, segment, start, size in zip(names, segments, starts, sizes):
+            if start + size <= known:
+                continue
+            offset = max(known - int(start), 0)
+            with open(self._path(f"{name}.json"), "r", encoding="utf-8") as f:
+                points.extend(json.load(f)[offset:])
+            new_vectors.append(segment[offset:])
+            if use_codes:
+                new_codes.append(np.load(self._path(f"{name}.codes.npy"))[offset:])
+
+        scales = None if full else self.scales
+        if (
+            use_codes
+            and manifest["scales"]
+            and (full or manifest["scales"] != self.manifest["scales"])
+        ):
+            scales = np.load(self._path(f"{manifest['scales']}.npy"))
+        dead = None
+        if manifest["dead"] and (full or manifest["dead"] != self.manifest["dead"]):
+            dead = np.load(self._path(f"{manifest['dead']}.npy"))
+
+        if full:
+            self._reset(use_codes)
+        self.segments = [np.asarray(segment) for segment in segments]
+        self.segment_names = names
+        self.starts = starts[: len(names)]
+        self.scales = scales
+
+        for offset, point in enumerate(points):
+            self.row_of[point["id"]] = known + offset
+        self.ids.extend(point["id"] for point in points)
+        self.payloads.extend(point["payload"] for point in points)
+        self._note_ids.append(
+            np.array(
+                [point["payload"].get("note_id", -1) for point in points],
+                dtype=np.int64,
+            )
+        )
+        self._file_types.append(
+            np.array(
+                [point["payload"].get("file_type", "") for point in points],
+                dtype=object,
+            )
+        )
+        self._alive.append(np.ones(len(points), dtype=bool))
+        for codes in new_codes:
+            self._codes.append(codes)
+        if dead is not None:
+            self.alive[:] = ~np.unpackbits(dead, count=len(self.ids)).astype(bool)
+        self.live_count = int(np.count_nonzero(self.alive))
+
+        if self.ivf is not None:
+            for vectors in new_vectors:
+                self.ivf.add(vectors)
+            if self.ivf.needs_retraining():
+                self.ivf = None
+        self.manifest = manifest
+
+    def take(self, rows: np.ndarray) -> np.ndarray:
+        """float32 vectors of the given rows"""
+        return _take(self.segments, self.starts, rows)
+
+    def scores(self, query: np.ndarray) -> np.ndarray:
+        """Exact scores of every row"""
+        return np.concatenate([segment @ query for segment in self.segments])
+
+    def score_matrix(self, queries: np.ndarray) -> np.ndarray:
+        """Exact scores of every row for each query, shape (queries, rows)"""
+        return np.hstack([queries @ segment.T for segment in self.segments])
+
+    def approximate_scores(self, query: np.ndarray, rows: Optional[np.ndarray]):
+        """Scores of the quantized codes (all rows, or the given rows)"""
+        codes = self.codes if rows is None else self.codes[rows]
+        if self.quantization == quant.QUANTIZATION_INT8:
+            return quant.int8_scores(codes, self.scales, query)
+        return quant.binary_scores(codes, query, self.embedding_dim)
+
+    @contextmanager
+    def _locked(self):
+        """Hold the partition's file lock, with the state up to date"""
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self._path(self.LOCK_FILE), "a+b") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            self._convert_legacy()
+            self.refresh()
+            yield
+
+    def _next_manifest(self) -> dict:
+        return {
+            **self.manifest,
+            "generation": self.manifest["generation"] + 1,
+            "segments": [dict(segment) for segment in self.manifest["segments"]],
+        }
+
+    def _commit(self, manifest: dict):
+        """Atomically publish a manifest, load it and drop unreferenced files"""
+        path = self._path(self.MANIFEST_FILE)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps(manifest))
+        os.replace(tmp_path, path)
+        self.refresh()
+
+        referenced = {segment["name"] for segment in manifest["segments"]}
+        referenced.update(name for name in (manifest["dead"], manifest["scales"]))
+        for filename in os.listdir(self.directory):
+            if _DATA_FILE.match(filename) and filename.split(".")[0] not in referenced:
+                try:
+                    os.remove(self._path(filename))
+                except OSError:
+                    pass
+
+    def _write_segment(
+        self,
+        name: str,
+        vectors: np.ndarray,
+        ids: List[str],
+        payloads: List[dict],
+        codes: Optional[np.ndarray],
+    ):
+        """Write the files of a new segment (unreferenced until committed)"""
+        np.save(self._path(f"{name}.npy"), vectors)
+        with open(self._path(f"{name}.json"), "w", encoding="utf-8") as f:
+            # dumps() uses the C encoder; dump() streams through the Python one
+            f.write(
+                json.dumps(
+                    [{"id": i, "payload": p} for i, p in zip(ids, payloads)],
+                    ensure_ascii=False,
+                )
+            )
+        if codes is not None:
+            np.save(self._path(f"{name}.codes.npy"), codes)
+
+    def _write_dead(self, manifest: dict, rows: np.ndarray):
+        """Write a deleted-rows bitmap with the given rows added"""
+        dead = ~self.alive
+        dead[rows] = True
+        name = f"dead-{manifest['generation']:08d}"
+        np.save(self._path(f"{name}.npy"), np.packbits(dead))
+        manifest["dead"] = name
+        manifest["dead_rows"] = int(np.count_nonzero(dead))
+
+    def _encode(self, vectors: np.ndarray) -> Optional[np.ndarray]:
+        """Codes of vectors with the partition's current scales"""
+        if self.quantization == quant.QUANTIZATION_INT8:
+            return quant.quantize_int8(vectors, self.scales)
+        if self.quantization == quant.QUANTIZATION_BINARY:
+            return quant.quantize_binary(vectors)
+        return None
+
+    def upsert(self, points: List[VectorPoint]):
+        """Append points as a new segment, marking the rows they replace dead"""
+        points = list({point.id: point for point in points}.values())
+        vectors = normalize_rows(
+            np.vstack([point.vector for point in points]).astype(np.float32)
+        )
+        ids = [point.id for point in points]
+        payloads = [point.payload for point in points]
+
+        with self._locked():
+            if self.manifest["rows"] == 0:
+                self.manifest["quantization"] = self.quantization
+            elif self.manifest["quantization"] != self.quantization:
+                self._rewrite(np.flatnonzero(self.alive))
+
+            manifest = self._next_manifest()
+            if (
+                self.quantization == quant.QUANTIZATION_INT8
+                and manifest["scales"] is None
+            ):
+                self.scales = quant.int8_scales(vectors)
+                name = f"scales-{manifest['generation']:08d}"
+                np.save(self._path(f"{name}.npy"), self.scales)
+                manifest["scales"] = name
+                manifest["scales_rows"] = len(vectors)
+
+            replaced = [
+                self.row_of[point_id]
+                for point_id in ids
+                if point_id in self.row_of and self.alive[self.row_of[point_id]]
+            ]
+            name = f"seg-{manifest['generation']:08d}"
+            self._write_segment(name, vectors, ids, payloads, self._encode(vectors))
+            manifest["segments"].append({"name": name, "rows": len(points)})
+            manifest["rows"] += len(points)
+            if replaced:
+                self._write_dead(manifest, np.array(replaced, dtype=np.int64))
+            self._commit(manifest)
+
+            self._merge_tail()
+            self._rewrite_if_needed()
+
+    def delete_where(self, select: Callable[["_Partition"], np.ndarray]):
+        """Delete the rows where select(partition) is True"""
+        if not np.any(select(self) & self.alive):
+            return
+        with self._locked():
+            rows = np.flatnonzero(select(self) & self.alive)
+            if not len(rows):
+                return
+            manifest = self._next_manifest()
+            self._write_dead(manifest, rows)
+            self._commit(manifest)
+            self._rewrite_if_needed()
+
+    def clear(self):
+        """Delete every row"""
+        with self._locked():
+            if self.manifest["rows"]:
+                self._rewrite(np.empty(0, dtype=np.int64))
+
+    def _merge_tail(self):
+        """Merge the last two segments while they are of similar size"""
+        while True:
+            segments = self.manifest["segments"]
+            if (
+                len(segments) < 2
+                or segments[-2]["rows"] > SEGMENT_MERGE_RATIO * segments[-1]["rows"]
+            ):
+                return
+            manifest = self._next_manifest()
+            start = int(self.starts[-2])
+            name = f"seg-{manifest['generation']:08d}"
+            self._write_segment(
+                name,
+                np.concatenate(self.segments[-2:]),
+                self.ids[start:],
+                self.payloads[start:],
+                None if self.codes is None else self.codes[start:],
+            )
+            manifest["segments"][-2:] = [
+                {"name": name, "rows": segments[-2]["rows"] + segments[-1]["rows"]}
+            ]
+            self._commit(manifest)
+
+    def _rewrite_if_needed(self):
+        """Rewrite the partition if it is mostly dead rows or int8 scales are stale"""
+        rows = self.manifest["rows"]
+        stale_scales = (
+            self.manifest["quantization"] == quant.QUANTIZATION_INT8
+            and self.live_count >= SCALES_REFIT_GROWTH * self.manifest["scales_rows"]
+        )
+        if rows and (2 * self.manifest["dead_rows"] > rows or stale_scales):
+            self._rewrite(np.flatnonzero(self.alive))
+
+    def _rewrite(self, keep: np.ndarray):
+        """Replace the partition with one segment of the kept rows (new epoch)"""
+        manifest = {
+            **self._empty_manifest(),
+            "generation": self.manifest["generation"] + 1,
+            "epoch": self.manifest["epoch"] + 1,
+        }
+        if len(keep):
+            vectors = self.take(keep)
+            codes, scales = None, None
+            if self.quantization != quant.QUANTIZATION_NONE:
+                codes, scales = quant.encode(self.quantization, vectors)
+            if self.quantization == quant.QUANTIZATION_INT8:
+                name = f"scales-{manifest['generation']:08d}"
+                np.save(self._path(f"{name}.npy"), scales)
+                manifest["scales"] = name
+                manifest["scales_rows"] = len(keep)
+            name = f"seg-{manifest['generation']:08d}"
+            self._write_segment(
+                name,
+                vectors,
+                [self.ids[row] for row in keep],
+                [self.payloads[row] for row in keep],
+                codes,
+            )
+            manifest["segments"] = [{"name": name, "rows": len(keep)}]
+            manifest["rows"] = len(keep)
+        self._commit(manifest)
+
+    def _convert_legacy(self):
+        """Turn a partition in the single-matrix layout into one segment"""
+        vectors_path, points_path = (self._path(f) for f in self.LEGACY_FILES[:2])
+        if not os.path.exists(vectors_path):
+            return
+        if os.path.exists(points_path):
+            with open(points_path, "r", encoding="utf-8") as f:
+                points = json.load(f)
+            self._manifest_signature = None
+            self.refresh()
+            if points and self.manifest["rows"] == 0:
+                self._write_legacy_segment(np.load(vectors_path), points)
+        for filename in self.LEGACY_FILES:
+            if os.path.exists(self._path(filename)):
+                os.remove(self._path(filename))
+
+    def _write_legacy_segment(self, vectors: np.ndarray, points: List[dict]):
+        manifest = self._next_manifest()
+        manifest["quantization"] = self.quantization
+        codes = None
+        if self.quantization != quant.QUANTIZATION_NONE:
+            codes, scales = quant.encode(self.quantization, vectors)
+            if self.quantization == quant.QUANTIZATION_INT8:
+                name = f"scales-{manifest['generation']:08d}"
+                np.save(self._path(f"{name}.npy"), scales)
+                manifest["scales"] = name
+                manifest["scales_rows"] = len(vectors)
+        name = f"seg-{manifest['generation']:08d}"
+        self._write_segment(
+            name,
+            np.ascontiguousarray(vectors, dtype=np.float32),
+            [point["id"] for point in points],
+            [point["payload"] for point in points],
+            codes,
+        )
+        manifest["segments"] = [{"name": name, "rows": len(points)}]
+        manifest["rows"] = len(points)
+        self._commit(manifest)
+
+
+class LocalVectorBackend(VectorBackend):
+    """In-process vector backend using memory-mapped float32 segments"""
+
+    def __init__(
+        self,
+        directory: str,
+        embedding_dim: int,
+        search_mode: str = "auto",
+        ivf_min_points: int = 20000,
+        ivf_nprobe: int = 8,
+        quantization: str = quant.QUANTIZATION_NONE,
+        rescore_oversampling: float = 0.0,
+    ):
+        """
+        Initialize the local backend.
+
+        Args:
+            directory: Directory holding one subdirectory per partition
+            embedding_dim: Vector dimension
+            search_mode: "exact", "ivf", or "auto" (IVF once a partition
+                reaches ivf_min_points)
+            ivf_min_points: Partition size at which "auto" switches to IVF
+            ivf_nprobe: Number of IVF lists scanned per query
+            quantization: "none", "int8", or "binary"
+            rescore_oversampling: Candidates rescored with float32 vectors,
+                as a multiple of the result limit (0 = the mode's default)
+        """
+        if search_mode not in ("exact", "ivf", "auto"):
+            raise ValueError(f"Unknown local vector search mode: {search_mode}")
+
+        self.directory = directory
+        self.embedding_dim = embedding_dim
+        self.search_mode = search_mode
+        self.ivf_min_points = ivf_min_points
+        self.ivf_nprobe = ivf_nprobe
+        self.quantization = quant.validate_mode(quantization)
+        self.rescore_oversampling = quant.resolve_oversampling(
+            self.quantization, rescore_oversampling
+        )
+
+        self._lock = threading.RLock()
+        self._partitions: Dict[PartitionKey, _Partition] = {}
+
+        os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            list(self._partitions_on_disk())
+
+    def _partition_dir(self, key: PartitionKey) -> str:
+        user_id, report_id = key
+        return os.path.join(self.directory, f"u{user_id}_r{report_id}")
+
+    def _partition(self, key: PartitionKey, create: bool = False):
+        """Get a partition, up to date with disk (None if it does not exist)"""
+        partition = self._partitions.get(key)
+        if partition is not None:
+            partition.refresh()
+            return partition
+        directory = self._partition_dir(key)
+        if not create and not os.path.isdir(directory):
+            return None
+        partition = _Partition(directory, self.embedding_dim, self.quantization)
+        self._partitions[key] = partition
+        return partition
+
+    def _partitions_on_disk(self, user_id: Optional[int] = None):
+        """Every partition (of one user), including ones other processes created"""
+        for name in os.listdir(self.directory):
+            match = _PARTITION_DIR.match(name)
+            if not match or user_id not in (None, int(match.group(1))):
+                continue
+            key = (int(match.group(1)), int(match.group(2)))
+            yield key, self._partition(key)
+
+    def upsert(self, points: List[VectorPoint], wait: bool = True):
+        """Insert or replace points, grouped by partition (always synchronous)"""
+        grouped: Dict[PartitionKey, List[VectorPoint]] = {}
+        for point in points:
+            key = (point.payload["user_id"], point.payload["report_id"])
+            grouped.setdefault(key, []).append(point)
+
+        with self._lock:
+            for key, partition_points in grouped.items():
+                self._partition(key, create=True).upsert(partition_points)
+
+    def _use_ivf(self, partition: _Partition) -> bool:
+        if self.search_mode == "ivf":
+            return True
+        return self.search_mode == "auto" and len(partition) >= self.ivf_min_points
+
+    def _candidate_rows(
+        self,
+        partition: _Partition,
+        query: np.ndarray,
+        file_type_filter: Optional[str],
+    ) -> Optional[np.ndarray]:
+        """Rows to score (None = all rows)"""
+        rows = None
+        if self._use_ivf(partition):
+            if partition.ivf is None:
+                partition.ivf = _IVFIndex(
+                    partition.segments, partition.starts, len(partition.ids)
+                )
+            rows = partition.ivf.candidates(query, self.ivf_nprobe)
+
+        allowed = partition.alive if partition.has_dead_rows else None
+        if file_type_filter:
+            matches = partition.file_types == file_type_filter
+            allowed = matches if allowed is None else allowed & matches
+        if allowed is not None:
+            rows = np.flatnonzero(allowed) if rows is None else rows[allowed[rows]]
+        return rows
+
+    def search(
+        self,
+        query: np.ndarray,
+        report_id: int,
+        user_id: int,
+        limit: int = 5,
+        file_type_filter: Optional[str] = None,
+    ) -> List[VectorHit]:
+        """Search one (user, report) partition"""
+        with self._lock:
+            partition = self._partition((user_id, report_id))
+            if partition is None or len(partition) == 0:
+                return []
+
+            query = normalize_rows(query)
+            rows = self._candidate_rows(partition, query, file_type_filter)
+            if rows is not None and len(rows) == 0:
+                return []
+            best_rows, best_scores = self._top_rows(partition, query, rows, limit)
+
+            return [
+                VectorHit(
+                    id=partition.ids[row],
+                    score=float(score),
+                    payload=partition.payloads[row],
+                )
+                for row, score in zip(best_rows, best_scores)
+            ]
+
+    def _top_rows(
+        self,
+        partition: _Partition,
+        query: np.ndarray,
+        rows: Optional[np.ndarray],
+        limit: int,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Best rows (all rows, or the candidate rows) and their exact scores.
+
+        Quantized partitions score the codes first and rescore only the top
+        candidates against the float32 vectors.
+        """
+        if partition.codes is None:
+            scores = (
+                partition.scores(query)
+                if rows is None
+                else partition.take(rows) @ query
+            )
+            best = top_k_indices(scores, limit)
+            return (best if rows is None else rows[best]), scores[best]
+
+        approximate = partition.approximate_scores(query, rows)
+        candidates = top_k_indices(
+            approximate,
+            quant.rescore_limit(limit, self.rescore_oversampling, len(approximate)),
+        )
+        if rows is not None:
+            candidates = rows[candidates]
+
+        # Sorted rows read the memory-mapped vectors sequentially
+        candidates = np.sort(candidates)
+        scores = partition.take(candidates) @ query
+        best = top_k_indices(scores, limit)
+        return candidates[best], scores[best]
+
+    def search_batch(
+        self,
+        queries: np.ndarray,
+        report_id: int,
+        user_id: int,
+        limit: int = 5,
+        file_type_filter: Optional[str] = None,
+    ) -> List[List[VectorHit]]:
+        """Answer many queries against one partition with one matrix multiply"""
+        with self._lock:
+            partition = self._partition((user_id, report_id))
+            if partition is None or len(partition) == 0:
+                return [[] for _ in range(len(queries))]
+
+            if self._use_ivf(partition) or partition.codes is not None:
+                # IVF probes different lists, and rescoring differs, per query
+                return [
+                    self.search(query, report_id, user_id, limit, file_type_filter)
+                    for query in queries
+                ]
+
+            scores = partition.score_matrix(normalize_rows(queries))
+            if partition.has_dead_rows:
+                scores[:, ~partition.alive] = -np.inf
+            if file_type_filter:
+                scores[:, partition.file_types != file_type_filter] = -np.inf
+            rows, top_scores = top_k_indices_2d(scores, limit)
+
+            return [
+                [
+                    VectorHit(
+                        id=partition.ids[row],
+                        score=float(score),
+                        payload=partition.payloads[row],
+                    )
+                    for row, score in zip(query_rows, query_scores)
+                    if np.isfinite(score)
+                ]
+                for query_rows, query_scores in zip(rows, top_scores)
+            ]
+
+    def get_note_points(
+        self, note_id: int, user_id: Optional[int] = None
+    ) -> List[VectorHit]:
+        """Return every stored point of a note"""
+        hits = []
+        with self._lock:
+            for _, partition in self._partitions_on_disk(user_id):
+                rows = np.flatnonzero((partition.note_ids == note_id) & partition.alive)
+                hits.extend(
+                    VectorHit(
+                        id=partition.ids[row],
+                        score=0.0,
+                        payload=partition.payloads[row],
+                    )
+                    for row in rows
+                )
+        return hits
+
+    def delete_points(self, point_ids: List[str], user_id: Optional[int] = None):
+        """Delete points by ID"""
+        wanted = set(point_ids)
+        if not wanted:
+            return
+        with self._lock:
+            for _, partition in self._partitions_on_disk(user_id):
+                if not wanted.intersection(partition.row_of):
+                    continue
+                partition.delete_where(
+                    lambda p: np.fromiter(
+                        (point_id in wanted for point_id in p.ids),
+                        dtype=bool,
+                        count=len(p.ids),
+                    )
+                )
+
+    def delete_note(self, note_id: int, user_id: Optional[int] = None):
+        """Delete all points for a note"""
+        with self._lock:
+            for _, partition in self._partitions_on_disk(user_id):
+                partition.delete_where(lambda p: p.note_ids == note_id)
+
+    def delete_report(self, report_id: int, user_id: Optional[int] = None):
+        """Delete all points for a report"""
+        with self._lock:
+            for key, partition in self._partitions_on_disk(user_id):
+                if key[1] == report_id:
+                    partition.clear()
+
+
+def read_live_vectors(directory: str, embedding_dim: int) -> np.ndarray:
+    """
+    Vectors of every live point in a local index, partition after partition.
+
+    Args:
+        directory: Local vector index directory
+        embedding_dim: Vector dimension
+
+    Returns:
+        float32 matrix of shape (points, embedding_dim)
+    """
+    backend = LocalVectorBackend(directory, embedding_dim, search_mode="exact")
+    matrices = [
+        partition.take(np.flatnonzero(partition.alive))
+        for partition in backend._partitions.values()
+        if len(partition)
+    ]
+    if not matrices:
+        return np.empty((0, embedding_dim), dtype=np.float32)
+    return np.vstack(matrices)
@@ -0,0 +1,388 @@
+"""
+Qdrant vector backend
+"""
+
+from typing import Dict, List, Optional
+
+import numpy as np
+from qdrant_client import QdrantClient
+from qdrant_client.models import (
+    Distance,
+    VectorParams,
+    PointStruct,
+    Filter,
+    FieldCondition,
+    MatchValue,
+    PayloadSchemaType,
+)
+from qdrant_client.http import models
+
+from app.services.vector_backends import quantization as quant
+from app.services.vector_backends.base import VectorBackend, VectorHit, VectorPoint
+
+# Collection layouts
+LAYOUT_SHARED = "shared"  # One collection, filtered by user_id/report_id
+LAYOUT_TENANT_INDEX = "tenant_index"  # One collection, is_tenant keyword index
+LAYOUT_PER_USER = "per_user"  # One collection per user
+
+LAYOUTS = (LAYOUT_SHARED, LAYOUT_TENANT_INDEX, LAYOUT_PER_USER)
+
+# Payload fields used by search filters and deletes
+PAYLOAD_INDEXES = {
+    "user_id": PayloadSchemaType.INTEGER,
+    "report_id": PayloadSchemaType.INTEGER,
+    "note_id": PayloadSchemaType.INTEGER,
+    "file_type": PayloadSchemaType.KEYWORD,
+}
+
+# Keyword copy of user_id used for Qdrant's tenant-aware storage
+TENANT_FIELD = "tenant_id"
+
+
+class QdrantVectorBackend(VectorBackend):
+    """Vector backend backed by a Qdrant server"""
+
+    def __init__(
+        self,
+        url: str,
+        collection_name: str,
+        embedding_dim: int,
+        layout: str = LAYOUT_SHARED,
+        quantization: str = quant.QUANTIZATION_NONE,
+        rescore_oversampling: float = 0.0,
+    ):
+        """
+        Initialize Qdrant client.
+
+        Args:
+            url: Qdrant server URL
+            collection_name: Name of the collection holding note embeddings
+                (the prefix of per-user collections in the per_user layout)
+            embedding_dim: Vector dimension
+            layout: "shared", "tenant_index", or "per_user"
+            quantization: "none", "int8", or "binary" for new collections
+            rescore_oversampling: Candidates rescored with original vectors,
+                as a multiple of the result limit (0 = the mode's default)
+        """
+        if layout not in LAYOUTS:
+            raise ValueError(f"Unknown Qdrant collection layout: {layout}")
+
+        self.client = QdrantClient(url=url)
+        self.collection_name = collection_name
+        self.embedding_dim = embedding_dim
+        self.layout = layout
+        self.quantization = quant.validate_mode(quantization)
+        self.rescore_oversampling = quant.resolve_oversampling(
+            self.quantization, rescore_oversampling
+        )
+        self._ready_collections = set()
+
+        if layout != LAYOUT_PER_USER:
+            # Create collection if it doesn't exist
+            self._ensure_collection_exists(collection_name)
+        else:
+            # Fail fast when the server is unreachable
+            self.client.get_collections()
+
+    def collection_for_user(self, user_id: int) -> str:
+        """Name of the collection holding a user's points"""
+        if self.layout == LAYOUT_PER_USER:
+            return f"{self.collection_name}_user_{user_id}"
+        return self.collection_name
+
+    def tenant_collections(self) -> List[str]:
+        """All collections that may hold note embeddings"""
+        if self.layout != LAYOUT_PER_USER:
+            return [self.collection_name]
+        prefix = f"{self.collection_name}_user_"
+        return [
+            collection.name
+            for collection in self.client.get_collections().collections
+            if collection.name.startswith(prefix)
+        ]
+
+    def _collections(self, user_id: Optional[int]) -> List[str]:
+        """Collections to touch for an operation, given an optional user"""
+        if user_id is not None and self.layout == LAYOUT_PER_USER:
+            collection_name = self.collection_for_user(user_id)
+            return [collection_name] if self._collection_exists(collection_name) else []
+        return self.tenant_collections()
+
+    def _collection_exists(self, collection_name: str) -> bool:
+        """Check whether a collection exists, trusting collections we created"""
+        if collection_name in self._ready_collections:
+            return True
+        return self.client.collection_exists(collection_name)
+
+    def _ensure_collection_exists(self, collection_name: str):
+        """Create the collection if it doesn't exist, with payload indexes"""
+        if collection_name in self._ready_collections:
+            return
+
+        try:
+            self.client.get_collection(collection_name)
+        except Exception:
+            # Collection doesn't exist, create it. Quantized collections keep
+            # the codes in RAM and the original vectors on disk for rescoring.
+            self.client.create_collection(
+                collection_name=collection_name,
+                vectors_config=VectorParams(
+                    size=self.embedding_dim,
+                    distance=Distance.COSINE,
+                    on_disk=self.quantization != quant.QUANTIZATION_NONE,
+                ),
+                quantization_config=self.quantization_config(),
+            )
+
+        self.ensure_payload_indexes(collection_name)
+        self._ready_collections.add(collection_name)
+
+    def quantization_config(self):
+        """Qdrant quantization config for the configured mode (None when off)"""
+        if self.quantization == quant.QUANTIZATION_INT8:
+            return models.ScalarQuantization(
+                scalar=models.ScalarQuantizationConfig(
+                    type=models.ScalarType.INT8,
+                    quantile=quant.INT8_QUANTILE,
+                    always_ram=True,
+                )
+            )
+        if self.quantization == quant.QUANTIZATION_BINARY:
+            return models.BinaryQuantization(
+                binary=models.BinaryQuantizationConfig(always_ram=True)
+            )
+        return None
+
+    def apply_quantization(self, collection_name: str):
+        """Switch an existing collection to the configured quantization mode"""
+        self.client.update_collection(
+            collection_name=collection_name,
+            vectors_config={
+                "": models.VectorParamsDiff(
+                    on_disk=self.quantization != quant.QUANTIZATION_NONE
+                )
+            },
+            quantization_config=self.quantization_config() or models.Disabled.DISABLED,
+        )
+
+    def _search_params(self) -> Optional[models.SearchParams]:
+        """Rescore quantized candidates with the original vectors"""
+        if self.quantization == quant.QUANTIZATION_NONE:
+            return None
+        return models.SearchParams(
+            quantization=models.QuantizationSearchParams(
+                rescore=True, oversampling=self.rescore_oversampling
+            )
+        )
+
+    def ensure_payload_indexes(self, collection_name: str) -> List[str]:
+        """
+        Create any missing payload indexes on a collection.
+
+        Args:
+            collection_name: Collection to index
+
+        Returns:
+            Names of the fields indexed by this call
+        """
+        existing = self.client.get_collection(collection_name).payload_schema or {}
+
+        wanted: Dict[str, object] = dict(PAYLOAD_INDEXES)
+        if self.layout == LAYOUT_TENANT_INDEX:
+            wanted[TENANT_FIELD] = models.KeywordIndexParams(
+                type=models.KeywordIndexType.KEYWORD, is_tenant=True
+            )
+
+        created = []
+        for field_name, field_schema in wanted.items():
+            if field_name in existing:
+                continue
+            self.client.create_payload_index(
+                collection_name=collection_name,
+                field_name=field_name,
+                field_schema=field_schema,
+            )
+            created.append(field_name)
+        return created
+
+    def _tenant_payload(self, payload: Dict) -> Dict:
+        """Add the tenant keyword to a payload in the tenant_index layout"""
+        if self.layout != LAYOUT_TENANT_INDEX:
+            return payload
+        return {**payload, TENANT_FIELD: str(payload["user_id"])}
+
+    def upsert(self, points: List[VectorPoint], wait: bool = True):
+        """Insert or replace points"""
+        grouped: Dict[str, List[VectorPoint]] = {}
+        for point in points:
+            collection_name = self.collection_for_user(point.payload["user_id"])
+            grouped.setdefault(collection_name, []).append(point)
+
+        for collection_name, collection_points in grouped.items():
+            self._ensure_collection_exists(collection_name)
+            self.client.upsert(
+                collection_name=collection_name,
+                points=[
+                    PointStruct(
+                        id=point.id,
+                        # Lists are only produced here, at the Qdrant JSON boundary
+                        vector=np.asarray(point.vector, dtype=np.float32).tolist(),
+                        payload=self._tenant_payload(point.payload),
+                    )
+                    for point in collection_points
+                ],
+                wait=wait,
+            )
+
+    def _search_filter(
+        self, report_id: int, user_id: int, file_type_filter: Optional[str]
+    ) -> Filter:
+        """Build the filter scoping a search to one (user, report) partition"""
+        if self.layout == LAYOUT_TENANT_INDEX:
+            user_condition = FieldCondition(
+                key=TENANT_FIELD, match=MatchValue(value=str(user_id))
+            )
+        else:
+            user_condition = FieldCondition(
+                key="user_id", match=MatchValue(value=user_id)
+            )
+
+        must_conditions = [
+            user_condition,
+            FieldCondition(key="report_id", match=MatchValue(value=report_id)),
+        ]
+
+        if file_type_filter:
+            must_conditions.append(
+                FieldCondition(
+                    key="file_type", match=MatchValue(value=file_type_filter)
+                )
+            )
+
+        return Filter(must=must_conditions)
+
+    def search(
+        self,
+        query: np.ndarray,
+        report_id: int,
+        user_id: int,
+        limit: int = 5,
+        file_type_filter: Optional[str] = None,
+    ) -> List[VectorHit]:
+        """Search one (user, report) partition"""
+        collection_name = self.collection_for_user(user_id)
+        if self.layout == LAYOUT_PER_USER and not self._collections(user_id):
+            return []
+
+        results = self.client.query_points(
+            collection_name=collection_name,
+            query=np.asarray(query, dtype=np.float32).tolist(),
+            query_filter=self._search_filter(report_id, user_id, file_type_filter),
+            search_params=self._search_params(),
+            limit=limit,
+        ).points
+
+        return [
+            VectorHit(id=str(result.id), score=result.score, payload=result.payload)
+            for result in results
+        ]
+
+    def search_batch(
+        self,
+        queries: np.ndarray,
+        report_id: int,
+        user_id: int,
+        limit: int = 5,
+        file_type_filter: Optional[str] = None,
+    ) -> List[List[VectorHit]]:
+        """Answer many queries against one partition in a single request"""
+        if len(queries) == 0:
+            return []
+
+        collection_name = self.collection_for_user(user_id)
+        if self.layout == LAYOUT_PER_USER and not self._collections(user_id):
+            return [[] for _ in range(len(queries))]
+
+        search_filter = self._search_filter(report_id, user_id, file_type_filter)
+        search_params = self._search_params()
+        responses = self.client.query_batch_points(
+            collection_name=collection_name,
+            requests=[
+                models.QueryRequest(
+                    query=query.tolist(),
+                    filter=search_filter,
+                    params=search_params,
+                    limit=limit,
+                    with_payload=True,
+                )
+                for query in np.asarray(queries, dtype=np.float32)
+            ],
+        )
+
+        return [
+            [
+                VectorHit(id=str(point.id), score=point.score, payload=point.payload)
+                for point in response.points
+            ]
+            for response in responses
+        ]
+
+    def get_note_points(
+        self, note_id: int, user_id: Optional[int] = None
+    ) -> List[VectorHit]:
+        """Scroll through every point of a note without fetching vectors"""
+        hits = []
+        for collection_name in self._collections(user_id):
+            offset = None
+            while True:
+                records, offset = self.client.scroll(
+                    collection_name=collection_name,
+                    scroll_filter=Filter(
+                        must=[
+                            FieldCondition(
+                                key="note_id", match=MatchValue(value=note_id)
+                            )
+                        ]
+                    ),
+                    limit=256,
+                    offset=offset,
+                    with_payload=True,
+                    with_vectors=False,
+                )
+                hits.extend(
+                    VectorHit(id=str(record.id), score=0.0, payload=record.payload)
+                    for record in records
+                )
+                if offset is None:
+                    break
+        return hits
+
+    def delete_points(self, point_ids: List[str], user_id: Optional[int] = None):
+        """Delete points by ID"""
+        if not point_ids:
+            return
+        for collection_name in self._collections(user_id):
+            self.client.delete(
+                collection_name=collection_name,
+                points_selector=models.PointIdsList(points=list(point_ids)),
+            )
+
+    def _delete_where(self, key: str, value: int, user_id: Optional[int]):
+        """Delete all points whose payload field equals value"""
+        for collection_name in self._collections(user_id):
+            self.client.delete(
+                collection_name=collection_name,
+                points_selector=models.FilterSelector(
+                    filter=Filter(
+                        must=[FieldCondition(key=key, match=MatchValue(value=value))]
+                    )
+                ),
+            )
+
+    def delete_note(self, note_id: int, user_id: Optional[int] = None):
+        """Delete all points for a note"""
+        self._delete_where("note_id", note_id, user_id)
+
+    def delete_report(self, report_id: int, user_id: Optional[int] = None):
+        """Delete all points for a report"""
+        self._delete_where("report_id", report_id, user_id)
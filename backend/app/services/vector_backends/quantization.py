@@ -0,0 +1,148 @@
+"""
+Scalar (int8) and binary quantization of unit-length embeddings.
+
+Quantized codes are small enough to keep in RAM (4x smaller for int8, 32x
+for binary) and give approximate scores; the top candidates are then
+rescored against the original float32 vectors, which can stay on disk.
+"""
+
+from typing import Tuple
+
+import numpy as np
+
+QUANTIZATION_NONE = "none"
+QUANTIZATION_INT8 = "int8"
+QUANTIZATION_BINARY = "binary"
+
+QUANTIZATION_MODES = (QUANTIZATION_NONE, QUANTIZATION_INT8, QUANTIZATION_BINARY)
+
+# Share of absolute values covered by the int8 range; outliers are clipped
+INT8_QUANTILE = 0.99
+
+# Rows scored per block; the float32 copy of a block stays in CPU cache
+SCORE_BLOCK_ROWS = 1024
+
+# Rescoring oversampling used when none is configured (from the recall report:
+# int8 is exact at 2x, binary needs ~8x for recall@10 above 0.97)
+DEFAULT_OVERSAMPLING = {QUANTIZATION_INT8: 2.0, QUANTIZATION_BINARY: 8.0}
+
+# Set bits per byte value, for numpy builds without np.bitwise_count
+_POPCOUNT = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint8)
+
+
+def validate_mode(mode: str) -> str:
+    """Normalize a quantization mode name, raising ValueError if unknown"""
+    mode = (mode or QUANTIZATION_NONE).lower()
+    if mode not in QUANTIZATION_MODES:
+        raise ValueError(f"Unknown vector quantization mode: {mode}")
+    return mode
+
+
+def int8_scales(vectors: np.ndarray) -> np.ndarray:
+    """
+    Per-dimension scales mapping the INT8_QUANTILE of |values| to 127.
+
+    Args:
+        vectors: float32 matrix (one vector per row)
+
+    Returns:
+        float32 array of shape (dim,)
+    """
+    if len(vectors) == 0:
+        return np.full(vectors.shape[1], 1.0 / 127, dtype=np.float32)
+    bound = np.quantile(np.abs(vectors), INT8_QUANTILE, axis=0)
+    bound[bound == 0] = 1.0
+    return (bound / 127).astype(np.float32)
+
+
+def quantize_int8(vectors: np.ndarray, scales: np.ndarray) -> np.ndarray:
+    """Encode vectors as int8 codes with the given per-dimension scales"""
+    codes = np.rint(np.asarray(vectors, dtype=np.float32) / scales)
+    return np.clip(codes, -127, 127).astype(np.int8)
+
+
+def quantize_binary(vectors: np.ndarray) -> np.ndarray:
+    """Encode vectors as packed sign bits, shape (n, ceil(dim / 8))"""
+    return np.packbits(np.asarray(vectors) > 0, axis=-1)
+
+
+def int8_scores(codes: np.ndarray, scales: np.ndarray, query: np.ndarray) -> np.ndarray:
+    """
+    Approximate dot products between int8 codes and a float query.
+
+    Args:
+        codes: int8 matrix of shape (n, dim)
+        scales: Per-dimension scales used to encode the codes
+        query: float32 query vector
+
+    Returns:
+        float32 array of shape (n,)
+    """
+    weighted_query = (np.asarray(query, dtype=np.float32) * scales).astype(np.float32)
+    scores = np.empty(len(codes), dtype=np.float32)
+    for start in range(0, len(codes), SCORE_BLOCK_ROWS):
+        block = codes[start : start + SCORE_BLOCK_ROWS]
+        scores[start : start + len(block)] = block.astype(np.float32) @ weighted_query
+    return scores
+
+
+def binary_scores(codes: np.ndarray, query: np.ndarray, dim: int) -> np.ndarray:
+    """
+    Approximate similarity between packed sign codes and a query.
+
+    Returns dim - 2 * hamming_distance, i.e. the dot product of the
+    +1/-1 sign vectors (higher is more similar).
+
+    Args:
+        codes: uint8 matrix from quantize_binary
+        query: float32 query vector
+        dim: Vector dimension (number of meaningful bits)
+
+    Returns:
+        float32 array of shape (n,)
+    """
+    differing = np.bitwise_xor(codes, quantize_binary(query))
+    if hasattr(np, "bitwise_count"):
+        hamming = np.bitwise_count(differing).sum(axis=1, dtype=np.int32)
+    else:
+        hamming = _POPCOUNT[differing].sum(axis=1, dtype=np.int32)
+    return (dim - 2 * hamming).astype(np.float32)
+
+
+def bytes_per_vector(mode: str, dim: int) -> int:
+    """In-memory size of one quantized vector (float32 for mode "none")"""
+    if mode == QUANTIZATION_INT8:
+        return dim
+    if mode == QUANTIZATION_BINARY:
+        return (dim + 7) // 8
+    return dim * 4
+
+
+def resolve_oversampling(mode: str, oversampling: float) -> float:
+    """Configured oversampling, or the mode's default when it is 0"""
+    return oversampling or DEFAULT_OVERSAMPLING.get(mode, 1.0)
+
+
+def rescore_limit(limit: int, oversampling: float, available: int) -> int:
+    """Number of approximate candidates to rescore for a result limit"""
+    return min(available, max(limit, int(np.ceil(limit * oversampling))))
+
+
+def encode(mode: str, vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Quantize a matrix of vectors.
+
+    Args:
+        mode: "int8" or "binary"
+        vectors: float32 matrix (one vector per row)
+
+    Returns:
+        Tuple of (codes, scales); scales is empty for binary codes
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if mode == QUANTIZATION_INT8:
+        scales = int8_scales(vectors)
+        return quantize_int8(vectors, scales), scales
+    if mode == QUANTIZATION_BINARY:
+        return quantize_binary(vectors), np.empty(0, dtype=np.float32)
+    raise ValueError(f"Mode {mode} does not produce codes")
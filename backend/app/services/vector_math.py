@@ -0,0 +1,74 @@
+"""
+Vectorized similarity helpers shared by the in-process search paths
+"""
+
+from typing import List, Tuple, Union
+
+import numpy as np
+
+ArrayLike = Union[np.ndarray, List[float], List[List[float]]]
+
+
+def normalize_rows(vectors: ArrayLike) -> np.ndarray:
+    """
+    L2-normalize vectors so cosine similarity becomes a dot product.
+
+    Args:
+        vectors: 1D vector or 2D matrix (one vector per row)
+
+    Returns:
+        float32 array of the same shape; all-zero rows stay zero
+    """
+    matrix = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Indices of the k highest scores, best first, without a full sort.
+
+    Args:
+        scores: 1D array of scores
+        k: Number of indices to return
+
+    Returns:
+        Array of at most k indices ordered by descending score
+    """
+    n = scores.shape[0]
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype=np.int64)
+    if k < n:
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(n)
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+def top_k_indices_2d(scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Row-wise top-k over a (queries x documents) score matrix.
+
+    Args:
+        scores: 2D array of scores
+        k: Number of results per row
+
+    Returns:
+        Tuple of (indices, scores), each of shape (rows, min(k, columns))
+    """
+    n = scores.shape[1]
+    k = min(k, n)
+    if k <= 0:
+        empty = np.empty((scores.shape[0], 0))
+        return empty.astype(np.int64), empty.astype(scores.dtype)
+    if k < n:
+        candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        candidates = np.broadcast_to(np.arange(n), scores.shape)
+    candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+    order = np.argsort(-candidate_scores, axis=1, kind="stable")
+    return (
+        np.take_along_axis(candidates, order, axis=1),
+        np.take_along_axis(candidate_scores, order, axis=1),
+    )
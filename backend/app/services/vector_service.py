@@ -1,52 +1,146 @@
 """
 Vector Database Service
-Handles storage and retrieval of embeddings using Qdrant
+Handles storage and retrieval of embeddings using a pluggable backend
+(Qdrant by default, or the embedded local index)
 """
 
-from typing import List, Dict, Any, Optional
-from qdrant_client import QdrantClient
-from qdrant_client.models import (
-    Distance,
-    VectorParams,
-    PointStruct,
-    Filter,
-    FieldCondition,
-    MatchValue,
-)
-from qdrant_client.http import models
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import islice
+from typing import Callable, Iterable, Iterator, List, Dict, Any, Optional, Tuple, Union
+import hashlib
+import numpy as np
 import uuid
 
 from app.core.config import settings
+from app.services.embedding_service import get_embedding_service
+from app.services.vector_backends import VectorPoint, create_vector_backend
+
+# Namespace for deterministic point IDs (UUIDv5)
+POINT_ID_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, "report-assistant/note-embeddings")
+
+
+def make_point_id(note_id: int, chunk_index: int, model_name: str) -> str:
+    """
+    Deterministic point ID for a chunk, so retries overwrite instead of duplicating.
+
+    Args:
+        note_id: Database ID of the note
+        chunk_index: Index of the chunk within the note
+        model_name: Embedding model that produced the vector
+
+    Returns:
+        UUID string
+    """
+    return str(uuid.uuid5(POINT_ID_NAMESPACE, f"{note_id}:{chunk_index}:{model_name}"))
+
+
+def content_hash(chunk_text: str) -> str:
+    """SHA-256 of a chunk's text, used to skip unchanged chunks on re-index"""
+    return hashlib.sha256(chunk_text.encode("utf-8")).hexdigest()
 
 
 class VectorService:
-    """Service for vector database operations using Qdrant"""
-
-    def __init__(self):
-        """Initialize Qdrant client"""
-        self.client = QdrantClient(url=settings.QDRANT_URL)
-        self.collection_name = "note_embeddings"
-        self.embedding_dim = 384  # Dimension for all-MiniLM-L6-v2
-
-        # Create collection if it doesn't exist
-        self._ensure_collection_exists()
-
-    def _ensure_collection_exists(self):
-        """Create the collection if it doesn't exist"""
-        try:
-            self.client.get_collection(self.collection_name)
-        except Exception:
-            # Collection doesn't exist, create it
-            self.client.create_collection(
-                collection_name=self.collection_name,
-                vectors_config=VectorParams(
-                    size=self.embedding_dim, distance=Distance.COSINE
-                ),
-            )
+    """Service for vector database operations"""
+
+    def __init__(
+        self,
+        backend: Optional[str] = None,
+        quantization: Optional[str] = None,
+        collection_name: str = "note_embeddings",
+        embedding_dim: Optional[int] = None,
+    ):
+        """
+        Initialize the vector backend.
+
+        Args:
+            backend: Backend name overriding settings.VECTOR_BACKEND
+            quantization: "none", "int8", or "binary" for this collection,
+                overriding settings.VECTOR_QUANTIZATION
+            collection_name: Collection holding the embeddings
+            embedding_dim: Vector dimension (default: read from the loaded
+                EMBEDDING_MODEL_NAME model)
+        """
+        self.collection_name = collection_name
+        self.model_name = settings.EMBEDDING_MODEL_NAME
+        self.embedding_dim = (
+            embedding_dim or get_embedding_service().embedding_dimension
+        )
+
+        # Connects to Qdrant (creating the collection) or opens the local index
+        self.backend = create_vector_backend(
+            collection_name=self.collection_name,
+            embedding_dim=self.embedding_dim,
+            backend=backend,
+            quantization=quantization,
+        )
+
+    def _build_payload(
+        self,
+        note_id: int,
+        chunk_index: int,
+        chunk_text: str,
+        report_id: int,
+        user_id: int,
+        filename: str,
+        file_type: str,
+    ) -> Dict[str, Any]:
+        """Build the payload stored alongside each vector"""
+        return {
+            "note_id": note_id,
+            "chunk_index": chunk_index,
+            "chunk_text": chunk_text,
+            "report_id": report_id,
+            "user_id": user_id,
+            "filename": filename,
+            "file_type": file_type,
+            "content_hash": content_hash(chunk_text),
+            "model_name": self.model_name,
+        }
+
+    def build_point(
+        self,
+        note_id: int,
+        chunk_index: int,
+        chunk_text: str,
+        embedding: np.ndarray,
+        report_id: int,
+        user_id: int,
+        filename: str,
+        file_type: str,
+    ) -> VectorPoint:
+        """
+        Build the point of one chunk, for callers batching points themselves
+
+        Args:
+            note_id: Database ID of the note
+            chunk_index: Index of this chunk within the note
+            chunk_text: The actual text of this chunk
+            embedding: The embedding vector
+            report_id: ID of the report
+            user_id: ID of the user
+            filename: Original filename
+            file_type: Type of file
+
+        Returns:
+            Point with its deterministic ID and payload
+        """
+        return VectorPoint(
+            id=make_point_id(note_id, chunk_index, self.model_name),
+            vector=np.asarray(embedding, dtype=np.float32),
+            payload=self._build_payload(
+                note_id,
+                chunk_index,
+                chunk_text,
+                report_id,
+                user_id,
+                filename,
+                file_type,
+            ),
+        )
 
     def store_embedding(
         self,
-        embedding: List[float],
+        embedding: Union[np.ndarray, List[float]],
         note_id: int,
         chunk_index: int,
         chunk_text: str,
@@ -56,7 +150,7 @@ class VectorService:
         file_type: str,
     ) -> str:
         """
-        Store a single embedding in Qdrant
+        Store a single embedding
 
         Args:
             embedding: The embedding vector
@@ -69,31 +163,33 @@ class VectorService:
             file_type: Type of file (pdf, txt, etc.)
 
         Returns:
-            UUID of the stored point in Qdrant
-        """
-        point_id = str(uuid.uuid4())
-
-        point = PointStruct(
-            id=point_id,
-            vector=embedding,
-            payload={
-                "note_id": note_id,
-                "chunk_index": chunk_index,
-                "chunk_text": chunk_text,
-                "report_id": report_id,
-                "user_id": user_id,
-                "filename": filename,
-                "file_type": file_type,
-            },
-        )
+            UUID of the stored point (deterministic per note and chunk)
+        """
+        point_id = make_point_id(note_id, chunk_index, self.model_name)
 
-        self.client.upsert(collection_name=self.collection_name, points=[point])
+        self.backend.upsert(
+            [
+                VectorPoint(
+                    id=point_id,
+                    vector=np.asarray(embedding, dtype=np.float32),
+                    payload=self._build_payload(
+                        note_id,
+                        chunk_index,
+                        chunk_text,
+                        report_id,
+                        user_id,
+                        filename,
+                        file_type,
+                    ),
+                )
+            ]
+        )
 
         return point_id
 
     def store_embeddings_batch(
         self,
-        embeddings: List[List[float]],
+        embeddings: Union[np.ndarray, List[List[float]]],
         note_id: int,
         chunks: List[str],
         report_id: int,
@@ -105,7 +201,7 @@ class VectorService:
         Store multiple embeddings in batch (more efficient)
 
         Args:
-            embeddings: List of embedding vectors
+            embeddings: float32 matrix (one row per chunk) or list of vectors
             note_id: Database ID of the note
             chunks: List of text chunks corresponding to embeddings
             report_id: ID of the report
@@ -114,38 +210,247 @@ class VectorService:
             file_type: Type of file
 
         Returns:
-            List of UUIDs for the stored points
+            List of UUIDs for the stored points (deterministic per note and
+            chunk, so retrying a failed note overwrites instead of duplicating)
         """
-        points = []
-        point_ids = []
+        matrix = np.asarray(embeddings, dtype=np.float32)
+
+        self.store_embeddings_stream(
+            pairs=zip(chunks, matrix),
+            note_id=note_id,
+            report_id=report_id,
+            user_id=user_id,
+            filename=filename,
+            file_type=file_type,
+        )
 
-        for idx, (embedding, chunk_text) in enumerate(zip(embeddings, chunks)):
-            point_id = str(uuid.uuid4())
-            point_ids.append(point_id)
+        return [
+            make_point_id(note_id, idx, self.model_name)
+            for idx in range(min(len(matrix), len(chunks)))
+        ]
 
-            points.append(
-                PointStruct(
-                    id=point_id,
-                    vector=embedding,
-                    payload={
-                        "note_id": note_id,
-                        "chunk_index": idx,
-                        "chunk_text": chunk_text,
-                        "report_id": report_id,
-                        "user_id": user_id,
-                        "filename": filename,
-                        "file_type": file_type,
-                    },
+    def _iter_point_batches(
+        self,
+        pairs: Iterable[Tuple[str, np.ndarray]],
+        batch_size: int,
+        note_id: int,
+        report_id: int,
+        user_id: int,
+        filename: str,
+        file_type: str,
+        start_index: int,
+    ) -> Iterator[List[VectorPoint]]:
+        """Lazily turn (chunk, vector) pairs into bounded batches of points"""
+        iterator = enumerate(pairs, start=start_index)
+        while True:
+            batch = [
+                VectorPoint(
+                    id=make_point_id(note_id, idx, self.model_name),
+                    vector=np.asarray(vector, dtype=np.float32),
+                    payload=self._build_payload(
+                        note_id,
+                        idx,
+                        chunk_text,
+                        report_id,
+                        user_id,
+                        filename,
+                        file_type,
+                    ),
                 )
+                for idx, (chunk_text, vector) in islice(iterator, batch_size)
+            ]
+            if not batch:
+                return
+            yield batch
+
+    def store_embeddings_stream(
+        self,
+        pairs: Iterable[Tuple[str, np.ndarray]],
+        note_id: int,
+        report_id: int,
+        user_id: int,
+        filename: str,
+        file_type: str,
+        start_index: int = 0,
+        batch_size: Optional[int] = None,
+        max_workers: Optional[int] = None,
+    ) -> Dict[str, int]:
+        """
+        Stream (chunk, vector) pairs into the vector store in bounded batches
+
+        Batches are built lazily and sent through upsert_batches, so memory
+        stays flat however large the note is and the note is searchable on
+        return.
+
+        Args:
+            pairs: Iterable of (chunk_text, embedding) pairs in chunk order
+            note_id: Database ID of the note
+            report_id: ID of the report
+            user_id: ID of the user
+            filename: Original filename
+            file_type: Type of file
+            start_index: Chunk index of the first pair
+            batch_size: Points per request (default VECTOR_UPSERT_BATCH_SIZE)
+            max_workers: Concurrent requests (default VECTOR_UPSERT_WORKERS)
+
+        Returns:
+            Dict with the number of points and batches written
+        """
+        batch_size = batch_size or settings.VECTOR_UPSERT_BATCH_SIZE
+
+        batches = self._iter_point_batches(
+            pairs,
+            batch_size,
+            note_id,
+            report_id,
+            user_id,
+            filename,
+            file_type,
+            start_index,
+        )
+
+        return self.upsert_batches(batches, max_workers=max_workers)
+
+    def upsert_batches(
+        self,
+        batches: Iterable[List[VectorPoint]],
+        max_workers: Optional[int] = None,
+    ) -> Dict[str, int]:
+        """
+        Upsert an iterable of point batches with bounded concurrency
+
+        Batches are pulled lazily and sent by a small worker pool. At most
+        2 * max_workers batches are built or in flight at once, so the
+        producer blocks (backpressure) and memory stays flat. Intermediate
+        batches use wait=False; the final batch is sent with wait=True after
+        the others complete, so every point is searchable on return.
+
+        Args:
+            batches: Iterable of point batches (may be a generator)
+            max_workers: Concurrent requests (default VECTOR_UPSERT_WORKERS)
+
+        Returns:
+            Dict with the number of points and batches written
+        """
+        max_workers = max_workers or settings.VECTOR_UPSERT_WORKERS
+        max_pending = 2 * max_workers
+        batches = iter(batches)
+
+        points_written = 0
+        batches_written = 0
+        pending = set()
+
+        with ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="vector-upsert"
+        ) as executor:
+
+            def drain(limit: int):
+                # Wait until at most `limit` batches are in flight
+                nonlocal pending
+                while len(pending) > limit:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        future.result()  # Re-raise upsert errors
+
+            # Look one batch ahead so the last one can be sent with wait=True
+            previous = next(batches, None)
+            for batch in batches:
+                drain(max_pending - 1)
+                pending.add(executor.submit(self.backend.upsert, previous, False))
+                points_written += len(previous)
+                batches_written += 1
+                previous = batch
+
+            drain(0)
+
+        if previous:
+            self.backend.upsert(previous, wait=True)
+            points_written += len(previous)
+            batches_written += 1
+
+        return {"points": points_written, "batches": batches_written}
+
+    def reindex_note_embeddings(
+        self,
+        note_id: int,
+        chunks: List[str],
+        embed: Callable[[List[str]], np.ndarray],
+        report_id: int,
+        user_id: int,
+        filename: str,
+        file_type: str,
+    ) -> Dict[str, Any]:
+        """
+        Re-index a note, embedding and upserting only chunks whose text changed.
+
+        Chunks whose content hash matches the stored point are left alone;
+        points past the new last chunk (or from another model) are deleted.
+
+        Args:
+            note_id: Database ID of the note
+            chunks: Current text chunks of the note, in order
+            embed: Function embedding a list of texts into a float32 matrix
+            report_id: ID of the report
+            user_id: ID of the user
+            filename: Original filename
+            file_type: Type of file
+
+        Returns:
+            Dict with chunk counts (total, upserted, unchanged, deleted) and
+            the point IDs in chunk order
+        """
+        stored = {
+            hit.id: hit.payload
+            for hit in self.backend.get_note_points(note_id, user_id=user_id)
+        }
+        point_ids = [
+            make_point_id(note_id, idx, self.model_name) for idx in range(len(chunks))
+        ]
+
+        changed = [
+            idx
+            for idx, (point_id, chunk_text) in enumerate(zip(point_ids, chunks))
+            if stored.get(point_id, {}).get("content_hash") != content_hash(chunk_text)
+        ]
+
+        if changed:
+            vectors = np.asarray(
+                embed([chunks[idx] for idx in changed]), dtype=np.float32
+            )
+            self.backend.upsert(
+                [
+                    VectorPoint(
+                        id=point_ids[idx],
+                        vector=vector,
+                        payload=self._build_payload(
+                            note_id,
+                            idx,
+                            chunks[idx],
+                            report_id,
+                            user_id,
+                            filename,
+                            file_type,
+                        ),
+                    )
+                    for idx, vector in zip(changed, vectors)
+                ]
             )
 
-        self.client.upsert(collection_name=self.collection_name, points=points)
+        # Trailing chunks that no longer exist, or points from another model
+        stale = sorted(set(stored) - set(point_ids))
+        self.backend.delete_points(stale, user_id=user_id)
 
-        return point_ids
+        return {
+            "total": len(chunks),
+            "upserted": len(changed),
+            "unchanged": len(chunks) - len(changed),
+            "deleted": len(stale),
+            "point_ids": point_ids,
+        }
 
     def search_similar(
         self,
-        query_embedding: List[float],
+        query_embedding: Union[np.ndarray, List[float]],
         report_id: int,
         user_id: int,
         limit: int = 5,
@@ -164,30 +469,54 @@ class VectorService:
         Returns:
             List of search results with scores and metadata
         """
-        # Build filter
-        must_conditions = [
-            FieldCondition(key="report_id", match=MatchValue(value=report_id)),
-            FieldCondition(key="user_id", match=MatchValue(value=user_id)),
-        ]
+        results = self.backend.search(
+            query=np.asarray(query_embedding, dtype=np.float32),
+            report_id=report_id,
+            user_id=user_id,
+            limit=limit,
+            file_type_filter=file_type_filter,
+        )
 
-        if file_type_filter:
-            must_conditions.append(
-                FieldCondition(
-                    key="file_type", match=MatchValue(value=file_type_filter)
-                )
-            )
+        return self._format_results(results)
 
-        search_filter = Filter(must=must_conditions)
+    def search_similar_batch(
+        self,
+        query_embeddings: Union[np.ndarray, List[List[float]]],
+        report_id: int,
+        user_id: int,
+        limit: int = 5,
+        file_type_filter: Optional[str] = None,
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Search for similar embeddings with many queries in one backend call
 
-        # Perform search
-        results = self.client.query_points(
-            collection_name=self.collection_name,
-            query=query_embedding,
-            query_filter=search_filter,
+        Args:
+            query_embeddings: Query vectors (matrix with one row per query)
+            report_id: Filter by report ID
+            user_id: Filter by user ID
+            limit: Maximum number of results per query
+            file_type_filter: Optional filter by file type
+
+        Returns:
+            One list of search results per query, in query order
+        """
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        if len(queries) == 0:
+            return []
+
+        results = self.backend.search_batch(
+            queries=queries,
+            report_id=report_id,
+            user_id=user_id,
             limit=limit,
-        ).points
+            file_type_filter=file_type_filter,
+        )
+
+        return [self._format_results(query_results) for query_results in results]
 
-        # Format results
+    @staticmethod
+    def _format_results(results) -> List[Dict[str, Any]]:
+        """Format backend hits as API search results"""
         formatted_results = []
         for result in results:
             formatted_results.append(
@@ -203,33 +532,18 @@ class VectorService:
 
         return formatted_results
 
-    def delete_note_embeddings(self, note_id: int):
+    def delete_points(self, point_ids: List[str], user_id: Optional[int] = None):
+        """Delete embeddings by point ID"""
+        if point_ids:
+            self.backend.delete_points(point_ids, user_id=user_id)
+
+    def delete_note_embeddings(self, note_id: int, user_id: Optional[int] = None):
         """Delete all embeddings for a specific note"""
-        self.client.delete(
-            collection_name=self.collection_name,
-            points_selector=models.FilterSelector(
-                filter=Filter(
-                    must=[
-                        FieldCondition(key="note_id", match=MatchValue(value=note_id))
-                    ]
-                )
-            ),
-        )
+        self.backend.delete_note(note_id, user_id=user_id)
 
-    def delete_report_embeddings(self, report_id: int):
+    def delete_report_embeddings(self, report_id: int, user_id: Optional[int] = None):
         """Delete all embeddings for a specific report"""
-        self.client.delete(
-            collection_name=self.collection_name,
-            points_selector=models.FilterSelector(
-                filter=Filter(
-                    must=[
-                        FieldCondition(
-                            key="report_id", match=MatchValue(value=report_id)
-                        )
-                    ]
-                )
-            ),
-        )
+        self.backend.delete_report(report_id, user_id=user_id)
 
 
 # Global instance
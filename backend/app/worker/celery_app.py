@@ -3,6 +3,7 @@ Celery application configuration
 """
 
 from celery import Celery
+from celery.signals import worker_init, worker_process_init
 
 from app.core.config import settings
 
@@ -27,4 +28,46 @@ celery_app.conf.update(
     task_track_started=True,
     task_time_limit=30 * 60,  # 30 minutes
     task_soft_time_limit=25 * 60,  # 25 minutes
+    # Child processes load the embedding model in worker_process_init,
+    # which takes longer than the default 4s Celery allows before killing them
+    worker_proc_alive_timeout=120,
 )
+
+
+@worker_process_init.connect
+def warm_up_embedding_model(**kwargs):
+    """Load and warm the embedding model in each worker process before it takes tasks"""
+    if not settings.EMBEDDING_PRELOAD:
+        return
+
+    # Imported here so importing the Celery app stays cheap for producers
+    from app.services.embedding_service import preload_embedding_model
+
+    preload_embedding_model()
+
+
+@worker_init.connect
+def start_embedding_pool(sender=None, **kwargs):
+    """
+    Load the model and start the embedding pool in a solo or threads worker.
+
+    Those pools run tasks in the worker process itself, where
+    worker_process_init never fires. Prefork children are daemonic and
+    cannot start the pool (they encode in-process), so a worker meant to use
+    EMBEDDING_POOL_ENABLED runs with --pool solo or --pool threads.
+    """
+    pool = getattr(sender, "pool_cls", None)
+    pool_name = pool if isinstance(pool, str) else getattr(pool, "__module__", "")
+    if not pool_name or not any(name in pool_name for name in ("solo", "threads")):
+        return
+
+    if settings.EMBEDDING_PRELOAD:
+        from app.services.embedding_service import preload_embedding_model
+
+        preload_embedding_model()
+
+    if settings.EMBEDDING_POOL_ENABLED:
+        from app.services.embedding_pool import get_embedding_pool
+
+        # Fork the pool's workers before the worker starts its own threads
+        get_embedding_pool()
@@ -1,20 +1,172 @@
 """
 Embedding generation tasks
+
+Notes queued within EMBEDDING_COALESCE_WINDOW_SECONDS of each other are
+collected in a Redis list and indexed by a single task (see
+app.services.note_indexing_service.index_notes). The task moves the IDs it
+takes into an in-flight list and removes them only after they are indexed.
 """
 
+import math
+import time
+import uuid
+from typing import List, Optional
+
 from app.worker.celery_app import celery_app
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.services.note_indexing_service import index_notes
+
+# Note IDs waiting for the next coalesced batch
+PENDING_NOTES_KEY = "embedding:pending_notes"
+
+# In-flight list of a claimed batch, deleted once its notes are indexed
+IN_FLIGHT_PREFIX = "embedding:in_flight:"
+
+# Claim (or last retry) time of every in-flight batch
+IN_FLIGHT_BATCHES_KEY = "embedding:in_flight_batches"
+
+# Batches older than this belong to lost tasks (beyond the task time limit
+# plus a retry delay) and are requeued
+IN_FLIGHT_TIMEOUT_SECONDS = 60 * 60
+
+# Set while a flush task is scheduled; expires in case that task is lost
+FLUSH_SCHEDULED_KEY = "embedding:flush_scheduled"
+
+
+def _redis_client():
+    import redis
+
+    return redis.Redis.from_url(settings.REDIS_URL)
 
 
-@celery_app.task(name="app.worker.tasks.embedding.generate_embeddings")
-def generate_embeddings(note_id: str):
+def queue_note_embedding(note_id: int):
     """
-    Generate embeddings for note content.
+    Queue a note for embedding.
+
+    The first note of a window schedules a flush task after the window;
+    notes arriving before it runs join the same batch. Without Redis the
+    note is indexed by a task of its own.
+
+    Args:
+        note_id: ID of the note whose content is ready
+    """
+    try:
+        client = _redis_client()
+        client.rpush(PENDING_NOTES_KEY, note_id)
+        window = settings.EMBEDDING_COALESCE_WINDOW_SECONDS
+        if client.set(
+            FLUSH_SCHEDULED_KEY, 1, nx=True, ex=max(60, math.ceil(window * 10))
+        ):
+            generate_embeddings.apply_async(countdown=window)
+    except Exception as e:
+        print(f"Embedding queue unavailable ({e}), indexing note {note_id} alone")
+        generate_embeddings.delay([note_id])
+
+
+def _claim_pending_notes(batch_id: str) -> List[int]:
+    """
+    Move up to EMBEDDING_COALESCE_MAX_NOTES queued note IDs into a batch.
+
+    The IDs stay in the batch's in-flight list until _acknowledge_batch, so
+    a task that dies before indexing them does not lose them.
 
     Args:
-        note_id: ID of the note
+        batch_id: ID of the batch (the claiming task's ID)
 
     Returns:
-        dict: Processing result with embedding information
+        Distinct note IDs of the batch, in queue order
     """
-    # Placeholder - will be implemented in task 10
-    return {"status": "pending", "message": "Embedding generation not yet implemented"}
+    client = _redis_client()
+
+    # Notes queued from now on schedule a new flush
+    client.delete(FLUSH_SCHEDULED_KEY)
+    _requeue_stale_batches(client)
+
+    limit = settings.EMBEDDING_COALESCE_MAX_NOTES
+    pipe = client.pipeline()  # MULTI/EXEC, so concurrent claims never overlap
+    for _ in range(limit):
+        pipe.lmove(PENDING_NOTES_KEY, IN_FLIGHT_PREFIX + batch_id, "LEFT", "RIGHT")
+    pipe.zadd(IN_FLIGHT_BATCHES_KEY, {batch_id: time.time()})
+    pipe.llen(PENDING_NOTES_KEY)
+    *values, _, remaining = pipe.execute()
+
+    if remaining:
+        # More than one batch was queued: take the next one right away
+        generate_embeddings.delay()
+
+    return list(dict.fromkeys(int(value) for value in values if value is not None))
+
+
+def _requeue_stale_batches(client):
+    """Put the notes of batches not acknowledged in time back in the queue"""
+    deadline = time.time() - IN_FLIGHT_TIMEOUT_SECONDS
+    for batch_id in client.zrangebyscore(IN_FLIGHT_BATCHES_KEY, "-inf", deadline):
+        batch_id = batch_id.decode()
+        # One ID at a time, so concurrent requeues never duplicate a note
+        moved = 0
+        while client.lmove(
+            IN_FLIGHT_PREFIX + batch_id, PENDING_NOTES_KEY, "LEFT", "RIGHT"
+        ):
+            moved += 1
+        client.zrem(IN_FLIGHT_BATCHES_KEY, batch_id)
+        if moved:
+            print(f"Requeued {moved} notes of unfinished embedding batch {batch_id}")
+
+
+def _touch_batch(batch_id: str):
+    """Mark a batch as still being worked on (at the start of a retry)"""
+    _redis_client().zadd(IN_FLIGHT_BATCHES_KEY, {batch_id: time.time()}, xx=True)
+
+
+def _acknowledge_batch(batch_id: str):
+    """Drop a batch's in-flight list once its notes are indexed"""
+    pipe = _redis_client().pipeline()
+    pipe.delete(IN_FLIGHT_PREFIX + batch_id)
+    pipe.zrem(IN_FLIGHT_BATCHES_KEY, batch_id)
+    pipe.execute()
+
+
+@celery_app.task(
+    name="app.worker.tasks.embedding.generate_embeddings",
+    bind=True,
+    max_retries=3,
+    default_retry_delay=60,
+)
+def generate_embeddings(
+    self, note_ids: Optional[List[int]] = None, batch_id: Optional[str] = None
+):
+    """
+    Chunk, embed and store notes as one batch.
+
+    A failed batch is retried; a claimed batch that still fails after the
+    last retry is requeued once IN_FLIGHT_TIMEOUT_SECONDS have passed.
+
+    Args:
+        note_ids: Notes to index; when omitted, queued notes are claimed
+        batch_id: In-flight batch the notes were claimed into (on retries)
+
+    Returns:
+        dict: Number of notes indexed/failed and chunks embedded
+    """
+    if note_ids is None:
+        batch_id = self.request.id or uuid.uuid4().hex
+        note_ids = _claim_pending_notes(batch_id)
+    elif batch_id is not None:
+        _touch_batch(batch_id)
+
+    if note_ids:
+        db = SessionLocal()
+        try:
+            result = index_notes(db, note_ids)
+        except Exception as e:
+            print(f"Embedding batch of {len(note_ids)} notes failed: {e}")
+            raise self.retry(exc=e, kwargs={"note_ids": note_ids, "batch_id": batch_id})
+        finally:
+            db.close()
+    else:
+        result = {"indexed": 0, "failed": 0, "chunks": 0}
+
+    if batch_id is not None:
+        _acknowledge_batch(batch_id)
+    return {"status": "success", "note_ids": note_ids, **result}
@@ -12,7 +12,9 @@ from app.core.database import SessionLocal
 from app.models.note import Note
 from app.models.upload_job import UploadJob
 from app.services.ocr_service import ocr_service
+from app.services.progress_service import ProgressReporter, publish_note_status
 from app.services.storage_service import storage_service
+from app.worker.tasks.embedding_generation import queue_note_embedding
 
 
 @celery_app.task(name="app.worker.tasks.ocr.process_note", bind=True)
@@ -27,6 +29,8 @@ def process_note(self, upload_job_id: int):
         dict: Processing result with extracted text
     """
     db = SessionLocal()
+    progress = None
+    note = None
 
     try:
         # Get upload job
@@ -35,12 +39,10 @@ def process_note(self, upload_job_id: int):
             return {"status": "error", "message": "Upload job not found"}
 
         # Update upload job status
-        upload_job.status = "processing"
-        upload_job.progress = 10
-        db.commit()
+        progress = ProgressReporter(db, upload_job)
+        progress.set_status("processing", 10)
 
         # Get note if it exists
-        note = None
         if upload_job.note_id:
             note = db.query(Note).filter(Note.id == upload_job.note_id).first()
 
@@ -64,8 +66,7 @@ def process_note(self, upload_job_id: int):
             db.commit()
 
         # Update progress
-        upload_job.progress = 20
-        db.commit()
+        progress.update(20, "Downloading")
 
         # Download file from S3 to temporary file
         file_extension = os.path.splitext(upload_job.filename)[1].lower()
@@ -81,8 +82,7 @@ def process_note(self, upload_job_id: int):
                 tmp_file.flush()
 
                 # Update progress
-                upload_job.progress = 40
-                db.commit()
+                progress.update(40, "Extracting text")
 
                 # Extract text based on file type
                 extracted_text = ""
@@ -126,27 +126,20 @@ def process_note(self, upload_job_id: int):
                 else:
                     raise Exception(f"Unsupported file type: {file_extension}")
 
-                # Update progress
-                upload_job.progress = 80
-                db.commit()
-
                 # Update note with extracted content
                 note.content = extracted_text.strip()
-                note.status = "completed"
                 db.commit()
+                progress.update(90, "Queued for embedding")
 
-                # Update upload job
-                upload_job.status = "completed"
-                upload_job.progress = 100
-                upload_job.completed_at = datetime.utcnow()
-                db.commit()
+                # Embedding completes the note and the upload job
+                queue_note_embedding(note.id)
 
                 return {
                     "status": "success",
                     "note_id": note.id,
                     "word_count": metadata.get("word_count", 0),
                     "confidence": metadata.get("confidence", 0),
-                    "message": "Note processed successfully",
+                    "message": "Note text extracted, embedding queued",
                 }
 
             finally:
@@ -156,14 +149,17 @@ def process_note(self, upload_job_id: int):
 
     except Exception as e:
         # Update upload job and note with error
-        upload_job.status = "failed"
-        upload_job.error_message = str(e)
-
+        db.rollback()
         if note:
             note.status = "failed"
             note.processing_error = str(e)
 
-        db.commit()
+        if progress:
+            progress.set_status("failed", error_message=str(e))
+        else:
+            db.commit()
+        if note:
+            publish_note_status(note)
 
         return {"status": "error", "message": str(e)}
 
@@ -5,29 +5,40 @@ PDF processing tasks
 import os
 import tempfile
 from datetime import datetime
+from typing import Dict, List, Optional
+from sqlalchemy import func, insert, select, text
 from sqlalchemy.orm import Session
 
 from app.worker.celery_app import celery_app
+from app.core.config import settings
 from app.core.database import SessionLocal
 from app.models.template_structure import TemplateStructure, TemplateSection
 from app.models.upload_job import UploadJob
 from app.models.report import Report, ReportSection
 from app.services.pdf_service import pdf_service
+from app.services.progress_service import ProgressReporter
 from app.services.storage_service import storage_service
+from app.services.template_cache_service import template_cache_service
 
 
 @celery_app.task(name="app.worker.tasks.pdf.process_template", bind=True)
-def process_template(self, upload_job_id: int):
+def process_template(self, upload_job_id: int, content_hash: Optional[str] = None):
     """
     Process PDF template to extract structure.
 
+    A PDF whose structure is already cached (same content, same extractor
+    version) is not downloaded or opened again; only its sections are
+    created for the new report.
+
     Args:
         upload_job_id: ID of the upload job
+        content_hash: SHA-256 of the PDF, when known at upload time
 
     Returns:
         dict: Processing result with structure information
     """
     db = SessionLocal()
+    progress = None
 
     try:
         # Get upload job
@@ -36,106 +47,82 @@ def process_template(self, upload_job_id: int):
             return {"status": "error", "message": "Upload job not found"}
 
         # Update upload job status
-        upload_job.status = "processing"
-        upload_job.progress = 10
-        db.commit()
+        progress = ProgressReporter(db, upload_job)
+        progress.set_status("processing", 10)
 
         # Get report
         report = db.query(Report).filter(Report.id == upload_job.report_id).first()
         if not report:
-            upload_job.status = "failed"
-            upload_job.error_message = "Report not found"
-            db.commit()
+            progress.set_status("failed", error_message="Report not found")
             return {"status": "error", "message": "Report not found"}
 
-        # Download PDF from S3 to temporary file
-        upload_job.progress = 20
-        db.commit()
+        use_cache = settings.TEMPLATE_CACHE_ENABLED
+        cached = None
+        if use_cache and content_hash:
+            cached = template_cache_service.lookup(db, content_hash)
 
-        # Create temporary file
-        tmp_fd, tmp_path = tempfile.mkstemp(suffix=".pdf")
-        try:
-            # Download file from S3
+        file_content = None
+        if cached is None:
+            # Download PDF from S3
+            progress.update(20, "Downloading")
             file_content = storage_service.download_file(upload_job.file_path)
 
-            # Write to temporary file and close it properly
-            os.write(tmp_fd, file_content)
-            os.close(tmp_fd)  # Close the file descriptor
-
-            # Update progress
-            upload_job.progress = 40
-            db.commit()
-
-            # Extract text and structure from PDF
-            full_text, text_blocks, metadata = pdf_service.extract_text_from_pdf(
-                tmp_path
-            )
-
-            # Update progress
-            upload_job.progress = 60
-            db.commit()
-
-            # Identify sections
-            sections = pdf_service.identify_sections(text_blocks)
-
-            # Update progress
-            upload_job.progress = 80
-            db.commit()
-
-            # Create TemplateStructure record
-            template_structure = TemplateStructure(
-                report_id=report.id,
-                upload_job_id=upload_job.id,
-                filename=upload_job.filename,
-                file_path=upload_job.file_path,
-                total_pages=metadata.get("total_pages", 0),
-                full_text=full_text,
-                metadata=metadata,
-                status="completed",
-                processed_at=datetime.utcnow(),
-            )
-            db.add(template_structure)
-            db.flush()  # Get the ID
-
-            # Create TemplateSection records
-            _save_sections_recursive(
-                db, template_structure.id, sections, parent_id=None, order=0
-            )
-
-            # Create ReportSection records from template sections
-            _create_report_sections_from_template(db, report.id, template_structure.id)
-
-            # Update upload job
-            upload_job.status = "completed"
-            upload_job.progress = 100
-            upload_job.completed_at = datetime.utcnow()
-
-            # Commit all changes
-            db.commit()
-
-            return {
-                "status": "success",
-                "template_id": template_structure.id,
-                "total_pages": metadata.get("total_pages", 0),
-                "sections_count": len(sections),
-                "message": "PDF processed successfully",
-            }
-
-        finally:
-            # Clean up temporary file
-            try:
-                if os.path.exists(tmp_path):
-                    os.unlink(tmp_path)
-            except Exception as cleanup_error:
-                print(
-                    f"Warning: Could not delete temp file {tmp_path}: {cleanup_error}"
+            if use_cache:
+                # Key the cache by the bytes actually processed
+                downloaded_hash = template_cache_service.content_hash(file_content)
+                if downloaded_hash != content_hash:
+                    content_hash = downloaded_hash
+                    cached = template_cache_service.lookup(db, content_hash)
+
+        if cached is not None:
+            full_text, metadata, sections = cached
+        else:
+            full_text, metadata, sections = _extract_structure(progress, file_content)
+            if use_cache:
+                template_cache_service.store(
+                    db, content_hash, full_text, metadata, sections
                 )
 
+        # Update progress
+        progress.update(80, "Saving sections")
+
+        # Create TemplateStructure record
+        template_structure = TemplateStructure(
+            report_id=report.id,
+            upload_job_id=upload_job.id,
+            filename=upload_job.filename,
+            file_path=upload_job.file_path,
+            total_pages=metadata.get("total_pages", 0),
+            full_text=full_text,
+            pdf_metadata=metadata,
+            status="completed",
+            processed_at=datetime.utcnow(),
+        )
+        db.add(template_structure)
+        db.flush()  # Get the ID
+
+        # Create TemplateSection records
+        section_rows = _save_template_sections(db, template_structure.id, sections)
+
+        # Create ReportSection records from template sections
+        _create_report_sections(db, report.id, section_rows)
+
+        # Update upload job, committing all changes
+        progress.set_status("completed")
+
+        return {
+            "status": "success",
+            "template_id": template_structure.id,
+            "total_pages": metadata.get("total_pages", 0),
+            "sections_count": len(sections),
+            "cached": cached is not None,
+            "message": "PDF processed successfully",
+        }
+
     except Exception as e:
         # Update upload job with error
-        upload_job.status = "failed"
-        upload_job.error_message = str(e)
-        db.commit()
+        if progress:
+            progress.fail(str(e))
 
         return {"status": "error", "message": str(e)}
 
@@ -143,87 +130,152 @@ def process_template(self, upload_job_id: int):
         db.close()
 
 
-def _save_sections_recursive(
-    db: Session, template_id: int, sections: list, parent_id: int = None, order: int = 0
-) -> int:
+def _extract_structure(progress: ProgressReporter, file_content: bytes):
+    """
+    Extract text, metadata and sections from PDF bytes.
+
+    Args:
+        progress: Progress reporter of the upload job
+        file_content: PDF bytes
+
+    Returns:
+        Tuple of (full_text, metadata, sections)
+    """
+    # Create temporary file
+    tmp_fd, tmp_path = tempfile.mkstemp(suffix=".pdf")
+    try:
+        # Write to temporary file and close it properly
+        os.write(tmp_fd, file_content)
+        os.close(tmp_fd)  # Close the file descriptor
+
+        # Update progress
+        progress.update(40, "Extracting text and sections")
+
+        # Extract text and identify sections, reading each page once
+        return pdf_service.extract_structure(tmp_path)
+
+    finally:
+        # Clean up temporary file
+        try:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+        except Exception as cleanup_error:
+            print(f"Warning: Could not delete temp file {tmp_path}: {cleanup_error}")
+
+
+def _save_template_sections(
+    db: Session, template_id: int, sections: list
+) -> List[Dict]:
     """
-    Recursively save sections and their children.
+    Save a section tree as TemplateSection rows with bulk inserts.
+
+    The tree is flattened in document order (parents before children),
+    IDs are reserved up front (see _reserve_section_ids) so each row knows
+    its parent's ID, and all rows are written with one INSERT. The number of
+    round trips does not grow with the number of sections.
 
     Args:
         db: Database session
         template_id: Template structure ID
-        sections: List of PDFSection objects
-        parent_id: Parent section ID (None for root sections)
-        order: Starting order number
+        sections: List of PDFSection objects (root sections)
 
     Returns:
-        Next order number
+        The inserted rows (with "id" set), in document order
     """
-    current_order = order
-
-    for section in sections:
-        # Create section record
-        template_section = TemplateSection(
-            template_id=template_id,
-            parent_id=parent_id,
-            level=section.level,
-            order=current_order,
-            title=section.title,
-            content=section.content,
-            page_number=section.page_number,
-            position_top=section.position_top,
-            font_size=section.font_size,
-            font_name=section.font_name,
-            is_bold=1 if section.is_bold else 0,
-            word_count=section.word_count,
-        )
-        db.add(template_section)
-        db.flush()  # Get the ID
+    rows = []
+
+    def flatten(nodes: list, parent: Optional[Dict]):
+        for order, section in enumerate(nodes):
+            row = {
+                "id": None,
+                "template_id": template_id,
+                "parent_id": None,
+                "level": section.level,
+                "order": order,  # Order within parent
+                "title": section.title,
+                "content": section.content,
+                "page_number": section.page_number,
+                "position_top": section.position_top,
+                "font_size": section.font_size,
+                "font_name": section.font_name,
+                "is_bold": 1 if section.is_bold else 0,
+                "word_count": section.word_count,
+            }
+            rows.append((row, parent))
+            flatten(section.children, row)
 
-        # Save children recursively
-        if section.children:
-            _save_sections_recursive(
-                db,
-                template_id,
-                section.children,
-                parent_id=template_section.id,
-                order=0,
-            )
+    flatten(sections, None)
+    if not rows:
+        return []
 
-        current_order += 1
+    for (row, parent), row_id in zip(rows, _reserve_section_ids(db, len(rows))):
+        row["id"] = row_id
+        if parent is not None:
+            row["parent_id"] = parent["id"]
 
-    return current_order
+    # Core insert: the ORM bulk path would split the batch wherever
+    # parent_id switches between None and a value
+    section_rows = [row for row, _ in rows]
+    db.execute(insert(TemplateSection.__table__), section_rows)
+    return section_rows
 
 
-def _create_report_sections_from_template(
-    db: Session, report_id: int, template_id: int
-):
+def _reserve_section_ids(db: Session, count: int) -> List[int]:
     """
-    Create ReportSection records from TemplateSection records.
+    Reserve IDs for new TemplateSection rows in one query.
+
+    PostgreSQL takes them from the table's sequence. SQLite has no
+    sequences but allows a single writer: the template structure inserted
+    earlier in this transaction holds the write lock, so the IDs after the
+    current maximum stay free until commit.
 
     Args:
         db: Database session
-        report_id: Report ID
-        template_id: Template structure ID
+        count: Number of IDs
+
+    Returns:
+        Increasing IDs
     """
-    # Get all template sections for this template
-    template_sections = (
-        db.query(TemplateSection)
-        .filter(TemplateSection.template_id == template_id)
-        .order_by(TemplateSection.order)
-        .all()
-    )
+    if db.get_bind().dialect.name == "postgresql":
+        return db.scalars(
+            text(
+                "SELECT nextval(pg_get_serial_sequence('template_sections', 'id')) "
+                "FROM generate_series(1, :count)"
+            ),
+            {"count": count},
+        ).all()
 
-    # Create report sections from template sections
-    for template_section in template_sections:
-        report_section = ReportSection(
-            report_id=report_id,
-            title=template_section.title,
-            content=template_section.content or "",
-            order=template_section.order,
-            word_count=template_section.word_count,
-            is_completed=False,
-        )
-        db.add(report_section)
+    last_id = db.scalar(select(func.coalesce(func.max(TemplateSection.id), 0)))
+    return list(range(last_id + 1, last_id + 1 + count))
+
+
+def _create_report_sections(db: Session, report_id: int, section_rows: List[Dict]):
+    """
+    Create ReportSection records from saved template section rows.
+
+    Sections are ordered by their order within their parent, ties kept in
+    document order (as when they were read back ordered by order).
 
-    db.flush()
+    Args:
+        db: Database session
+        report_id: Report ID
+        section_rows: Rows returned by _save_template_sections
+    """
+    if not section_rows:
+        return
+
+    ordered = sorted(section_rows, key=lambda row: row["order"])
+    db.execute(
+        insert(ReportSection.__table__),
+        [
+            {
+                "report_id": report_id,
+                "title": row["title"],
+                "content": row["content"] or "",
+                "order": row["order"],
+                "word_count": row["word_count"],
+                "is_completed": False,
+            }
+            for row in ordered
+        ],
+    )
@@ -7,6 +7,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
+import asyncio
 import traceback
 
 from app.core.config import settings
@@ -18,10 +19,25 @@ async def lifespan(app: FastAPI):
     """Application lifespan events"""
     # Startup
     print(f"Starting {settings.PROJECT_NAME}...")
+
+    # Load and warm the embedding model off the event loop; /ready reports
+    # 503 until it is done, so traffic is only routed to a warm instance
+    if settings.EMBEDDING_PRELOAD:
+        from app.services.embedding_service import preload_embedding_model
+
+        app.state.embedding_preload = asyncio.create_task(
+            asyncio.to_thread(preload_embedding_model)
+        )
+
     yield
+
     # Shutdown
     print("Shutting down...")
 
+    from app.services.progress_hub import close_progress_hub
+
+    await close_progress_hub()
+
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -65,3 +81,36 @@ app.include_router(api_router, prefix=settings.API_V1_STR)
 async def health_check():
     """Health check endpoint"""
     return {"status": "healthy", "service": settings.PROJECT_NAME}
+
+
+@app.get("/ready")
+async def readiness_check():
+    """Readiness endpoint: 503 until the embedding model is loaded and warm"""
+    from app.services.embedding_service import get_embedding_service
+
+    model = get_embedding_service().get_startup_stats()
+    if model.get("warmed_up") or not settings.EMBEDDING_PRELOAD:
+        # Without preloading the model loads lazily on first use
+        return {"status": "ready", "embedding_model": model}
+
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={
+            "status": "failed" if "error" in model else "starting",
+            "embedding_model": model,
+        },
+    )
+
+
+@app.get("/metrics/embeddings")
+async def embedding_metrics():
+    """Embedding micro-batching, cache, process pool and startup metrics"""
+    from app.services.embedding_service import get_embedding_service
+
+    service = get_embedding_service()
+    return {
+        "batching": service.get_batching_stats(),
+        "cache": service.get_cache_stats(),
+        "pool": service.get_pool_stats(),
+        "startup": service.get_startup_stats(),
+    }
@@ -0,0 +1,145 @@
+"""
+Chunker benchmark: legacy character chunker vs token-aware streaming chunker.
+
+Reports throughput, peak memory and how many chunks exceed the model's
+token window (and would be silently truncated when embedded). The legacy
+implementation is reproduced below as it was before the token chunker.
+
+Usage (from backend/):
+    python -m scripts.benchmark_chunker --megabytes 2
+    python -m scripts.benchmark_chunker --megabytes 2 --real-tokenizer
+"""
+
+import argparse
+import gc
+import random
+import re
+import time
+import tracemalloc
+
+from app.services.text_chunker import TokenChunker
+
+
+def legacy_chunk_text(text: str, max_chunk_size: int = 500, overlap: int = 50):
+    """The character-based EmbeddingService.chunk_text this replaced"""
+    if not text or not text.strip():
+        return []
+
+    sentences = re.split(r"(?<=[.!?])\s+", text)
+    sentences = [s.strip() for s in sentences if s.strip()]
+
+    chunks = []
+    current_chunk = []
+    current_length = 0
+    chunk_index = 0
+
+    for sentence in sentences:
+        sentence_length = len(sentence)
+
+        if current_length + sentence_length > max_chunk_size and current_chunk:
+            chunks.append((" ".join(current_chunk), chunk_index))
+            chunk_index += 1
+
+            if overlap > 0 and len(current_chunk) > 1:
+                current_chunk = [current_chunk[-1]]
+                current_length = len(current_chunk[0])
+            else:
+                current_chunk = []
+                current_length = 0
+
+        current_chunk.append(sentence)
+        current_length += sentence_length + 1
+
+    if current_chunk:
+        chunks.append((" ".join(current_chunk), chunk_index))
+
+    return chunks
+
+
+def _synthetic_note(megabytes: float) -> str:
+    """Research-note-like text with acronyms, citations and long sentences"""
+    rng = random.Random(42)
+    words = (
+        "the model transformer attention gradient descent BERT Navier-Stokes "
+        "equation smith2020 dataset baseline ablation results show that our "
+        "approach improves accuracy by a significant margin over prior work "
+        "in low-resource settings with fine-tuning regularization"
+    ).split()
+    parts = []
+    size = 0
+    target = int(megabytes * 1_000_000)
+    while size < target:
+        length = rng.choice([8, 15, 25, 40, 120])
+        sentence = " ".join(rng.choice(words) for _ in range(length)).capitalize()
+        sentence += rng.choice([". ", "? ", ".\n\n"])
+        parts.append(sentence)
+        size += len(sentence)
+    return "".join(parts)
+
+
+def _run(label: str, chunk_iter, count_tokens, max_tokens: int):
+    """Time one pass, then measure peak memory and over-budget chunks"""
+    started = time.perf_counter()
+    chunks = sum(1 for _ in chunk_iter())
+    elapsed = time.perf_counter() - started
+
+    # tracemalloc slows allocation-heavy code, so memory gets its own pass
+    gc.collect()
+    tracemalloc.start()
+    for _ in chunk_iter():
+        pass
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    over_budget = sum(
+        1 for chunk_text, _ in chunk_iter() if count_tokens(chunk_text) > max_tokens
+    )
+    print(
+        f"{label:<28} {chunks:7d} chunks   {elapsed * 1000:8.1f} ms   "
+        f"peak {peak / 1e6:7.2f} MB   over {max_tokens} tokens: "
+        f"{over_budget} ({over_budget / max(chunks, 1):.1%})"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--megabytes", type=float, default=2.0)
+    parser.add_argument("--max-tokens", type=int, default=254)
+    parser.add_argument("--overlap-tokens", type=int, default=32)
+    parser.add_argument(
+        "--real-tokenizer",
+        action="store_true",
+        help="Count tokens with the configured model's tokenizer",
+    )
+    args = parser.parse_args()
+
+    tokenizer = None
+    if args.real_tokenizer:
+        from app.services.embedding_service import get_embedding_service
+
+        tokenizer = get_embedding_service().tokenizer
+
+    chunker = TokenChunker(args.max_tokens, args.overlap_tokens, tokenizer)
+
+    text = _synthetic_note(args.megabytes)
+    print(
+        f"Note: {len(text) / 1e6:.2f} MB, tokenizer: "
+        f"{type(tokenizer).__name__ if tokenizer else 'regex fallback'}"
+    )
+    print("-" * 100)
+    _run(
+        "legacy chunk_text (500 ch)",
+        lambda: legacy_chunk_text(text),
+        chunker.count_tokens,
+        args.max_tokens,
+    )
+    _run(
+        "TokenChunker.iter_chunks",
+        lambda: chunker.iter_chunks(text),
+        chunker.count_tokens,
+        args.max_tokens,
+    )
+
+
+if __name__ == "__main__":
+    main()
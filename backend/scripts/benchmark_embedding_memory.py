@@ -0,0 +1,97 @@
+"""
+Memory benchmark: Python-list embeddings vs float32 NumPy arrays.
+
+Compares the memory held by N chunk embeddings when they travel as nested
+Python lists (the old generate_embeddings path) versus a contiguous float32
+matrix (encode_array), plus the extra copy made when the list path is turned
+back into an array for similarity search.
+
+Usage (from backend/):
+    python -m scripts.benchmark_embedding_memory --chunks 5000
+    python -m scripts.benchmark_embedding_memory --chunks 2000 --real-model
+"""
+
+import argparse
+import gc
+import time
+import tracemalloc
+
+import numpy as np
+
+
+def _measure(label: str, build):
+    """Run build() under tracemalloc and report retained/peak memory"""
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - started
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f"{label:<42} retained {retained / 1e6:8.2f} MB   "
+        f"peak {peak / 1e6:8.2f} MB   {elapsed * 1000:8.1f} ms"
+    )
+    return result, retained
+
+
+def _synthetic_model_output(chunks: int, dim: int) -> np.ndarray:
+    """Stand-in for SentenceTransformer.encode output"""
+    rng = np.random.default_rng(42)
+    return rng.standard_normal((chunks, dim), dtype=np.float32)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--chunks", type=int, default=5000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument(
+        "--real-model",
+        action="store_true",
+        help="Embed synthetic chunks with the configured model instead of random vectors",
+    )
+    args = parser.parse_args()
+
+    if args.real_model:
+        from app.services.embedding_service import get_embedding_service
+
+        service = get_embedding_service()
+        texts = [
+            f"Chunk {i}: lorem ipsum dolor sit amet, consectetur adipiscing elit."
+            for i in range(args.chunks)
+        ]
+        print(f"Encoding {args.chunks} chunks with {service.model_name}...")
+        model_output = service.encode_array(texts)
+    else:
+        model_output = _synthetic_model_output(args.chunks, args.dim)
+
+    print("=" * 80)
+    print(f"{args.chunks} chunks x {model_output.shape[1]} dims")
+    print("=" * 80)
+
+    # Old path: .tolist() at the service, then np.array() again for similarity
+    as_lists, list_bytes = _measure(
+        "list path: encode(...).tolist()", lambda: model_output.tolist()
+    )
+    _measure(
+        "list path: np.array(lists) for search",
+        lambda: np.array(as_lists),
+    )
+    del as_lists
+
+    # New path: contiguous float32 matrix end-to-end
+    as_array, array_bytes = _measure(
+        "array path: encode_array(...)",
+        lambda: np.ascontiguousarray(model_output, dtype=np.float32).copy(),
+    )
+    _measure(
+        "array path: np.asarray(matrix) for search",
+        lambda: np.asarray(as_array, dtype=np.float32),
+    )
+
+    print("-" * 80)
+    print(f"Lists use {list_bytes / max(array_bytes, 1):.1f}x the memory of the array")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Embedding pool benchmark: in-process encode vs the multi-process pool.
+
+Chunks a synthetic set of notes (default 1,000 pages) and embeds every chunk
+once in-process and once per pool size, reporting throughput, speedup over
+the in-process run, parallel efficiency and the largest difference from the
+in-process embeddings. Cache is bypassed so the model does all the work.
+
+Usage (from backend/):
+    python -m scripts.benchmark_embedding_pool
+    python -m scripts.benchmark_embedding_pool --pages 200 --processes 1 2 4 8
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+from app.services.embedding_pool import EmbeddingProcessPool
+from app.services.embedding_service import get_embedding_service
+from scripts.benchmark_chunker import _synthetic_note
+
+# Characters on a typical page of notes
+PAGE_CHARS = 3000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pages", type=int, default=1000)
+    parser.add_argument("--processes", type=int, nargs="*", default=None)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--start-method", default="fork")
+    args = parser.parse_args()
+
+    cpus = os.cpu_count() or 1
+    process_counts = args.processes or sorted(
+        {count for count in (1, 2, 4, 8, 16, cpus) if count <= cpus}
+    )
+
+    service = get_embedding_service()
+    service.warm_up()
+
+    text = _synthetic_note(args.pages * PAGE_CHARS / 1e6)
+    chunks = [chunk for chunk, _ in service.iter_chunks(text)]
+    print(
+        f"Notes: {args.pages} pages, {len(chunks)} chunks, {cpus} CPUs, "
+        f"start method {args.start_method}"
+    )
+    print("-" * 86)
+
+    started = time.perf_counter()
+    reference = np.asarray(service._encode_batch(chunks), dtype=np.float32)
+    baseline = time.perf_counter() - started
+    print(
+        f"{'in-process':<14} {baseline:8.2f} s   "
+        f"{len(chunks) / baseline:8.1f} chunks/s"
+    )
+
+    for processes in process_counts:
+        pool = EmbeddingProcessPool(
+            processes=processes,
+            batch_size=args.batch_size,
+            start_method=args.start_method,
+        )
+        try:
+            started = time.perf_counter()
+            embeddings = pool.encode_array(chunks)
+            elapsed = time.perf_counter() - started
+        finally:
+            pool.close()
+
+        speedup = baseline / elapsed
+        print(
+            f"{f'pool x{processes}':<14} {elapsed:8.2f} s   "
+            f"{len(chunks) / elapsed:8.1f} chunks/s   speedup {speedup:5.2f}x   "
+            f"efficiency {speedup / processes:5.1%}   "
+            f"max diff {np.abs(embeddings - reference).max():.2e}"
+        )
+
+
+if __name__ == "__main__":
+    main()
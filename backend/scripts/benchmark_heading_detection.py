@@ -0,0 +1,249 @@
+"""
+Heading detection benchmark: per-block pattern loop vs PDFService.
+
+Checks PDFService.identify_sections against a set of golden headings and
+against the previous per-block classifier (nine re.match calls and a font
+check per block, kept below as the reference) on the template generated by
+scripts/create_test_template.py, scaled up to several page counts. Reports
+the time spent classifying and building sections, excluding extraction.
+Exits non-zero if any output differs.
+
+Usage (from backend/):
+    python -m scripts.benchmark_heading_detection
+    python -m scripts.benchmark_heading_detection --pages 500 2000
+"""
+
+import argparse
+import re
+import sys
+import tempfile
+import time
+from typing import List
+
+from app.services.pdf_service import PDFSection, PDFService, PDFTextBlock
+from scripts.benchmark_pdf_extraction import _generate_template, _scaled_copy
+
+# Reference classifier (the implementation before the single-regex version)
+REFERENCE_PATTERNS = [
+    r"^\d+\.\s+",
+    r"^\d+\.\d+\s+",
+    r"^\d+\.\d+\.\d+\s+",
+    r"^[A-Z][A-Z\s]+$",
+    r"^Chapter\s+\d+",
+    r"^Section\s+\d+",
+    r"^Part\s+[IVX]+",
+    r"^[IVX]+\.\s+",
+    r"^[A-Z]\.\s+",
+]
+
+# (text, font size, font name, expected level or None) against an average
+# font size of 12
+GOLDEN_BLOCKS = [
+    ("1. Introduction", 12.0, "Helvetica", 1),
+    ("body text of the introduction", 12.0, "Helvetica", None),
+    ("1.1 Background", 12.0, "Helvetica", 2),
+    ("1.1.1 Details", 12.0, "Helvetica", 3),
+    ("2.3.4.5 Deep numbering", 12.0, "Helvetica", None),
+    ("1.2 Numbered and large", 22.0, "Helvetica", 2),
+    ("12.5 percent of users", 12.0, "Helvetica", 2),
+    ("INTRODUCTION AND SCOPE", 12.0, "Helvetica", 5),
+    ("ONE TWO THREE FOUR FIVE SIX SEVEN EIGHT NINE TEN ELEVEN", 12.0, "Helvetica", 5),
+    (
+        "ONE, TWO, THREE, FOUR, FIVE, SIX, SEVEN, EIGHT, NINE, TEN, ELEVEN",
+        12.0,
+        "Helvetica",
+        None,
+    ),
+    ("(NASA)", 12.0, "Helvetica", 5),
+    ("Chapter 3 Methods", 12.0, "Helvetica", 5),
+    ("Section 2", 12.0, "Helvetica", 5),
+    ("Part II", 12.0, "Helvetica", 5),
+    ("IV. Results", 12.0, "Helvetica", 5),
+    ("B. Second Section", 12.0, "Helvetica", 5),
+    ("Large Title", 22.0, "Helvetica", 1),
+    ("Medium title", 18.0, "Helvetica", 2),
+    ("Smaller title", 16.0, "Helvetica", 3),
+    ("Barely larger", 14.5, "Helvetica", 4),
+    ("Slightly larger", 14.0, "Helvetica", None),
+    ("Bold lead-in", 12.0, "Helvetica-Bold", 5),
+    ("Bold but small", 10.0, "Helvetica-Bold", None),
+    ("closing body text.", 12.0, "Helvetica", None),
+]
+
+
+def _reference_is_heading(block, avg_font_size: float) -> bool:
+    if block.font_size > avg_font_size * 1.2:
+        return True
+    if block.is_bold and block.font_size >= avg_font_size:
+        return True
+    for pattern in REFERENCE_PATTERNS:
+        if re.match(pattern, block.text):
+            return True
+    if block.text.isupper() and len(block.text.split()) <= 10:
+        return True
+    return False
+
+
+def _reference_level(block, avg_font_size: float) -> int:
+    if re.match(r"^\d+\.\d+\.\d+\s+", block.text):
+        return 3
+    elif re.match(r"^\d+\.\d+\s+", block.text):
+        return 2
+    elif re.match(r"^\d+\.\s+", block.text):
+        return 1
+    size_ratio = block.font_size / avg_font_size
+    if size_ratio >= 1.8:
+        return 1
+    elif size_ratio >= 1.5:
+        return 2
+    elif size_ratio >= 1.3:
+        return 3
+    elif size_ratio >= 1.1:
+        return 4
+    return 5
+
+
+def _reference_sections(blocks: List, avg_font_size: float) -> List[PDFSection]:
+    sections = []
+    current_section = None
+    current_content = []
+    for block in blocks:
+        if _reference_is_heading(block, avg_font_size):
+            if current_section:
+                current_section.content = " ".join(current_content).strip()
+                current_section.word_count = len(current_section.content.split())
+                sections.append(current_section)
+            current_section = PDFSection(
+                title=block.text,
+                level=_reference_level(block, avg_font_size),
+                content="",
+                page_number=block.page_number,
+                position_top=block.position_top,
+                font_size=block.font_size,
+                font_name=block.font_name,
+                is_bold=block.is_bold,
+                word_count=0,
+                children=[],
+            )
+            current_content = []
+        elif current_section:
+            current_content.append(block.text)
+    if current_section:
+        current_section.content = " ".join(current_content).strip()
+        current_section.word_count = len(current_section.content.split())
+        sections.append(current_section)
+    return PDFService._build_hierarchy(sections)
+
+
+def _flatten(sections: List[PDFSection]) -> List[tuple]:
+    """Section fields in document order, with their depth in the tree"""
+    rows = []
+
+    def walk(nodes, depth):
+        for section in nodes:
+            rows.append(
+                (
+                    depth,
+                    section.title,
+                    section.level,
+                    section.content,
+                    section.word_count,
+                    section.page_number,
+                    section.position_top,
+                    section.font_size,
+                    section.font_name,
+                    section.is_bold,
+                )
+            )
+            walk(section.children, depth + 1)
+
+    walk(sections, 0)
+    return rows
+
+
+def check_golden() -> bool:
+    """Check identify_sections against the golden headings"""
+    blocks = [
+        PDFTextBlock(
+            text=text,
+            page_number=1,
+            position_top=float(index * 20),
+            font_size=font_size,
+            font_name=font_name,
+            is_bold="bold" in font_name.lower(),
+            bbox=(50.0, float(index * 20), 500.0, float(index * 20 + 14)),
+        )
+        for index, (text, font_size, font_name, _) in enumerate(GOLDEN_BLOCKS)
+    ]
+    expected = [(text, level) for text, _, _, level in GOLDEN_BLOCKS if level]
+    current = _flatten(PDFService.identify_sections(blocks, avg_font_size=12.0))
+    reference = _flatten(_reference_sections(blocks, 12.0))
+    found = [(row[1], row[2]) for row in current]
+
+    passed = found == expected and current == reference
+    print(
+        f"Golden headings: {len(expected)} of {len(blocks)} blocks, "
+        f"{'match' if passed else 'MISMATCH'}"
+    )
+    if found != expected:
+        for item in sorted(set(expected) ^ set(found)):
+            print(f"  {'missing' if item in expected else 'unexpected'}: {item}")
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--template", default=None)
+    parser.add_argument("--pages", type=int, nargs="*", default=[100, 500, 2000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    passed = check_golden()
+
+    with tempfile.TemporaryDirectory() as directory:
+        template = args.template or _generate_template(directory)
+        print("-" * 86)
+
+        for pages in args.pages:
+            path = _scaled_copy(template, pages, directory)
+            _, store, _ = PDFService.extract_text_from_pdf(path, parallel=False)
+            blocks = [
+                PDFTextBlock(
+                    text=view.text,
+                    page_number=view.page_number,
+                    position_top=view.position_top,
+                    font_size=view.font_size,
+                    font_name=view.font_name,
+                    is_bold=view.is_bold,
+                    bbox=view.bbox,
+                )
+                for view in store
+            ]
+            avg_font_size = sum(block.font_size for block in blocks) / len(blocks)
+
+            reference_time = current_time = float("inf")
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                reference = _reference_sections(blocks, avg_font_size)
+                reference_time = min(reference_time, time.perf_counter() - started)
+
+                started = time.perf_counter()
+                current = PDFService.identify_sections(store, avg_font_size)
+                current_time = min(current_time, time.perf_counter() - started)
+
+            identical = _flatten(current) == _flatten(reference)
+            passed = passed and identical
+            print(
+                f"{pages:5d} pages  {len(store):7d} spans   "
+                f"reference {reference_time * 1000:8.1f} ms   "
+                f"current {current_time * 1000:7.1f} ms   "
+                f"speedup {reference_time / current_time:5.1f}x   "
+                f"identical: {identical}"
+            )
+
+    if not passed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+PDF extraction benchmark: serial vs per-page process pool.
+
+Scales the template generated by scripts/create_test_template.py (repo
+root) up to several page counts by concatenating copies, then times
+PDFService.extract_text_from_pdf serially and in parallel and checks that
+both return identical text, blocks and metadata.
+
+Usage (from backend/):
+    python -m scripts.benchmark_pdf_extraction
+    python -m scripts.benchmark_pdf_extraction --template PFE_Project_Template.pdf
+    python -m scripts.benchmark_pdf_extraction --pages 300 1000 --processes 4
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import fitz
+
+from app.core.config import settings
+from app.services.pdf_service import PDFService
+
+TEMPLATE_SCRIPT = os.path.join(
+    os.path.dirname(__file__), "..", "..", "scripts", "create_test_template.py"
+)
+
+
+def _generate_template(directory: str) -> str:
+    """Run create_test_template.py (needs reportlab) inside directory"""
+    subprocess.run(
+        [sys.executable, os.path.abspath(TEMPLATE_SCRIPT)],
+        cwd=directory,
+        check=True,
+        stdout=subprocess.DEVNULL,
+    )
+    return os.path.join(directory, "PFE_Project_Template.pdf")
+
+
+def _scaled_copy(template: str, pages: int, directory: str) -> str:
+    """Concatenate copies of the template until it has `pages` pages"""
+    source = fitz.open(template)
+    scaled = fitz.open()
+    while len(scaled) < pages:
+        remaining = pages - len(scaled)
+        scaled.insert_pdf(source, to_page=min(len(source), remaining) - 1)
+    path = os.path.join(directory, f"template_{pages}.pdf")
+    scaled.save(path)
+    scaled.close()
+    source.close()
+    return path
+
+
+def _timed(path: str, parallel: bool):
+    started = time.perf_counter()
+    result = PDFService.extract_text_from_pdf(path, parallel=parallel)
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--template", default=None)
+    parser.add_argument("--pages", type=int, nargs="*", default=[100, 300, 1000])
+    parser.add_argument(
+        "--processes", type=int, default=0, help="0 = PDF_EXTRACT_PROCESSES"
+    )
+    args = parser.parse_args()
+
+    if args.processes:
+        settings.PDF_EXTRACT_PROCESSES = args.processes
+
+    with tempfile.TemporaryDirectory() as directory:
+        template = args.template or _generate_template(directory)
+        print(
+            f"Template: {os.path.basename(template)}, "
+            f"{settings.PDF_EXTRACT_PROCESSES or os.cpu_count()} processes"
+        )
+        print("-" * 86)
+
+        for pages in args.pages:
+            path = _scaled_copy(template, pages, directory)
+            serial, serial_time = _timed(path, parallel=False)
+            parallel, parallel_time = _timed(path, parallel=True)
+
+            identical = (
+                serial[0] == parallel[0]
+                and serial[1] == parallel[1]
+                and serial[2] == parallel[2]
+            )
+            print(
+                f"{pages:5d} pages  {len(serial[1]):7d} spans   "
+                f"serial {serial_time:6.2f} s   parallel {parallel_time:6.2f} s   "
+                f"speedup {serial_time / parallel_time:5.2f}x   "
+                f"identical: {identical}"
+            )
+
+
+if __name__ == "__main__":
+    main()
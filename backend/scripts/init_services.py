@@ -7,6 +7,7 @@ from botocore.exceptions import ClientError
 from qdrant_client import QdrantClient
 from qdrant_client.models import Distance, VectorParams
 from app.core.config import settings
+from app.services.vector_backends.qdrant import PAYLOAD_INDEXES
 
 
 def init_s3_bucket():
@@ -51,6 +52,17 @@ def init_qdrant_collection():
                 vectors_config=VectorParams(size=384, distance=Distance.COSINE),
             )
             print(f"✓ Created collection '{collection_name}'")
+
+        # Filtered search and deletes need payload indexes to stay fast
+        existing = client.get_collection(collection_name).payload_schema or {}
+        for field_name, field_schema in PAYLOAD_INDEXES.items():
+            if field_name not in existing:
+                client.create_payload_index(
+                    collection_name=collection_name,
+                    field_name=field_name,
+                    field_schema=field_schema,
+                )
+                print(f"✓ Created payload index '{field_name}'")
     except Exception as e:
         print(f"✗ Failed to initialize Qdrant collection: {e}")
         raise
@@ -0,0 +1,173 @@
+"""
+Migrate existing Qdrant note embedding collections.
+
+Commands (run from backend/):
+    python -m scripts.migrate_vector_collections indexes
+        Create missing payload indexes (user_id, report_id, note_id,
+        file_type) on the shared collection.
+
+    python -m scripts.migrate_vector_collections tenant-index
+        Add the tenant_id keyword to every point of the shared collection and
+        create its is_tenant index. Then set
+        QDRANT_COLLECTION_LAYOUT=tenant_index.
+
+    python -m scripts.migrate_vector_collections per-user [--drop-source]
+        Copy every point of the shared collection into one collection per
+        user. Then set QDRANT_COLLECTION_LAYOUT=per_user.
+
+    python -m scripts.migrate_vector_collections quantize --mode int8
+        Switch every note embedding collection to int8 / binary quantization
+        (or back to none). Then set VECTOR_QUANTIZATION to the same mode.
+"""
+
+import argparse
+import time
+
+from qdrant_client.models import FieldCondition, Filter, MatchValue, PointStruct
+
+from app.core.config import settings
+from app.services.embedding_service import get_embedding_service
+from app.services.vector_backends.quantization import QUANTIZATION_MODES
+from app.services.vector_backends.qdrant import (
+    LAYOUT_PER_USER,
+    LAYOUT_SHARED,
+    LAYOUT_TENANT_INDEX,
+    TENANT_FIELD,
+    QdrantVectorBackend,
+)
+
+COLLECTION_NAME = "note_embeddings"
+
+
+def _backend(layout: str, quantization: str = "none") -> QdrantVectorBackend:
+    return QdrantVectorBackend(
+        url=settings.QDRANT_URL,
+        collection_name=COLLECTION_NAME,
+        # Only used when creating collections; read from the loaded model
+        embedding_dim=get_embedding_service().embedding_dimension,
+        layout=layout,
+        quantization=quantization,
+    )
+
+
+def _scroll(backend: QdrantVectorBackend, with_vectors: bool, batch_size: int):
+    """Yield pages of points from the shared collection"""
+    offset = None
+    while True:
+        records, offset = backend.client.scroll(
+            collection_name=COLLECTION_NAME,
+            limit=batch_size,
+            offset=offset,
+            with_payload=True,
+            with_vectors=with_vectors,
+        )
+        if records:
+            yield records
+        if offset is None:
+            return
+
+
+def create_indexes():
+    """Create missing payload indexes on the shared collection"""
+    backend = _backend(LAYOUT_SHARED)
+    created = backend.ensure_payload_indexes(COLLECTION_NAME)
+    if created:
+        print(f"✓ Created payload indexes: {', '.join(created)}")
+    else:
+        print("✓ All payload indexes already exist")
+
+
+def migrate_tenant_index(batch_size: int):
+    """Tag points with tenant_id and create the is_tenant index"""
+    backend = _backend(LAYOUT_SHARED)
+
+    user_ids = set()
+    for records in _scroll(backend, with_vectors=False, batch_size=batch_size):
+        user_ids.update(record.payload["user_id"] for record in records)
+
+    for user_id in sorted(user_ids):
+        backend.client.set_payload(
+            collection_name=COLLECTION_NAME,
+            payload={TENANT_FIELD: str(user_id)},
+            points=Filter(
+                must=[FieldCondition(key="user_id", match=MatchValue(value=user_id))]
+            ),
+        )
+        print(f"  tagged points of user {user_id}")
+
+    created = _backend(LAYOUT_TENANT_INDEX).ensure_payload_indexes(COLLECTION_NAME)
+    print(f"✓ Tenant index ready ({len(user_ids)} users, created: {created or 'none'})")
+
+
+def migrate_per_user(batch_size: int, drop_source: bool):
+    """Copy points from the shared collection into per-user collections"""
+    source = _backend(LAYOUT_SHARED)
+    target = _backend(LAYOUT_PER_USER)
+
+    copied = 0
+    started = time.perf_counter()
+    for records in _scroll(source, with_vectors=True, batch_size=batch_size):
+        grouped = {}
+        for record in records:
+            collection_name = target.collection_for_user(record.payload["user_id"])
+            grouped.setdefault(collection_name, []).append(
+                PointStruct(id=record.id, vector=record.vector, payload=record.payload)
+            )
+
+        for collection_name, points in grouped.items():
+            target._ensure_collection_exists(collection_name)
+            target.client.upsert(collection_name=collection_name, points=points)
+
+        copied += len(records)
+        rate = copied / max(time.perf_counter() - started, 1e-9)
+        print(f"  copied {copied} points ({rate:.0f}/s)")
+
+    print(
+        f"✓ Copied {copied} points into {len(target.tenant_collections())} collections"
+    )
+
+    if drop_source:
+        source.client.delete_collection(COLLECTION_NAME)
+        print(f"✓ Dropped source collection '{COLLECTION_NAME}'")
+
+
+def apply_quantization(mode: str):
+    """Set the quantization mode of every note embedding collection"""
+    backend = _backend(settings.QDRANT_COLLECTION_LAYOUT, quantization=mode)
+    for collection_name in backend.tenant_collections():
+        backend.apply_quantization(collection_name)
+        print(f"  {collection_name}: quantization={mode}")
+    print("✓ Quantization updated (Qdrant re-encodes segments in the background)")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Migrate Qdrant note embedding collections"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("indexes", help="Create missing payload indexes")
+    tenant = subparsers.add_parser("tenant-index", help="Enable is_tenant layout")
+    tenant.add_argument("--batch-size", type=int, default=1000)
+    per_user = subparsers.add_parser("per-user", help="Split into per-user collections")
+    per_user.add_argument("--batch-size", type=int, default=500)
+    per_user.add_argument("--drop-source", action="store_true")
+    quantize = subparsers.add_parser("quantize", help="Set vector quantization")
+    quantize.add_argument("--mode", choices=QUANTIZATION_MODES, required=True)
+    args = parser.parse_args()
+
+    print("=" * 50)
+    print(f"Migrating Qdrant collection '{COLLECTION_NAME}' ({args.command})")
+    print("=" * 50)
+
+    if args.command == "indexes":
+        create_indexes()
+    elif args.command == "tenant-index":
+        migrate_tenant_index(args.batch_size)
+    elif args.command == "per-user":
+        migrate_per_user(args.batch_size, args.drop_source)
+    elif args.command == "quantize":
+        apply_quantization(args.mode)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,577 @@
+"""
+Rebuild the vector index from the database.
+
+Streams NoteEmbedding rows (joined with their Note) with a server-side
+cursor and upserts them into the configured vector backend. Vectors stored
+in NoteEmbedding.embedding are reused; rows whose vector is missing or stale
+(wrong dimension, or indexed by another model) are re-embedded in a process
+pool and written back to the database. Notes with no NoteEmbedding rows
+(indexed before chunk rows were stored) are then chunked, embedded and
+saved with their rows.
+
+Point IDs include the model name, so re-embedding with a new model writes
+new points: the old model's points (the IDs recorded in
+NoteEmbedding.qdrant_id, or the note's other points for notes without
+rows) are deleted once their replacements are upserted. The vector
+dimension is read from the loaded model; a model with a different
+dimension needs a new collection (--collection, or a new
+LOCAL_VECTOR_INDEX_DIR for the local backend) since existing ones keep
+theirs.
+
+Progress is checkpointed after every window of rows, so an interrupted
+rebuild resumes where it stopped. Memory is bounded by the window and the
+number of pages in flight, not by the size of the table.
+
+Usage (from backend/):
+    python -m scripts.rebuild_vector_index
+    python -m scripts.rebuild_vector_index --workers 4 --reembed
+    python -m scripts.rebuild_vector_index --collection note_embeddings_v2
+    python -m scripts.rebuild_vector_index --restart
+"""
+
+import argparse
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+from sqlalchemy import func, select, update
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.note import Note, NoteEmbedding
+from app.services.note_indexing_service import save_chunk_rows
+from app.services.embedding_codec import (
+    STORAGE_DTYPES,
+    decode_embeddings,
+    encode_embedding,
+)
+from app.services.vector_backends import VectorPoint
+from app.services.vector_service import VectorService, make_point_id
+
+DEFAULT_CHECKPOINT = "./vector_rebuild_checkpoint.json"
+
+# Seconds between progress lines
+PROGRESS_INTERVAL = 5.0
+
+ROW_COLUMNS = (
+    NoteEmbedding.id,
+    NoteEmbedding.note_id,
+    NoteEmbedding.chunk_index,
+    NoteEmbedding.chunk_text,
+    NoteEmbedding.embedding,
+    NoteEmbedding.embedding_dtype,
+    NoteEmbedding.qdrant_id,
+    Note.report_id,
+    Note.user_id,
+    Note.filename,
+    Note.file_type,
+)
+
+
+# Embedding worker processes ------------------------------------------------
+
+_worker_service = None
+
+
+def _init_embedding_worker(model_name: str, torch_threads: int):
+    """Load the model once per worker process"""
+    global _worker_service
+    from app.services.embedding_service import EmbeddingService
+
+    try:
+        import torch
+
+        # Workers split the cores instead of each claiming all of them
+        torch.set_num_threads(torch_threads)
+    except ImportError:
+        pass
+
+    _worker_service = EmbeddingService(model_name)
+    _worker_service.model
+
+
+def _embed_texts(texts: List[str]) -> np.ndarray:
+    """Embed one batch inside a worker process"""
+    return _worker_service.encode_array(texts)
+
+
+class _InlineResult:
+    """Future-like wrapper for embeddings computed in the main process"""
+
+    def __init__(self, value: np.ndarray):
+        self._value = value
+
+    def result(self) -> np.ndarray:
+        return self._value
+
+
+# Checkpoints ---------------------------------------------------------------
+
+
+def load_checkpoint(path: str, model_name: str, collection_name: str) -> Dict:
+    """Load a checkpoint, ignoring one written for another model/collection"""
+    empty = {"last_id": 0, "points": 0, "reembedded": 0}
+    if not os.path.exists(path):
+        return empty
+
+    with open(path, "r", encoding="utf-8") as f:
+        checkpoint = json.load(f)
+
+    if (
+        checkpoint.get("model_name") != model_name
+        or checkpoint.get("collection") != collection_name
+    ):
+        print(f"  checkpoint {path} is for another model/collection, starting over")
+        return empty
+    return checkpoint
+
+
+def save_checkpoint(path: str, checkpoint: Dict):
+    """Atomically replace the checkpoint file"""
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f)
+    os.replace(temp_path, path)
+
+
+# Rebuild -------------------------------------------------------------------
+
+
+class IndexRebuilder:
+    """Streams NoteEmbedding rows into the vector backend"""
+
+    def __init__(
+        self,
+        vector_service: VectorService,
+        pool: Optional[ProcessPoolExecutor],
+        page_size: int,
+        embed_batch_size: int,
+        prefetch_pages: int,
+        upsert_workers: int,
+        reembed: bool,
+    ):
+        self.vector_service = vector_service
+        self.pool = pool
+        self.page_size = page_size
+        self.embed_batch_size = embed_batch_size
+        self.prefetch_pages = prefetch_pages
+        self.upsert_workers = upsert_workers
+        self.reembed = reembed
+
+        self.dim = vector_service.embedding_dim
+        self.model_name = vector_service.model_name
+
+        # Re-embedded vectors of the current window, written back at its end
+        self.write_back: List[Dict] = []
+        # Points of another model replaced in the current window, by user
+        self.replaced: Dict[int, List[str]] = {}
+
+        self._inline_service = None
+
+    def _service(self):
+        """Embedding service of this process (chunking, inline embedding)"""
+        if self._inline_service is None:
+            from app.services.embedding_service import EmbeddingService
+
+            self._inline_service = EmbeddingService(self.model_name)
+        return self._inline_service
+
+    def _embed(self, texts: List[str]):
+        """Submit a batch to the pool (or embed inline without one)"""
+        if self.pool is not None:
+            return self.pool.submit(_embed_texts, texts)
+        return _InlineResult(self._service().encode_array(texts))
+
+    def _is_stale(self, row, point_id: str) -> bool:
+        """Whether a row's stored vector cannot be reused"""
+        if self.reembed or row.embedding is None:
+            return True
+        dtype = STORAGE_DTYPES.get(row.embedding_dtype)
+        if dtype is None or len(row.embedding) != self.dim * dtype.itemsize:
+            return True
+        # Point IDs encode the model, so a foreign ID means another model
+        return row.qdrant_id is not None and row.qdrant_id != point_id
+
+    def _submit_page(self, rows) -> Dict:
+        """Decode reusable vectors and start embedding the stale ones"""
+        point_ids = [
+            make_point_id(row.note_id, row.chunk_index, self.model_name) for row in rows
+        ]
+        vectors = np.empty((len(rows), self.dim), dtype=np.float32)
+
+        stale = []
+        by_dtype: Dict[str, List[int]] = {}
+        for position, (row, point_id) in enumerate(zip(rows, point_ids)):
+            if self._is_stale(row, point_id):
+                stale.append(position)
+            else:
+                by_dtype.setdefault(row.embedding_dtype, []).append(position)
+
+        reused = []
+        for dtype_name, positions in by_dtype.items():
+            reused.extend(positions)
+            vectors[positions] = decode_embeddings(
+                (rows[position].embedding for position in positions),
+                dtype_name,
+                self.dim,
+            )
+
+        futures = [
+            (
+                stale[start : start + self.embed_batch_size],
+                self._embed(
+                    [
+                        rows[position].chunk_text
+                        for position in stale[start : start + self.embed_batch_size]
+                    ]
+                ),
+            )
+            for start in range(0, len(stale), self.embed_batch_size)
+        ]
+
+        return {
+            "rows": rows,
+            "point_ids": point_ids,
+            "vectors": vectors,
+            "futures": futures,
+            "reused": reused,
+        }
+
+    def _finish_page(self, page: Dict) -> List[VectorPoint]:
+        """Wait for a page's embeddings and build its points"""
+        rows = page["rows"]
+        vectors = page["vectors"]
+        point_ids = page["point_ids"]
+
+        for positions, future in page["futures"]:
+            vectors[positions] = future.result()
+            for position in positions:
+                row = rows[position]
+                if row.qdrant_id is not None and row.qdrant_id != point_ids[position]:
+                    self.replaced.setdefault(row.user_id, []).append(row.qdrant_id)
+                blob, dtype_name = encode_embedding(vectors[position])
+                self.write_back.append(
+                    {
+                        "id": rows[position].id,
+                        "embedding": blob,
+                        "embedding_dtype": dtype_name,
+                        "qdrant_id": point_ids[position],
+                    }
+                )
+
+        # Reused rows indexed before their point ID was recorded
+        for position in page["reused"]:
+            if rows[position].qdrant_id is None:
+                self.write_back.append(
+                    {"id": rows[position].id, "qdrant_id": point_ids[position]}
+                )
+
+        return [
+            VectorPoint(
+                id=point_id,
+                vector=vector,
+                payload=self.vector_service._build_payload(
+                    row.note_id,
+                    row.chunk_index,
+                    row.chunk_text,
+                    row.report_id,
+                    row.user_id,
+                    row.filename,
+                    row.file_type,
+                ),
+            )
+            for row, point_id, vector in zip(rows, point_ids, vectors)
+        ]
+
+    def iter_point_batches(self, pages) -> Iterator[List[VectorPoint]]:
+        """
+        Turn pages of rows into point batches, embedding ahead of upserts.
+
+        Up to prefetch_pages pages are being embedded while earlier pages
+        are upserted, so the process pool and the vector store work at the
+        same time.
+        """
+        pending = deque()
+        for rows in pages:
+            pending.append(self._submit_page(rows))
+            if len(pending) > self.prefetch_pages:
+                yield self._finish_page(pending.popleft())
+        while pending:
+            yield self._finish_page(pending.popleft())
+
+    def rebuild_window(self, db, after_id: int, window: int) -> Dict[str, int]:
+        """
+        Upsert up to `window` rows with id > after_id.
+
+        Returns:
+            Dict with points and re-embedded counts and the last row id
+            (0 when no rows were left)
+        """
+        last_id = 0
+
+        def pages():
+            nonlocal last_id
+            result = db.execute(
+                select(*ROW_COLUMNS)
+                .join(Note, Note.id == NoteEmbedding.note_id)
+                .where(NoteEmbedding.id > after_id)
+                .order_by(NoteEmbedding.id)
+                .limit(window)
+                .execution_options(yield_per=self.page_size)
+            )
+            for rows in result.partitions():
+                last_id = rows[-1].id
+                yield rows
+
+        stats = self.vector_service.upsert_batches(
+            self.iter_point_batches(pages()), max_workers=self.upsert_workers
+        )
+
+        # Deleted before the rows forget their old IDs, so a crash here
+        # only means deleting them again on resume
+        for user_id, point_ids in self.replaced.items():
+            self.vector_service.delete_points(point_ids, user_id=user_id)
+        self.replaced = {}
+
+        reembedded = sum(1 for values in self.write_back if "embedding" in values)
+        if self.write_back:
+            db.execute(update(NoteEmbedding), self.write_back)
+            self.write_back = []
+        db.commit()
+
+        return {"points": stats["points"], "reembedded": reembedded, "last_id": last_id}
+
+    def _submit_note(self, note: Note) -> Dict:
+        """Chunk a note and start embedding its chunks"""
+        chunks = [chunk for chunk, _ in self._service().iter_chunks(note.content)]
+        futures = [
+            self._embed(chunks[start : start + self.embed_batch_size])
+            for start in range(0, len(chunks), self.embed_batch_size)
+        ]
+        return {"note": note, "chunks": chunks, "futures": futures}
+
+    def _finish_note(self, db, pending: Dict) -> int:
+        """Wait for a note's embeddings, upsert them and save its rows"""
+        note = pending["note"]
+        chunks = pending["chunks"]
+        vectors = np.empty((0, self.dim), dtype=np.float32)
+        if pending["futures"]:
+            vectors = np.concatenate([future.result() for future in pending["futures"]])
+
+        point_ids = self.vector_service.store_embeddings_batch(
+            embeddings=vectors,
+            note_id=note.id,
+            chunks=chunks,
+            report_id=note.report_id,
+            user_id=note.user_id,
+            filename=note.filename,
+            file_type=note.file_type,
+        )
+        save_chunk_rows(db, note, chunks, point_ids, vectors)
+
+        # Points of the note from another model (or longer old versions)
+        current = set(point_ids)
+        self.vector_service.delete_points(
+            [
+                hit.id
+                for hit in self.vector_service.backend.get_note_points(
+                    note.id, user_id=note.user_id
+                )
+                if hit.id not in current
+            ],
+            user_id=note.user_id,
+        )
+        return len(chunks)
+
+    def index_missing_notes(
+        self, db, after_note_id: int, window: int
+    ) -> Dict[str, int]:
+        """
+        Index up to `window` completed notes (id > after_note_id) with no rows.
+
+        Notes are scanned with an outer join to NoteEmbedding; up to
+        prefetch_pages notes are being embedded while earlier ones are
+        upserted and saved. Each note is committed on its own, so an
+        interrupted run does not index it again.
+
+        Returns:
+            Dict with notes and chunks indexed and the last note id
+            (0 when no notes were left)
+        """
+        note_ids = db.scalars(
+            select(Note.id)
+            .outerjoin(NoteEmbedding, NoteEmbedding.note_id == Note.id)
+            .where(
+                Note.id > after_note_id,
+                Note.status == "completed",
+                Note.content.isnot(None),
+                NoteEmbedding.id.is_(None),
+            )
+            .order_by(Note.id)
+            .limit(window)
+        ).all()
+
+        chunks = 0
+        pending = deque()
+        for note_id in note_ids:
+            pending.append(self._submit_note(db.get(Note, note_id)))
+            if len(pending) > self.prefetch_pages:
+                chunks += self._finish_note(db, pending.popleft())
+        while pending:
+            chunks += self._finish_note(db, pending.popleft())
+
+        return {
+            "notes": len(note_ids),
+            "chunks": chunks,
+            "last_note_id": note_ids[-1] if note_ids else 0,
+        }
+
+
+def _format_duration(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:d}:{minutes:02d}:{seconds:02d}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--collection", default="note_embeddings")
+    parser.add_argument("--backend", default=None, help="Override VECTOR_BACKEND")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=max(1, (os.cpu_count() or 2) // 2),
+        help="Embedding processes (0 embeds in this process)",
+    )
+    parser.add_argument("--embed-batch-size", type=int, default=256)
+    parser.add_argument(
+        "--page-size", type=int, default=settings.VECTOR_UPSERT_BATCH_SIZE
+    )
+    parser.add_argument(
+        "--window", type=int, default=20000, help="Rows between checkpoints"
+    )
+    parser.add_argument(
+        "--upsert-workers", type=int, default=settings.VECTOR_UPSERT_WORKERS
+    )
+    parser.add_argument(
+        "--reembed",
+        action="store_true",
+        help="Re-embed every row (after switching embedding models)",
+    )
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT)
+    parser.add_argument(
+        "--restart", action="store_true", help="Ignore an existing checkpoint"
+    )
+    args = parser.parse_args()
+
+    vector_service = VectorService(
+        backend=args.backend, collection_name=args.collection
+    )
+    model_name = vector_service.model_name
+
+    checkpoint = {"last_id": 0, "points": 0, "reembedded": 0}
+    if not args.restart:
+        checkpoint = load_checkpoint(args.checkpoint, model_name, args.collection)
+    checkpoint.update(model_name=model_name, collection=args.collection)
+
+    db = SessionLocal()
+    remaining = db.scalar(
+        select(func.count(NoteEmbedding.id)).where(
+            NoteEmbedding.id > checkpoint["last_id"]
+        )
+    )
+    missing_notes = db.scalar(
+        select(func.count(Note.id))
+        .outerjoin(NoteEmbedding, NoteEmbedding.note_id == Note.id)
+        .where(
+            Note.status == "completed",
+            Note.content.isnot(None),
+            NoteEmbedding.id.is_(None),
+        )
+    )
+    db.rollback()
+
+    print("=" * 50)
+    print(f"Rebuilding vector collection '{args.collection}' ({model_name})")
+    print("=" * 50)
+    if checkpoint["last_id"]:
+        print(f"  resuming after row {checkpoint['last_id']}")
+    print(f"  {remaining} chunks to index, {args.workers} embedding processes")
+    if missing_notes:
+        print(f"  {missing_notes} notes without chunk rows to chunk and embed")
+
+    pool = None
+    if args.workers > 0:
+        pool = ProcessPoolExecutor(
+            max_workers=args.workers,
+            initializer=_init_embedding_worker,
+            initargs=(model_name, max(1, (os.cpu_count() or 1) // args.workers)),
+        )
+
+    rebuilder = IndexRebuilder(
+        vector_service,
+        pool,
+        page_size=args.page_size,
+        embed_batch_size=args.embed_batch_size,
+        prefetch_pages=max(2, 2 * args.workers),
+        upsert_workers=args.upsert_workers,
+        reembed=args.reembed,
+    )
+
+    done = 0
+    started = time.perf_counter()
+    last_report = started
+    try:
+        while True:
+            stats = rebuilder.rebuild_window(db, checkpoint["last_id"], args.window)
+            if not stats["last_id"]:
+                break
+
+            checkpoint["last_id"] = stats["last_id"]
+            checkpoint["points"] += stats["points"]
+            checkpoint["reembedded"] += stats["reembedded"]
+            save_checkpoint(args.checkpoint, checkpoint)
+
+            done += stats["points"]
+            now = time.perf_counter()
+            if now - last_report >= PROGRESS_INTERVAL or done >= remaining:
+                last_report = now
+                rate = done / max(now - started, 1e-9)
+                eta = max(remaining - done, 0) / max(rate, 1e-9)
+                print(
+                    f"  {done}/{remaining} chunks ({done / max(remaining, 1):.1%})  "
+                    f"{rate:.0f}/s  re-embedded {checkpoint['reembedded']}  "
+                    f"ETA {_format_duration(eta)}"
+                )
+
+        after_note_id = 0
+        notes_done = 0
+        while True:
+            stats = rebuilder.index_missing_notes(db, after_note_id, args.page_size)
+            if not stats["last_note_id"]:
+                break
+            after_note_id = stats["last_note_id"]
+            notes_done += stats["notes"]
+            checkpoint["points"] += stats["chunks"]
+            checkpoint["reembedded"] += stats["chunks"]
+            print(f"  {notes_done}/{missing_notes} notes without chunk rows indexed")
+    finally:
+        db.close()
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    elapsed = time.perf_counter() - started
+    print(
+        f"✓ Indexed {checkpoint['points']} chunks "
+        f"({checkpoint['reembedded']} re-embedded) in {_format_duration(elapsed)}"
+    )
+    if os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Recall report for quantized vector storage.
+
+Measures recall@k of int8 and binary quantization against exact float32
+search, both on the raw quantized scores and after float32 rescoring at
+several oversampling factors, plus the in-memory size per vector.
+
+Corpus (first available):
+    --index-dir DIR   vectors stored in a local vector index
+                      (defaults to LOCAL_VECTOR_INDEX_DIR)
+    --texts FILE...   text files chunked and embedded with the real model
+    synthetic         clustered unit vectors shaped like sentence embeddings
+
+Usage (from backend/):
+    python -m scripts.vector_recall_report
+    python -m scripts.vector_recall_report --texts ../scripts/test_template.txt
+    python -m scripts.vector_recall_report --synthetic 50000 --queries 500
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.vector_backends import quantization as quant
+from app.services.vector_backends.local import read_live_vectors
+from app.services.vector_math import normalize_rows, top_k_indices
+
+K_VALUES = (1, 5, 10)
+OVERSAMPLING = (1.0, 2.0, 4.0, 8.0)
+
+
+def _load_index_vectors(directory: str, dim: int) -> np.ndarray:
+    """Concatenate every partition of a local vector index"""
+    if not os.path.isdir(directory):
+        return np.empty((0, dim), dtype=np.float32)
+    return read_live_vectors(directory, dim)
+
+
+def _embed_texts(paths) -> np.ndarray:
+    """Chunk and embed text files with the configured model"""
+    from app.services.embedding_service import get_embedding_service
+
+    service = get_embedding_service()
+    chunks = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            chunks.extend(chunk for chunk, _ in service.iter_chunks(f.read()))
+    return service.encode_array(chunks)
+
+
+def _synthetic_vectors(count: int, dim: int) -> np.ndarray:
+    """Unit vectors around a few hundred topics with anisotropic spread"""
+    rng = np.random.default_rng(7)
+    topics = normalize_rows(rng.standard_normal((max(1, count // 100), dim)))
+    spread = rng.uniform(0.2, 1.0, dim).astype(np.float32)
+    noise = rng.standard_normal((count, dim)).astype(np.float32) * spread * 0.08
+    return normalize_rows(topics[rng.integers(0, len(topics), count)] + noise)
+
+
+def _recall(found: np.ndarray, truth: np.ndarray, k: int) -> float:
+    return len(np.intersect1d(found[:k], truth[:k])) / k
+
+
+def _search(mode, codes, scales, vectors, query, k, oversampling):
+    """Top-k rows from quantized scores, optionally rescored with float32"""
+    if mode == quant.QUANTIZATION_INT8:
+        approximate = quant.int8_scores(codes, scales, query)
+    else:
+        approximate = quant.binary_scores(codes, query, vectors.shape[1])
+
+    if oversampling is None:
+        return top_k_indices(approximate, k)
+
+    candidates = top_k_indices(
+        approximate, quant.rescore_limit(k, oversampling, len(approximate))
+    )
+    return candidates[top_k_indices(vectors[candidates] @ query, k)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--index-dir", default=settings.LOCAL_VECTOR_INDEX_DIR)
+    parser.add_argument("--texts", nargs="*", default=[])
+    parser.add_argument("--synthetic", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument(
+        "--noise", type=float, default=0.05, help="Query perturbation (std dev)"
+    )
+    args = parser.parse_args()
+
+    vectors = _load_index_vectors(args.index_dir, args.dim)
+    source = f"local index {args.index_dir}"
+    if len(vectors) == 0 and args.texts:
+        vectors = _embed_texts(args.texts)
+        source = f"{len(args.texts)} text file(s)"
+    if len(vectors) == 0:
+        vectors = _synthetic_vectors(args.synthetic, args.dim)
+        source = "synthetic"
+    vectors = normalize_rows(vectors)
+
+    # Queries: stored vectors nudged off the corpus, as paraphrases would be
+    rng = np.random.default_rng(11)
+    sample = rng.choice(len(vectors), min(args.queries, len(vectors)), replace=False)
+    queries = normalize_rows(
+        vectors[sample]
+        + rng.standard_normal((len(sample), vectors.shape[1])).astype(np.float32)
+        * args.noise
+    )
+
+    max_k = max(K_VALUES)
+    truth = [top_k_indices(vectors @ query, max_k) for query in queries]
+
+    dim = vectors.shape[1]
+    print(f"Corpus: {len(vectors)} vectors x {dim} dims ({source})")
+    print(f"Queries: {len(queries)}, noise {args.noise}")
+    print("=" * 86)
+    header = "".join(f"  recall@{k:<3}" for k in K_VALUES)
+    print(
+        f"{'mode':<8} {'rescoring':<14} {'bytes/vec':>9} {'ratio':>6}{header}  ms/query"
+    )
+    print("-" * 86)
+    print(
+        f"{'float32':<8} {'-':<14} {quant.bytes_per_vector('none', dim):>9} "
+        f"{'1x':>6}" + "".join(f"  {1.0:>9.3f}" for _ in K_VALUES)
+    )
+
+    for mode in (quant.QUANTIZATION_INT8, quant.QUANTIZATION_BINARY):
+        codes, scales = quant.encode(mode, vectors)
+        size = quant.bytes_per_vector(mode, dim)
+        ratio = f"{quant.bytes_per_vector('none', dim) / size:.0f}x"
+
+        for oversampling in (None,) + OVERSAMPLING:
+            recalls = {k: [] for k in K_VALUES}
+            started = time.perf_counter()
+            for query, expected in zip(queries, truth):
+                found = _search(
+                    mode, codes, scales, vectors, query, max_k, oversampling
+                )
+                for k in K_VALUES:
+                    recalls[k].append(_recall(found, expected, k))
+            elapsed = (time.perf_counter() - started) / len(queries)
+
+            label = "none" if oversampling is None else f"{oversampling:g}x oversample"
+            print(
+                f"{mode:<8} {label:<14} {size:>9} {ratio:>6}"
+                + "".join(f"  {np.mean(recalls[k]):>9.3f}" for k in K_VALUES)
+                + f"  {elapsed * 1000:8.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
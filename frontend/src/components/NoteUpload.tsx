@@ -1,4 +1,4 @@
-import { useState, useRef } from 'react'
+import { useState, useRef, useEffect } from 'react'
 import { useParams } from 'react-router-dom'
 import NotesList from './NotesList'
 import apiService from '../services/api'
@@ -20,6 +20,53 @@ export default function NoteUpload({ onUploadComplete }: NoteUploadProps) {
   const [uploadedFiles, setUploadedFiles] = useState<UploadedFile[]>([])
   const [isDragging, setIsDragging] = useState(false)
   const fileInputRef = useRef<HTMLInputElement>(null)
+  const eventsRef = useRef<EventSource | null>(null)
+  // Notes still processing: note ID -> uploaded file ID
+  const processingNotesRef = useRef(new Map<string, string>())
+  // Notes that finished before their upload request returned
+  const finishedNotesRef = useRef(new Map<string, any>())
+
+  // Receive note status changes from the server instead of polling
+  useEffect(() => {
+    const events = apiService.openUploadEvents()
+    if (!events) return
+    eventsRef.current = events
+
+    events.addEventListener('note', (e) => {
+      const note = JSON.parse((e as MessageEvent).data)
+      if (note.status !== 'completed' && note.status !== 'failed') return
+
+      const noteId = String(note.id)
+      const uploadFileId = processingNotesRef.current.get(noteId)
+      if (uploadFileId) {
+        finishNote(uploadFileId, noteId, note)
+      } else {
+        finishedNotesRef.current.set(noteId, note)
+      }
+    })
+
+    events.addEventListener('open', () => {
+      // Events sent while reconnecting are lost: check once
+      processingNotesRef.current.forEach((uploadFileId, noteId) =>
+        checkNoteStatus(uploadFileId, noteId, false)
+      )
+    })
+
+    events.addEventListener('error', () => {
+      if (events.readyState === EventSource.CLOSED) {
+        // Stream unavailable: fall back to polling
+        eventsRef.current = null
+        processingNotesRef.current.forEach((uploadFileId, noteId) =>
+          checkNoteStatus(uploadFileId, noteId)
+        )
+      }
+    })
+
+    return () => {
+      events.close()
+      eventsRef.current = null
+    }
+  }, [])
 
   const handleDragOver = (e: React.DragEvent) => {
     e.preventDefault()
@@ -135,8 +182,18 @@ export default function NoteUpload({ onUploadComplete }: NoteUploadProps) {
           )
         )
         
-        // Poll for completion (optional)
-        setTimeout(() => checkNoteStatus(uploadedFile.id, result.id), 2000)
+        // Wait for the note event, or poll if the event stream is down
+        const noteId = String(result.id)
+        const finished = finishedNotesRef.current.get(noteId)
+        if (finished) {
+          finishedNotesRef.current.delete(noteId)
+          finishNote(uploadedFile.id, noteId, finished)
+        } else {
+          processingNotesRef.current.set(noteId, uploadedFile.id)
+          if (!eventsRef.current) {
+            setTimeout(() => checkNoteStatus(uploadedFile.id, noteId), 2000)
+          }
+        }
         
       } else if (result.status === 'failed') {
         // Processing failed
@@ -168,28 +225,26 @@ export default function NoteUpload({ onUploadComplete }: NoteUploadProps) {
     }
   }
 
-  const checkNoteStatus = async (uploadFileId: string, noteId: string) => {
+  const finishNote = (uploadFileId: string, noteId: string, note: any) => {
+    processingNotesRef.current.delete(noteId)
+    setUploadedFiles(prev =>
+      prev.map((f): UploadedFile => {
+        if (f.id !== uploadFileId) return f
+        return note.status === 'completed'
+          ? { ...f, status: 'completed' }
+          : { ...f, status: 'error', error: note.processing_error }
+      })
+    )
+  }
+
+  const checkNoteStatus = async (uploadFileId: string, noteId: string, poll = true) => {
     try {
       const note = await apiService.getNote(noteId)
-      
-      if (note.status === 'completed') {
-        setUploadedFiles(prev =>
-          prev.map(f =>
-            f.id === uploadFileId
-              ? { ...f, status: 'completed' }
-              : f
-          )
-        )
-      } else if (note.status === 'failed') {
-        setUploadedFiles(prev =>
-          prev.map(f =>
-            f.id === uploadFileId
-              ? { ...f, status: 'error', error: note.processing_error }
-              : f
-          )
-        )
-      } else {
-        // Still processing, check again
+
+      if (note.status === 'completed' || note.status === 'failed') {
+        finishNote(uploadFileId, noteId, note)
+      } else if (poll && !eventsRef.current) {
+        // Still processing and no event stream, check again
         setTimeout(() => checkNoteStatus(uploadFileId, noteId), 2000)
       }
     } catch (error) {
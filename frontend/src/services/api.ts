@@ -124,6 +124,16 @@ class APIService {
     await this.client.delete(`/notes/${noteId}`)
   }
 
+  // Upload Events API (Server-Sent Events)
+  openUploadEvents(): EventSource | null {
+    const { accessToken } = useAuthStore.getState()
+    if (!accessToken || typeof EventSource === 'undefined') return null
+
+    // EventSource cannot send an Authorization header
+    const token = encodeURIComponent(accessToken)
+    return new EventSource(`${API_BASE_URL}/uploads/events?token=${token}`)
+  }
+
   // AI Content Generation API
   async generateContent(sectionId: string, sectionDescription?: string) {
     const response = await this.client.post('/content/generate', {